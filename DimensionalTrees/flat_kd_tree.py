@@ -0,0 +1,147 @@
+# -----------------------------------------------------------------------------
+# Author: Colin McClelland
+# Date: 5/12/2025
+# Description: Array-backed kd-tree with leaf buckets, distances within a bucket are computed with NumPy
+# -----------------------------------------------------------------------------
+
+import heapq
+import math
+import time
+import random
+import numpy as np
+
+try:    # package import (notebook) or sibling import (tests)
+    from .kd_tree import KDTree
+except ImportError:
+    from kd_tree import KDTree
+
+
+class FlatKDTree:
+    """
+    kd-tree without node objects. The points are copied into one contiguous float64 array, reordered so that every
+    leaf owns a contiguous slice of it (a bucket of at most leaf_size points). The tree is complete and stored
+    implicitly like a binary heap: node i has children 2i+1 and 2i+2, and the arrays axis, split, start and end describe
+    node i. Internal nodes split their range at the median of their axis, the median point goes to the right child.
+    query() walks the tree like KDTree.search but computes all distances in a bucket with one NumPy expression.
+    """
+    def __init__(self, points, leaf_size=32):
+        if leaf_size < 1:
+            raise ValueError("Leaf size must be positive")
+        self.leaf_size = leaf_size
+        self.build(points)
+
+
+    def build(self, points):
+        points = np.ascontiguousarray(points, dtype=np.float64)
+        num_points = len(points)
+        self.dimensions = points.shape[1] if points.ndim == 2 else 0
+
+        depth = 0   # halve until every bucket fits, buckets then hold between leaf_size/2 and leaf_size points
+        while math.ceil(num_points / 2 ** depth) > self.leaf_size:
+            depth += 1
+        num_nodes = 2 ** (depth + 1) - 1
+        self.first_leaf = 2 ** depth - 1
+
+        indices = np.arange(num_points)     # permutation of the input, partitioned in place while building
+        axis = np.zeros(self.first_leaf, dtype=np.int64)
+        split = np.zeros(self.first_leaf, dtype=np.float64)
+        start = np.zeros(num_nodes, dtype=np.int64)
+        end = np.zeros(num_nodes, dtype=np.int64)
+        end[0] = num_points
+        for node in range(self.first_leaf):     # parents come before children in the implicit layout
+            lo, hi = start[node], end[node]
+            node_axis = (int(math.log2(node + 1))) % self.dimensions    # depth of the node % dimensions, like KDTree
+            mid = lo + (hi - lo) // 2
+            if hi - lo > 1:
+                segment = indices[lo:hi]
+                segment[:] = segment[np.argpartition(points[segment, node_axis], mid - lo)]
+            axis[node] = node_axis
+            split[node] = points[indices[mid], node_axis] if hi > lo else 0.0
+            start[2*node+1], end[2*node+1] = lo, mid
+            start[2*node+2], end[2*node+2] = mid, hi
+
+        self.indices = indices              # data[i] is the input point indices[i]
+        self.data = points[indices]
+        self.axis = axis
+        self.split = split
+        self.start = start
+        self.end = end
+        self.axis_list = axis.tolist()      # plain lists for the traversal, indexing numpy arrays per node is slow
+        self.split_list = split.tolist()
+        self.start_list = start.tolist()
+        self.end_list = end.tolist()
+
+
+    def search(self, node, target, target_array, k, heap):
+        if node >= self.first_leaf:     # leaf: distances to the whole bucket at once
+            lo, hi = self.start_list[node], self.end_list[node]
+            if lo == hi:
+                return
+            dist_sq = ((self.data[lo:hi] - target_array) ** 2).sum(axis=1)
+            if len(heap) == k:  # only points that beat the current furthest neighbor matter
+                candidates = np.flatnonzero(dist_sq < -heap[0][0]).tolist()
+            else:
+                candidates = range(hi - lo)
+            dist_sq = dist_sq.tolist()
+            for i in candidates:
+                if len(heap) < k:
+                    heapq.heappush(heap, (-dist_sq[i], lo + i))
+                elif dist_sq[i] < -heap[0][0]:
+                    heapq.heapreplace(heap, (-dist_sq[i], lo + i))
+            return
+
+        diff = target[self.axis_list[node]] - self.split_list[node]
+        if diff < 0:
+            nearer, farther = 2*node+1, 2*node+2
+        else:
+            nearer, farther = 2*node+2, 2*node+1
+
+        self.search(nearer, target, target_array, k, heap)
+        if (len(heap) < k) or (diff * diff < -heap[0][0]):
+            self.search(farther, target, target_array, k, heap)
+
+
+    def query(self, target, k=1):
+        # same output as KDTree.query: [(distance, point)] sorted by distance, points as tuples
+        heap = []   # max heap of (-distance squared, position in data)
+        if len(self.data) > 0:
+            target = [float(x) for x in target]
+            self.search(0, target, np.asarray(target), k, heap)
+
+        nearest = []
+        while heap:
+            dist_sq, position = heapq.heappop(heap)
+            nearest.append((math.sqrt(-dist_sq), tuple(self.data[position].tolist())))
+        nearest.reverse()
+        return nearest
+
+
+    def benchmark_build(self, num_points, seed=0):
+        rng = random.Random(seed)
+        points = [(rng.random(), rng.random()) for i in range(num_points)]
+        start_time = time.perf_counter()
+        self.build(points)
+        return time.perf_counter() - start_time
+
+
+    def benchmark_query(self, num_points, k=3, seed=0):
+        rng = random.Random(seed)
+        points = [(rng.random(), rng.random()) for index in range(num_points)]
+        self.build(points)
+
+        start_time = time.perf_counter()
+        for point in points:
+            self.query(point, k=k)
+        end_time = time.perf_counter()
+        return end_time - start_time
+
+
+    def benchmark_compare(self, sizes, k=3, leaf_sizes=[16,32,64], seed=0):
+        # query time of KDTree against FlatKDTree for every leaf size, on the same points. Returns one row per size
+        results = []
+        for num_points in sizes:
+            row = {"n": num_points, "kd_tree_time": KDTree([]).benchmark_query(num_points, k, seed)}
+            for leaf_size in leaf_sizes:
+                row[f"flat_{leaf_size}_time"] = FlatKDTree([], leaf_size).benchmark_query(num_points, k, seed)
+            results.append(row)
+        return results
@@ -8,6 +8,20 @@ import heapq
 import math
 import time
 import random
+import numpy as np
+from bisect import bisect_left
+from collections import defaultdict, Counter
+from concurrent.futures import ProcessPoolExecutor
+
+try:    # package import (notebook) or sibling import (tests)
+    from .metrics import get_metric, MinkowskiMetric
+    from .shared_points import share_array, attach_array, SharedRows, replace_points
+except ImportError:
+    from metrics import get_metric, MinkowskiMetric
+    from shared_points import share_array, attach_array, SharedRows, replace_points
+
+SELECT_CUTOFF = 32  # ranges at most this long are built with build_tree, numpy call overhead dominates below it
+BATCH_LEAF_SIZE = 32    # query_many scans subtrees at most this big as one bucket instead of walking them
 
 class KDNode:
     def __init__(self, point, axis, left=None, right=None):
@@ -15,24 +29,49 @@ class KDNode:
         self.axis = axis        # the dimension in the node that is used for comparisons
         self.left = left        # all points in the left subtree have a value less than the current point in the specified dimension
         self.right = right     
+        self.deleted = False    # tombstone: a deleted node still splits space until its subtree is rebuilt
+        self.size = 1 + (left.size if left is not None else 0) + (right.size if right is not None else 0)  # nodes in subtree, deleted included
+        self.live = 1 + (left.live if left is not None else 0) + (right.live if right is not None else 0)  # nodes in subtree that are not deleted
 
 
 class KDTree:
-    def __init__(self, points):
-        self.root = self.build_tree(points)
+    def __init__(self, points, build_method="sort", alpha=0.75, max_deleted_ratio=0.5, split_rule="cycle", metric=None, workers=1):
+        self.workers = workers      # more than 1: lower subtrees are built in parallel, see build_tree_parallel. This build
+                                    # and later rebuilds use the select method, whatever build_method says
+        self.metric = get_metric(metric)    # searches compare the metric's ranks (squared distances for Euclidean), see metrics.py
+        if not self.metric.coordinate_wise:
+            raise ValueError(f"{self.metric} cannot be pruned with splitting planes, use a VPTree")
+        self.build_method = build_method    # "sort": re-sort at every level, "select": linear time median selection
+        self.split_rule = split_rule        # how build picks the split axis and point, see choose_axis and split_rank
+        self.alpha = alpha                  # insert rebuilds a subtree once one child holds more than alpha of its nodes
+        self.max_deleted_ratio = max_deleted_ratio  # delete rebuilds a subtree once more than this share of it is deleted
+        self.nodes_visited = 0  # nodes examined by all kNN searches so far
+        self.root = self.build(points)
+
+
+    def build(self, point_list):
+        self.points = list(point_list)  # query_many reports positions in this list, inserts are appended to it
+        self.stale_points = 0       # deleted points still in self.points, see compact_points
+        self.flat = None            # array form of the tree for query_many, rebuilt on first use
+        if self.workers > 1:
+            return self.build_tree_parallel(point_list)
+        if self.build_method == "sort":
+            return self.build_tree(point_list)
+        if self.build_method == "select":
+            return self.build_tree_select(point_list)
+        raise ValueError(f"Unknown build method {self.build_method}")
 
 
     def build_tree(self, point_list, cur_depth=0):
         if not point_list:  # base case: stop when we reach a leaf node
             return None
 
-        dimensions = len(point_list[0]) # 2d, 3d, etc
-        axis = cur_depth % dimensions   # tree is structured such that it alternates dimension every level. For 2d tree: x,y,x,y,...
+        axis = self.choose_axis(point_list, cur_depth)
 
         sorted_points = sorted(point_list, key=lambda point: point[axis]) # key param is a function that returns the value on which we are sorting
         # could have instead used a method to return point[axis] but this requires passing a parameter, which is not possible when passing a function
         # A nested function would also work
-        median_index = len(sorted_points) // 2
+        median_index = self.split_rank([point[axis] for point in sorted_points]) if self.split_rule == "sliding_midpoint" else len(sorted_points) // 2
         median_point = sorted_points[median_index]
 
         left_points = sorted_points[:median_index]
@@ -44,6 +83,146 @@ class KDTree:
         return KDNode(point=median_point, axis=axis, left=left_child, right=right_child)
 
 
+    def choose_axis(self, point_list, cur_depth):
+        # split rules:
+            # "cycle": tree is structured such that it alternates dimension every level. For 2d tree: x,y,x,y,...
+            # "spread": axis along which the points are spread the widest
+            # "variance": axis with the highest variance
+            # "sliding_midpoint": widest axis like "spread", split_rank then picks the point closest to the middle of the spread
+        dimensions = len(point_list[0]) # 2d, 3d, etc
+        if self.split_rule == "cycle":
+            return cur_depth % dimensions
+        columns = list(zip(*point_list))
+        if self.split_rule == "variance":
+            scores = []
+            for column in columns:
+                mean = sum(column) / len(column)
+                scores.append(sum((x - mean) ** 2 for x in column))
+        elif self.split_rule in ("spread", "sliding_midpoint"):
+            scores = [max(column) - min(column) for column in columns]
+        else:
+            raise ValueError(f"Unknown split rule {self.split_rule}")
+        return scores.index(max(scores))
+
+
+    def split_rank(self, values):
+        # sliding midpoint on sorted values: the split moves from the middle of the spread to the nearest point, so cells
+        # keep a bounded aspect ratio even when the halves are uneven. Falls back to the median when all values are equal
+        if values[0] == values[-1]:
+            return len(values) // 2
+        mid = (values[0] + values[-1]) / 2
+        rank = bisect_left(values, mid)     # first value >= mid, there always is one
+        if rank > 0 and mid - values[rank-1] < values[rank] - mid:
+            rank -= 1
+        return rank
+
+
+    def build_subtree(self, point_list, cur_depth):
+        if (self.build_method == "select" or self.workers > 1) and point_list:
+            return self.select_subtree(point_list, np.asarray(point_list, dtype=float), np.arange(len(point_list)), 0, len(point_list), cur_depth)
+        return self.build_tree(point_list, cur_depth)
+
+
+    def build_tree_select(self, point_list):
+        # O(n log n) build: instead of sorting and slicing at every level, one index array is partitioned in place
+        # around the median with np.argpartition (linear time selection). The median and the two halves are the same
+        # as in build_tree, so for distinct coordinates both methods build the same tree
+        if not point_list:
+            return None
+        coords = np.asarray(point_list, dtype=float)
+        indices = np.arange(len(point_list))
+        return self.select_subtree(point_list, coords, indices, 0, len(point_list), 0)
+
+
+    def select_subtree(self, point_list, coords, indices, lo, hi, cur_depth):
+        if lo >= hi:
+            return None
+        if hi - lo <= SELECT_CUTOFF:
+            return self.build_tree([point_list[i] for i in indices[lo:hi].tolist()], cur_depth)
+
+        axis, median_index = self.select_split(coords, indices, lo, hi, cur_depth)
+
+        left_child = self.select_subtree(point_list, coords, indices, lo, median_index, cur_depth+1)
+        right_child = self.select_subtree(point_list, coords, indices, median_index+1, hi, cur_depth+1)
+
+        return KDNode(point=point_list[indices[median_index]], axis=axis, left=left_child, right=right_child)
+
+
+    def select_split(self, coords, indices, lo, hi, cur_depth) -> tuple:
+        # picks the split axis of indices[lo:hi] and partitions it around the split point, returns (axis, position of the split point)
+        segment = indices[lo:hi]    # view, so the partition happens in place
+        if self.split_rule == "cycle":
+            axis = cur_depth % coords.shape[1]
+        else:   # same choice as choose_axis, vectorized
+            block = coords[segment]
+            scores = block.var(axis=0) if self.split_rule == "variance" else block.max(axis=0) - block.min(axis=0)
+            axis = int(scores.argmax())
+        median_offset = (hi - lo) // 2
+        if self.split_rule == "sliding_midpoint":   # same rank as split_rank, without sorting
+            values = coords[segment, axis]
+            low, high = values.min(), values.max()
+            if low != high:
+                mid = (low + high) / 2
+                below = values < mid
+                median_offset = int(np.count_nonzero(below))
+                if median_offset > 0 and mid - values[below].max() < values[~below].min() - mid:
+                    median_offset -= 1
+        segment[:] = segment[np.argpartition(coords[segment, axis], median_offset)]  # smaller points end up left of the median
+        return axis, lo + median_offset
+
+
+    def build_tree_parallel(self, point_list):
+        # the top levels are partitioned here like build_tree_select, until there are about 4 subtrees per worker.
+        # Those subtrees are built by worker processes that read the coordinates from shared memory and send back
+        # finished KDNode subtrees holding row indices. The parent swaps the caller's points back in and hangs the subtrees
+        # under the top nodes, so the tree is the same as the one build_tree_select builds
+        if not point_list:
+            return None
+        coords = np.asarray(point_list, dtype=np.float64)
+        indices = np.arange(len(point_list))
+        num_tasks = self.workers * 4
+        if len(point_list) < num_tasks * SELECT_CUTOFF * 4:     # not worth starting processes
+            return self.select_subtree(point_list, coords, indices, 0, len(point_list), 0)
+
+        levels = math.ceil(math.log2(num_tasks))
+        tasks = []  # (parent, "left" / "right", lo, hi, depth)
+        root = self.split_top(point_list, coords, indices, 0, len(point_list), 0, levels, tasks)
+        block = share_array(coords)
+        try:
+            with ProcessPoolExecutor(self.workers) as pool:
+                args = [(block.name, coords.shape, indices[lo:hi].copy(), depth, self.split_rule) for _, _, lo, hi, depth in tasks]
+                subtrees = list(pool.map(build_subtree_worker, args))
+        finally:
+            block.close()
+            block.unlink()
+        for (parent, side, _, _, _), subtree in zip(tasks, subtrees):
+            setattr(parent, side, replace_points(subtree, point_list.__getitem__))
+        self.update_sizes(root, levels)
+        return root
+
+
+    def split_top(self, point_list, coords, indices, lo, hi, cur_depth, levels, tasks):
+        if hi - lo <= SELECT_CUTOFF:    # small enough to build here, like select_subtree does
+            return self.select_subtree(point_list, coords, indices, lo, hi, cur_depth)
+        axis, median_index = self.select_split(coords, indices, lo, hi, cur_depth)
+        node = KDNode(point=point_list[indices[median_index]], axis=axis)
+        for side, start, end in (("left", lo, median_index), ("right", median_index+1, hi)):
+            if cur_depth + 1 < levels:
+                setattr(node, side, self.split_top(point_list, coords, indices, start, end, cur_depth+1, levels, tasks))
+            elif end > start:
+                tasks.append((node, side, start, end, cur_depth+1))
+        return node
+
+
+    def update_sizes(self, node, levels):   # top nodes were created before their subtrees were attached
+        if node is None or levels == 0:
+            return
+        self.update_sizes(node.left, levels-1)
+        self.update_sizes(node.right, levels-1)
+        node.size = 1 + (node.left.size if node.left is not None else 0) + (node.right.size if node.right is not None else 0)
+        node.live = 1 + (node.left.live if node.left is not None else 0) + (node.right.live if node.right is not None else 0)
+
+
     def distance_squared(self, point1, point2):
         dist = 0
         for i in range(len(point1)):
@@ -51,17 +230,18 @@ class KDTree:
         return dist
 
 
-    def search(self, node, target, k, heap):
+    def search(self, node, target, k, heap) -> int:  # returns the number of nodes visited, query adds it to nodes_visited
         if node is None:    # base case: leaf node
-            return
+            return 0
 
-        dist_sq = self.distance_squared(target, node.point)
+        if not node.deleted:
+            dist_sq = self.metric.rank(target, node.point)  # squared distance for Euclidean
 
-        if len(heap) < k:   # until heap has k points, every point encountered is a nearest neighbor
-            heapq.heappush(heap, (-dist_sq, node.point))    # heap stores tuple: (distance, point)
-        else:
-            if dist_sq < -heap[0][0]:   # 'Furthest near neighbor' is stored at root of heap
-                heapq.heapreplace(heap, (-dist_sq, node.point))
+            if len(heap) < k:   # until heap has k points, every point encountered is a nearest neighbor
+                heapq.heappush(heap, (-dist_sq, node.point))    # heap stores tuple: (distance, point)
+            else:
+                if dist_sq < -heap[0][0]:   # 'Furthest near neighbor' is stored at root of heap
+                    heapq.heapreplace(heap, (-dist_sq, node.point))
 
         axis = node.axis    # the dimension we are comparing on
         diff = target[axis] - node.point[axis]  # distance in just the current dimension
@@ -72,7 +252,7 @@ class KDTree:
         else:
             nearer, farther = node.right, node.left
 
-        self.search(nearer, target, k, heap)    # search from the nearer node (in current dimension only)
+        visited = 1 + self.search(nearer, target, k, heap)    # search from the nearer node (in current dimension only)
 
         # because we only consider one dimension when choosing which subtree to search, it is possible that there is a closer point that we did not consider in the other subtree
         # for example, if we are targeting (2,4) and are in the x dimension, we would choose (1,1000) instead of (4, 5)
@@ -80,41 +260,706 @@ class KDTree:
             # 1) if we dont have k nearest neighbors then we have to find more points
             # 2) if there is a possibility that there is a closer point in the other subtree, then we must explore it
                 # note that the distance (to the nearer point) does not actually get computed until the next recursive call
-        if (len(heap) < k) or (diff * diff < -heap[0][0]):
-            self.search(farther, target, k, heap)
+        if (len(heap) < k) or (self.metric.axis_rank(diff) < -heap[0][0]):    # diff * diff for Euclidean
+            visited += self.search(farther, target, k, heap)
+        return visited
+
 
+    def search_approx(self, node, target, k, heap, shrink, visits_left):
+        # search with two relaxations, returns the number of visits left:
+            # 1) the farther subtree is only explored if it could hold a point closer than kth distance / (1+eps),
+            #    shrink = rank of (1+eps), (1+eps)^2 for squared distances. Every returned neighbor is then within (1+eps) of the true one
+            # 2) the search stops once visits_left nodes have been visited, the best points found so far are kept
+        if node is None or visits_left <= 0:
+            return visits_left
+        visits_left -= 1
+        self.nodes_visited += 1
 
-    def query(self, target, k=1):
+        if not node.deleted:
+            dist_sq = self.metric.rank(target, node.point)
+            if len(heap) < k:
+                heapq.heappush(heap, (-dist_sq, node.point))
+            elif dist_sq < -heap[0][0]:
+                heapq.heapreplace(heap, (-dist_sq, node.point))
+
+        diff = target[node.axis] - node.point[node.axis]
+        if diff < 0:
+            nearer, farther = node.left, node.right
+        else:
+            nearer, farther = node.right, node.left
+
+        visits_left = self.search_approx(nearer, target, k, heap, shrink, visits_left)
+        if (len(heap) < k) or (self.metric.axis_rank(diff) * shrink < -heap[0][0]):
+            visits_left = self.search_approx(farther, target, k, heap, shrink, visits_left)
+        return visits_left
+
+
+    def search_best_first(self, target, k, heap, shrink=1, max_visits=math.inf):
+        # iterative best-bin-first search. Pending subtrees wait in a min heap ordered by the squared distance from target
+        # to their cell (tracked incrementally like in radius_search). Each popped subtree is descended to a leaf along the
+        # nearer side, pushing the farther sides. Cells are explored closest first, so the kth distance shrinks early and the
+        # search ends as soon as the closest pending cell is farther than it. shrink and max_visits work like in search_approx
+        if self.root is None:
+            return
+        pending = [(0, 0, self.root, (0,) * len(target))]   # (cell distance, tie breaker, node, per axis offsets)
+        pushed = 1
+        visits = 0
+        while pending:
+            cell_dist_sq, _, node, offsets = heapq.heappop(pending)
+            if len(heap) == k and cell_dist_sq * shrink >= -heap[0][0]:
+                return
+            while node is not None:
+                if visits >= max_visits:
+                    return
+                visits += 1
+                self.nodes_visited += 1
+                point = node.point
+                if not node.deleted:
+                    dist_sq = self.metric.rank(target, point)
+                    if len(heap) < k:
+                        heapq.heappush(heap, (-dist_sq, point))
+                    elif dist_sq < -heap[0][0]:
+                        heapq.heapreplace(heap, (-dist_sq, point))
+
+                axis = node.axis
+                diff = target[axis] - point[axis]
+                if diff < 0:
+                    nearer, farther = node.left, node.right
+                else:
+                    nearer, farther = node.right, node.left
+                if farther is not None:
+                    farther_offsets = offsets[:axis] + (diff,) + offsets[axis+1:]
+                    farther_dist_sq = self.metric.cell_rank(cell_dist_sq, offsets[axis], diff, farther_offsets)
+                    if len(heap) < k or farther_dist_sq * shrink < -heap[0][0]:
+                        heapq.heappush(pending, (farther_dist_sq, pushed, farther, farther_offsets))
+                        pushed += 1
+                node = nearer
+
+
+    def query(self, target, k=1, eps=0, max_visits=None, best_first=False):
+        # eps > 0 or a max_visits budget switch to the approximate search, see search_approx
+        # best_first=True uses the iterative search_best_first instead of the recursive searches
         heap = []  
         # application of heap: use a max heap to track the k smallest value. Book describes this
         # Root stores the max value, so when computing a new distance, can just compare to the top of the heap and then insert if warranted
         # heapq provides a min heap, so we have to use negative distance
         
-        self.search(self.root, target, k, heap) # performs the actual knn search, stores results in the heap
+        if best_first:
+            self.search_best_first(target, k, heap, self.metric.to_rank(1 + eps), max_visits if max_visits is not None else math.inf)
+        elif eps == 0 and max_visits is None:
+            self.nodes_visited += self.search(self.root, target, k, heap) # performs the actual knn search, stores results in the heap
+        else:
+            self.search_approx(self.root, target, k, heap, self.metric.to_rank(1 + eps), max_visits if max_visits is not None else math.inf)
 
         nearest = []
         while heap:
             dist_sq, point = heapq.heappop(heap)   # heap stores tuple: (distance, point)
-            nearest.append((math.sqrt(-dist_sq), point))    # take squre root for actual distance (used squared distance in search). Negate distance for actual distance (negative distance used in search)
+            nearest.append((self.metric.to_distance(-dist_sq), point))    # take squre root for actual distance (used squared distance in search). Negate distance for actual distance (negative distance used in search)
         nearest.reverse()   # have to reverse bc of heap property
         return nearest
 
 
+    def query_radius(self, target, r):
+        # generator of (distance, point) for every point within r of target, in tree order.
+        # Each stack entry carries the squared distance from target to the node's cell and the per axis offsets
+        # it is made of: crossing a splitting plane only changes the offset on that axis (incremental distance),
+        # so a subtree is skipped as soon as its whole cell is farther than r
+        for dist_sq, point in self.radius_search(target, r):
+            yield self.metric.to_distance(dist_sq), point
+
+
+    def count_radius(self, target, r):
+        count = 0
+        for _ in self.radius_search(target, r):
+            count += 1
+        return count
+
+
+    def radius_search(self, target, r):
+        r_sq = self.metric.to_rank(r)
+        stack = [(self.root, 0, (0,) * len(target))] if self.root is not None else []
+        while stack:
+            node, cell_dist_sq, offsets = stack.pop()
+            if cell_dist_sq > r_sq:     # the bound may have been computed when the entry was pushed
+                continue
+            if not node.deleted:
+                dist_sq = self.metric.rank(target, node.point)
+                if dist_sq <= r_sq:
+                    yield dist_sq, node.point
+
+            axis = node.axis
+            diff = target[axis] - node.point[axis]
+            if diff < 0:
+                nearer, farther = node.left, node.right
+            else:
+                nearer, farther = node.right, node.left
+            if farther is not None:
+                farther_offsets = offsets[:axis] + (diff,) + offsets[axis+1:]
+                farther_dist_sq = self.metric.cell_rank(cell_dist_sq, offsets[axis], diff, farther_offsets)
+                if farther_dist_sq <= r_sq:
+                    stack.append((farther, farther_dist_sq, farther_offsets))
+            if nearer is not None:
+                stack.append((nearer, cell_dist_sq, offsets))
+
+
+    def query_box(self, lo, hi):
+        # generator of every point p with lo[i] <= p[i] <= hi[i] on all axes. A subtree is only entered when the box
+        # reaches its side of the splitting plane, points equal to the split value can be on either side
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            point = node.point
+            if not node.deleted and all(lo[i] <= point[i] <= hi[i] for i in range(len(point))):
+                yield point
+            axis = node.axis
+            if node.right is not None and hi[axis] >= point[axis]:
+                stack.append(node.right)
+            if node.left is not None and lo[axis] <= point[axis]:
+                stack.append(node.left)
+
+
+    def insert(self, point):
+        # new point becomes a leaf. Afterwards the highest node on its path with a child holding more than alpha of
+        # its nodes is rebuilt from its points (scapegoat rebuild), which keeps the depth logarithmic
+        self.flat = None
+        self.points.append(point)
+        if self.root is None:
+            self.root = KDNode(point, 0)
+            return
+        path = []
+        node = self.root
+        while node is not None:
+            path.append(node)
+            node.size += 1
+            node.live += 1
+            node = node.left if point[node.axis] < node.point[node.axis] else node.right
+        parent = path[-1]
+        leaf = KDNode(point, len(path) % len(point))
+        if point[parent.axis] < parent.point[parent.axis]:
+            parent.left = leaf
+        else:
+            parent.right = leaf
+
+        for depth, node in enumerate(path):
+            larger_child = max(node.left.size if node.left is not None else 0, node.right.size if node.right is not None else 0)
+            if larger_child > self.alpha * node.size:
+                self.rebuild(path, depth)
+                return
+
+
+    def delete(self, point):
+        # marks one node holding point as deleted. The highest node on its path with more than max_deleted_ratio of
+        # its subtree deleted is rebuilt from its remaining points, which drops the tombstones
+        path = self.find_path(point)
+        if path is None:
+            raise KeyError("Point does not exist within tree")
+        self.flat = None
+        path[-1].deleted = True
+        for node in path:
+            node.live -= 1
+        self.stale_points += 1
+        for depth, node in enumerate(path):
+            if node.size - node.live > self.max_deleted_ratio * node.size:
+                self.rebuild(path, depth)
+                break
+        if self.stale_points > self.max_deleted_ratio * len(self.points):
+            self.compact_points()
+
+
+    def compact_points(self):
+        # drops the deleted points from self.points, keeping the order of the rest, so it does not grow without bound
+        # under inserts and deletes. Positions reported by query_many before this refer to the old list
+        live = Counter(tuple(point) for point in self.live_points(self.root))
+        points = []
+        for point in self.points:
+            if live[tuple(point)] > 0:  # duplicates: the first copies are the live ones
+                live[tuple(point)] -= 1
+                points.append(point)
+        self.points = points
+        self.stale_points = 0
+
+
+    def find_path(self, point) -> list:
+        # nodes from the root to a live node holding point, or None. Points equal to a split value can be on both sides
+        point = tuple(point)
+        stack = [[self.root]] if self.root is not None else []
+        while stack:
+            path = stack.pop()
+            node = path[-1]
+            if not node.deleted and tuple(node.point) == point:
+                return path
+            axis = node.axis
+            if node.right is not None and point[axis] >= node.point[axis]:
+                stack.append(path + [node.right])
+            if node.left is not None and point[axis] <= node.point[axis]:
+                stack.append(path + [node.left])
+        return None
+
+
+    def rebuild(self, path, depth):
+        # replaces path[depth] by a balanced subtree of its live points and fixes the sizes of its ancestors
+        node = path[depth]
+        points = self.live_points(node)
+
+        new_node = self.build_subtree(points, depth)
+        removed = node.size - (new_node.size if new_node is not None else 0)
+        for ancestor in path[:depth]:
+            ancestor.size -= removed
+        if depth == 0:
+            self.root = new_node
+            if self.stale_points:   # the whole tree was rebuilt, so self.points can drop the deleted points too
+                self.compact_points()
+        elif path[depth-1].left is node:
+            path[depth-1].left = new_node
+        else:
+            path[depth-1].right = new_node
+
+
+    def live_points(self, node) -> list:    # points of the nodes in the subtree of node that are not deleted
+        points = []
+        stack = [node] if node is not None else []
+        while stack:
+            cur_node = stack.pop()
+            if not cur_node.deleted:
+                points.append(cur_node.point)
+            if cur_node.left is not None: stack.append(cur_node.left)
+            if cur_node.right is not None: stack.append(cur_node.right)
+        return points
+
+
+    def height(self):
+        height = 0
+        stack = [(self.root, 1)] if self.root is not None else []
+        while stack:
+            node, depth = stack.pop()
+            height = max(height, depth)
+            if node.left is not None: stack.append((node.left, depth + 1))
+            if node.right is not None: stack.append((node.right, depth + 1))
+        return height
+
+
+    def flatten(self) -> dict:
+        # array form of the tree in preorder: coordinates, axis, left/right child positions (-1 for none), subtree size,
+        # position of every point in self.points (-1 for deleted nodes) and the inorder rank of every node.
+        # In preorder a subtree is the contiguous run of sizes[i] rows starting at its root i
+        if self.flat is not None:
+            return self.flat
+        nodes = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            nodes.append(node)
+            if node.right is not None: stack.append(node.right)
+            if node.left is not None: stack.append(node.left)
+        position = {id(node): i for i, node in enumerate(nodes)}
+
+        input_positions = defaultdict(list)     # duplicates get distinct positions
+        for i in range(len(self.points) - 1, -1, -1):
+            input_positions[tuple(self.points[i])].append(i)
+
+        inorder = np.zeros(len(nodes), dtype=np.int64)
+        stack = []
+        node = self.root
+        rank = 0
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            inorder[position[id(node)]] = rank
+            rank += 1
+            node = node.right
+
+        lefts = [position[id(node.left)] if node.left is not None else -1 for node in nodes]
+        rights = [position[id(node.right)] if node.right is not None else -1 for node in nodes]
+
+        self.flat = {
+            "coords": np.array([node.point for node in nodes], dtype=np.float64).reshape(len(nodes), -1),
+            "axes": [node.axis for node in nodes],
+            "lefts": lefts,
+            "rights": rights,
+            "sizes": [node.size for node in nodes],
+            "point_indices": np.array([input_positions[tuple(node.point)].pop() if not node.deleted else -1 for node in nodes], dtype=np.int64),
+            "inorder": inorder,
+        }
+        return self.flat
+
+
+    def query_order(self, flat, targets):
+        # descends all targets at once and sorts them by the inorder rank of the node they end at,
+        # so consecutive targets lie in the same region of the tree
+        axes, lefts, rights = np.array(flat["axes"]), np.array(flat["lefts"]), np.array(flat["rights"])
+        cur = np.zeros(len(targets), dtype=np.int64)
+        active = np.arange(len(targets))
+        while active.size:
+            nodes = cur[active]
+            node_axes = axes[nodes]
+            go_left = targets[active, node_axes] < flat["coords"][nodes, node_axes]
+            children = np.where(go_left, lefts[nodes], rights[nodes])
+            moved = children != -1
+            cur[active[moved]] = children[moved]
+            active = active[moved]
+        return np.argsort(flat["inorder"][cur], kind="stable")
+
+
+    def query_many(self, targets, k=1, block_size=256, workers=None):
+        # kNN for every row of an (m, d) array. Returns (m, k) arrays of distances and positions in self.points,
+        # nearest first. self.points starts as the input points, inserts are appended and deleted points are dropped
+        # from time to time, see compact_points. Rows are padded with inf / -1 when the tree has fewer than k points.
+        # Targets are grouped into blocks of nearby queries that walk the tree together, see query_block.
+        # With workers > 1 the blocks are spread over a process pool.
+        targets = np.asarray(targets, dtype=np.float64).reshape(len(targets), -1)
+        distances = np.full((len(targets), k), np.inf)
+        indices = np.full((len(targets), k), -1, dtype=np.int64)
+        if len(targets) == 0 or self.root is None:
+            return distances, indices
+
+        flat = self.flatten()
+        order = self.query_order(flat, targets)
+        blocks = [order[i:i+block_size] for i in range(0, len(order), block_size)]
+        if workers is not None and workers > 1:
+            with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(flat, self.metric)) as pool:
+                chunksize = max(1, len(blocks) // (workers * 4))
+                results = list(pool.map(query_block_worker, ((targets[block], k) for block in blocks), chunksize=chunksize))
+        else:
+            results = (query_block(flat, targets[block], k, self.metric) for block in blocks)
+        for block, (block_distances, block_indices) in zip(blocks, results):
+            distances[block] = block_distances
+            indices[block] = block_indices
+        return self.metric.to_distance(distances), indices
+
+
     def benchmark_build(self, num_points, seed=0):
         rng = random.Random(seed)
         points = [(rng.random(), rng.random()) for i in range(num_points)]
         start_time = time.perf_counter()
-        self.root = self.build_tree(points)
+        self.root = self.build(points)
         return time.perf_counter() - start_time
 
 
+    def benchmark_approximate(self, num_points, dimensions=[2,4,8,16,32], eps_values=[0,0.5,1,3], max_visits_values=[None,200],
+                              k=10, num_queries=100, seed=0):
+        # recall against the exact neighbors and query time for every (d, eps, max_visits) on uniform random points.
+        # Returns one row per combination, eps=0 with no budget is the exact search
+        rng = random.Random(seed)
+        results = []
+        for dims in dimensions:
+            points = [tuple(rng.random() for _ in range(dims)) for _ in range(num_points)]
+            targets = [tuple(rng.random() for _ in range(dims)) for _ in range(num_queries)]
+            self.root = self.build(points)
+            exact = [set(point for dist, point in self.query(target, k)) for target in targets]
+            for eps in eps_values:
+                for max_visits in max_visits_values:
+                    start_time = time.perf_counter()
+                    approx = [self.query(target, k, eps, max_visits) for target in targets]
+                    query_time = time.perf_counter() - start_time
+                    found = sum(len(exact[i] & set(point for dist, point in approx[i])) for i in range(num_queries))
+                    results.append({"d": dims, "eps": eps, "max_visits": max_visits, "time": query_time,
+                                    "recall": found / (k * num_queries)})
+        return results
+
+
+    def benchmark_best_first(self, num_points, dimensions=[2,4,8,16], k=10, num_queries=200, seed=0):
+        # recursive depth first search against best-bin-first on uniform points: wall time and nodes visited per query.
+        # Returns one row per dimension
+        rng = random.Random(seed)
+        results = []
+        for dims in dimensions:
+            points = [tuple(rng.random() for _ in range(dims)) for _ in range(num_points)]
+            targets = [tuple(rng.random() for _ in range(dims)) for _ in range(num_queries)]
+            self.root = self.build(points)
+            row = {"d": dims}
+            for name, best_first in (("recursive", False), ("best_first", True)):
+                self.nodes_visited = 0
+                start_time = time.perf_counter()
+                for target in targets:
+                    self.query(target, k, best_first=best_first)
+                row[f"{name}_time"] = time.perf_counter() - start_time
+                row[f"{name}_visits"] = self.nodes_visited / num_queries
+            results.append(row)
+        return results
+
+
+    def benchmark_split_rules(self, num_points, rules=["cycle","spread","variance","sliding_midpoint"], dims=3, k=5, num_queries=500, seed=0):
+        # build time, depth and query time of every split rule on uniform points and on clustered, anisotropic points
+        # (tight clusters stretched along the first axis). Returns one row per (dataset, rule)
+        rng = random.Random(seed)
+        uniform = [tuple(rng.random() for _ in range(dims)) for _ in range(num_points)]
+        centers = [tuple(rng.random() for _ in range(dims)) for _ in range(20)]
+        clustered = []
+        for _ in range(num_points):
+            center = rng.choice(centers)
+            clustered.append(tuple(center[i] + rng.gauss(0, 0.05 if i == 0 else 0.002) for i in range(dims)))
+
+        results = []
+        for dataset, points in (("uniform", uniform), ("clustered", clustered)):
+            targets = [tuple(x + rng.gauss(0, 0.001) for x in rng.choice(points)) for _ in range(num_queries)]
+            for rule in rules:
+                tree = KDTree([], self.build_method, split_rule=rule)
+                start_time = time.perf_counter()
+                tree.root = tree.build(points)
+                build_time = time.perf_counter() - start_time
+                tree.nodes_visited = 0
+                start_time = time.perf_counter()
+                for target in targets:
+                    tree.query(target, k)
+                query_time = time.perf_counter() - start_time
+                results.append({"dataset": dataset, "rule": rule, "build_time": build_time, "depth": tree.height(),
+                                "query_time": query_time, "visits": tree.nodes_visited / num_queries})
+        return results
+
+
+    def benchmark_metrics(self, num_points, metrics=["euclidean","manhattan","chebyshev",MinkowskiMetric(3)], k=5, num_queries=1000, seed=0):
+        # build, single query and query_many time for every metric on the same uniform 3d points. Returns one row per metric
+        rng = random.Random(seed)
+        points = [(rng.random(), rng.random(), rng.random()) for _ in range(num_points)]
+        targets = points[:num_queries]
+        results = []
+        for metric in metrics:
+            tree = KDTree([], self.build_method, split_rule=self.split_rule, metric=metric)
+            start_time = time.perf_counter()
+            tree.root = tree.build(points)
+            build_time = time.perf_counter() - start_time
+
+            start_time = time.perf_counter()
+            for target in targets:
+                tree.query(target, k)
+            query_time = time.perf_counter() - start_time
+
+            tree.flatten()
+            start_time = time.perf_counter()
+            tree.query_many(targets, k)
+            batch_time = time.perf_counter() - start_time
+            results.append({"metric": repr(tree.metric), "build_time": build_time, "query_time": query_time, "query_many_time": batch_time})
+        return results
+
+
+    def benchmark_radius(self, num_points, radii=[0.01,0.05,0.1], dimensions=[2,3,5], num_queries=100, seed=0):
+        # query_radius and query_box (cube of side 2r around the target) against a brute force scan of all points.
+        # Returns one row per (dimension, radius)
+        rng = random.Random(seed)
+        results = []
+        for dims in dimensions:
+            points = [tuple(rng.random() for _ in range(dims)) for _ in range(num_points)]
+            targets = [tuple(rng.random() for _ in range(dims)) for _ in range(num_queries)]
+            self.root = self.build(points)
+            for r in radii:
+                row = {"d": dims, "r": r}
+
+                start_time = time.perf_counter()
+                found = sum(1 for target in targets for _ in self.query_radius(target, r))
+                row["radius_time"] = time.perf_counter() - start_time
+
+                rank_r = self.metric.to_rank(r)     # same comparison as query_radius
+                start_time = time.perf_counter()
+                for target in targets:
+                    [point for point in points if self.metric.rank(target, point) <= rank_r]
+                row["radius_brute_time"] = time.perf_counter() - start_time
+
+                boxes = [([x - r for x in target], [x + r for x in target]) for target in targets]
+                start_time = time.perf_counter()
+                for lo, hi in boxes:
+                    for _ in self.query_box(lo, hi): pass
+                row["box_time"] = time.perf_counter() - start_time
+
+                start_time = time.perf_counter()
+                for lo, hi in boxes:
+                    [point for point in points if all(lo[i] <= point[i] <= hi[i] for i in range(dims))]
+                row["box_brute_time"] = time.perf_counter() - start_time
+
+                row["avg_results"] = found / num_queries
+                results.append(row)
+        return results
+
+
+    def benchmark_dynamic(self, num_points, num_ops, insert_ratio=0.4, delete_ratio=0.3, k=3, sample_every=1000, seed=0):
+        # starts from num_points uniform points, then runs a random mix of inserts, deletes and kNN queries.
+        # Inserted points sweep along x (x grows with time), the worst case for a tree that never rebalances.
+        # Returns one row per sample_every operations: depth, sizes and the time spent on each operation type since the last row
+        rng = random.Random(seed)
+        points = [(rng.random(), rng.random()) for index in range(num_points)]
+        self.root = self.build(points)
+        present = list(points)
+
+        results = []
+        times = {"insert": 0, "delete": 0, "query": 0}
+        for op in range(1, num_ops + 1):
+            choice = rng.random()
+            if choice < insert_ratio:
+                point = (1 + op / num_ops, rng.random())
+                start_time = time.perf_counter()
+                self.insert(point)
+                times["insert"] += time.perf_counter() - start_time
+                present.append(point)
+            elif choice < insert_ratio + delete_ratio and present:
+                point = present.pop(rng.randrange(len(present)))
+                start_time = time.perf_counter()
+                self.delete(point)
+                times["delete"] += time.perf_counter() - start_time
+            else:
+                target = (rng.random() * 2, rng.random())
+                start_time = time.perf_counter()
+                self.query(target, k)
+                times["query"] += time.perf_counter() - start_time
+            if op % sample_every == 0:
+                results.append({"ops": op, "depth": self.height(), "size": self.root.size if self.root else 0,
+                                "live": self.root.live if self.root else 0, "insert_time": times["insert"],
+                                "delete_time": times["delete"], "query_time": times["query"]})
+                times = {"insert": 0, "delete": 0, "query": 0}
+        return results
+
+
+    def benchmark_parallel_build(self, num_points, worker_counts=[1,2,4,8], k=5, num_queries=100, seed=0):
+        # build time by worker count (1 is the serial select build) on the same uniform 2d points, and whether the
+        # parallel tree answers num_queries kNN queries exactly like the serial one. Returns one row per worker count
+        rng = random.Random(seed)
+        points = [(rng.random(), rng.random()) for index in range(num_points)]
+        targets = [(rng.random(), rng.random()) for index in range(num_queries)]
+        results = []
+        expected = None
+        for workers in worker_counts:
+            tree = KDTree([], "select", split_rule=self.split_rule, workers=workers)
+            start_time = time.perf_counter()
+            tree.root = tree.build(points)
+            build_time = time.perf_counter() - start_time
+            answers = [tree.query(target, k) for target in targets]
+            if expected is None:
+                expected = answers
+            results.append({"workers": workers, "build_time": build_time, "matches_serial": answers == expected})
+        return results
+
+
+    def benchmark_build_compare(self, sizes=[10**3, 10**4, 10**5, 10**6, 10**7], seed=0):
+        # build time of both construction methods on the same points. Returns one row per size
+        results = []
+        for num_points in sizes:
+            row = {"n": num_points}
+            for build_method in ("sort", "select"):
+                row[f"{build_method}_time"] = KDTree([], build_method).benchmark_build(num_points, seed)
+            results.append(row)
+        return results
+
+
     def benchmark_query(self, num_points, k=3, seed=0):
         rng = random.Random(seed)
         points = [(rng.random(), rng.random()) for index in range(num_points)]
-        self.root = self.build_tree(points)
+        self.root = self.build(points)
 
         start_time = time.perf_counter()
         for point in points:
             self.query(point, k=k)
         end_time = time.perf_counter()
-        return end_time - start_time
\ No newline at end of file
+        return end_time - start_time
+
+
+    def benchmark_query_many(self, num_points, k=3, block_size=256, worker_counts=[1,2,4], seed=0):
+        # all-points kNN: the query loop against query_many with each worker count. Returns one row per mode
+        rng = random.Random(seed)
+        points = [(rng.random(), rng.random()) for index in range(num_points)]
+        self.root = self.build(points)
+        targets = np.array(points)
+
+        start_time = time.perf_counter()
+        for point in points:
+            self.query(point, k=k)
+        loop_time = time.perf_counter() - start_time
+        results = [{"mode": "loop", "workers": 1, "time": loop_time, "queries_per_sec": num_points / loop_time}]
+
+        self.flatten()  # built once, not part of the timings
+        for workers in worker_counts:
+            start_time = time.perf_counter()
+            self.query_many(targets, k=k, block_size=block_size, workers=workers)
+            batch_time = time.perf_counter() - start_time
+            results.append({"mode": "query_many", "workers": workers, "time": batch_time, "queries_per_sec": num_points / batch_time})
+        return results
+
+
+
+def query_block(flat, targets, k, metric):
+    # one shared walk of the tree for a block of nearby targets, with per-target best k ranks (squared distances for Euclidean).
+    # Every stack entry carries the targets that still need the subtree and their distance to its splitting plane,
+    # targets whose kth distance has since dropped below that are filtered out when the entry is popped.
+    # Small subtrees are scanned as one (targets x points) distance matrix
+    coords, axes, lefts, rights, sizes, point_indices = (flat["coords"], flat["axes"], flat["lefts"], flat["rights"],
+                                                         flat["sizes"], flat["point_indices"])
+    best_distances = np.full((len(targets), k), np.inf)     # unordered
+    best_indices = np.full((len(targets), k), -1, dtype=np.int64)
+    stack = [(0, np.arange(len(targets)), np.zeros(len(targets)))]
+    while stack:
+        node, rows, plane_distances = stack.pop()
+        bound = best_distances[rows].max(axis=1)
+        keep = plane_distances < bound
+        if not keep.all():
+            rows, bound = rows[keep], bound[keep]
+            if rows.size == 0:
+                continue
+        row_targets = targets[rows]
+
+        if sizes[node] <= BATCH_LEAF_SIZE:  # bucket: merge the whole subtree into the best k
+            end = node + sizes[node]
+            dist_sq = metric.batch_rank(row_targets[:, None, :] - coords[None, node:end, :])
+            dist_sq[:, point_indices[node:end] == -1] = np.inf     # deleted nodes
+            all_distances = np.concatenate([best_distances[rows], dist_sq], axis=1)
+            all_indices = np.concatenate([best_indices[rows], np.broadcast_to(point_indices[node:end], dist_sq.shape)], axis=1)
+            if all_distances.shape[1] > k:
+                nearest = np.argpartition(all_distances, k-1, axis=1)[:, :k]
+                all_distances = np.take_along_axis(all_distances, nearest, axis=1)
+                all_indices = np.take_along_axis(all_indices, nearest, axis=1)
+            best_distances[rows] = all_distances
+            best_indices[rows] = all_indices
+            continue
+
+        point = coords[node]
+        dist_sq = metric.batch_rank(row_targets - point)
+        better = dist_sq < bound
+        if point_indices[node] != -1 and better.any():
+            better_rows = rows[better]
+            worst = best_distances[better_rows].argmax(axis=1)   # replace the current kth
+            best_distances[better_rows, worst] = dist_sq[better]
+            best_indices[better_rows, worst] = point_indices[node]
+            bound = best_distances[rows].max(axis=1)
+
+        axis = axes[node]
+        diff = row_targets[:, axis] - point[axis]
+        diff_sq = metric.axis_rank(diff)
+        left, right = lefts[node], rights[node]
+        go_left = diff < 0
+        # push the child most targets can prune first, so the one most of them are nearer to is walked first
+        children = [(left, ~go_left), (right, go_left)]
+        if go_left.sum() * 2 >= len(rows):
+            children.reverse()
+        for child, farther in children:
+            if child == -1:
+                continue
+            needed = ~farther | (diff_sq < bound)
+            if needed.any():
+                stack.append((child, rows[needed], np.where(farther[needed], diff_sq[needed], 0.0)))
+
+    order = np.argsort(best_distances, axis=1, kind="stable")
+    return np.take_along_axis(best_distances, order, axis=1), np.take_along_axis(best_indices, order, axis=1)
+
+
+worker_flat = None  # tree arrays and metric of a process pool worker, sent once per worker instead of with every block
+worker_metric = None
+
+def init_worker(flat, metric):
+    global worker_flat, worker_metric
+    worker_flat = flat
+    worker_metric = metric
+
+
+def query_block_worker(args):
+    targets, k = args
+    return query_block(worker_flat, targets, k, worker_metric)
+
+
+def build_subtree_worker(args):
+    # builds one subtree of build_tree_parallel from the shared coordinates
+    name, shape, indices, cur_depth, split_rule = args
+    block, coords = attach_array(name, shape)
+    try:
+        tree = KDTree([], "select", split_rule=split_rule)
+        subtree = tree.select_subtree(SharedRows(coords), coords, indices, 0, len(indices), cur_depth)
+        return replace_points(subtree, lambda point: point.index)
+    finally:
+        block.close()
@@ -0,0 +1,258 @@
+# -----------------------------------------------------------------------------
+# Author: Colin McClelland
+# Date: 5/14/2025
+# Description: Distance metrics shared by the kd-tree and the vantage point tree, with NumPy versions for batches
+# -----------------------------------------------------------------------------
+
+import math
+import numpy as np
+
+
+class Metric:
+    """
+    distance(p, q) is the metric on two points, batch_distance(points, target) the same for every row of an (n, d) array.
+    The vantage point tree only needs these two and works with any true metric (triangle inequality).
+
+    The kd-tree prunes with splitting planes, so it needs a coordinate-wise metric (coordinate_wise = True) that also
+    defines a "rank": a cheaper number that orders points the same way as the distance (the sum of squares for
+    Euclidean). It works in ranks and only converts the final results with to_distance:
+        - rank(p, q) / batch_rank(differences): rank of two points / of every row of an array of coordinate differences
+        - axis_rank(diff): rank of a point that differs from the target by diff on a single axis, a lower bound for
+          anything on the other side of a splitting plane at that distance
+        - cell_rank(cell_rank, old_offset, new_offset, offsets): rank from the target to a cell after the offset on
+          one axis changed from old_offset to new_offset, offsets already holds the new value
+    """
+    coordinate_wise = False
+    vectorized = True   # batch_distance is a NumPy expression and not a loop over distance
+
+
+    def distance(self, point1, point2):
+        raise NotImplementedError
+
+
+    def batch_distance(self, points, target):
+        return np.array([self.distance(point, target) for point in points], dtype=np.float64)
+
+
+    def __repr__(self):
+        return type(self).__name__
+
+
+
+class MinkowskiMetric(Metric):
+    """ (sum |x_i - y_i|^p)^(1/p), a metric for p >= 1. Ranks leave out the root. """
+    coordinate_wise = True
+
+    def __init__(self, p):
+        if p < 1:
+            raise ValueError("Minkowski distance is only a metric for p >= 1")
+        self.p = p
+
+
+    def rank(self, point1, point2):
+        dist = 0
+        for i in range(len(point1)):
+            dist += abs(point1[i] - point2[i]) ** self.p
+        return dist
+
+
+    def axis_rank(self, diff):  # works on numbers and on arrays
+        return abs(diff) ** self.p
+
+
+    def batch_rank(self, differences):
+        return (np.abs(differences) ** self.p).sum(axis=-1)
+
+
+    def cell_rank(self, cell_rank, old_offset, new_offset, offsets):
+        return cell_rank - self.axis_rank(old_offset) + self.axis_rank(new_offset)
+
+
+    def to_distance(self, rank):
+        return rank ** (1 / self.p)
+
+
+    def to_rank(self, distance):
+        return distance ** self.p
+
+
+    def distance(self, point1, point2):
+        return self.to_distance(self.rank(point1, point2))
+
+
+    def batch_distance(self, points, target):
+        return self.to_distance(self.batch_rank(np.asarray(points, dtype=np.float64) - target))
+
+
+    def __repr__(self):
+        return f"MinkowskiMetric(p={self.p})"
+
+
+
+class EuclideanMetric(MinkowskiMetric):
+    def __init__(self):
+        super().__init__(2)
+
+
+    def rank(self, point1, point2):     # squared distance
+        dist = 0
+        for i in range(len(point1)):
+            dist += (point1[i] - point2[i]) ** 2
+        return dist
+
+
+    def axis_rank(self, diff):
+        return diff * diff
+
+
+    def batch_rank(self, differences):
+        return (differences * differences).sum(axis=-1)
+
+
+    def to_distance(self, rank):
+        return np.sqrt(rank) if isinstance(rank, np.ndarray) else math.sqrt(rank)
+
+
+    def to_rank(self, distance):
+        return distance * distance
+
+
+    def __repr__(self):
+        return "EuclideanMetric"
+
+
+
+class ManhattanMetric(MinkowskiMetric):
+    def __init__(self):
+        super().__init__(1)
+
+
+    def rank(self, point1, point2):     # the distance itself
+        dist = 0
+        for i in range(len(point1)):
+            dist += abs(point1[i] - point2[i])
+        return dist
+
+
+    def axis_rank(self, diff):
+        return abs(diff)
+
+
+    def batch_rank(self, differences):
+        return np.abs(differences).sum(axis=-1)
+
+
+    def to_distance(self, rank):
+        return rank
+
+
+    def to_rank(self, distance):
+        return distance
+
+
+    def __repr__(self):
+        return "ManhattanMetric"
+
+
+
+class ChebyshevMetric(Metric):
+    """ max |x_i - y_i|, the limit of Minkowski as p grows. Not additive, so a cell's rank is the largest offset. """
+    coordinate_wise = True
+
+    def rank(self, point1, point2):
+        return max(abs(point1[i] - point2[i]) for i in range(len(point1)))
+
+
+    def axis_rank(self, diff):
+        return abs(diff)
+
+
+    def batch_rank(self, differences):
+        return np.abs(differences).max(axis=-1)
+
+
+    def cell_rank(self, cell_rank, old_offset, new_offset, offsets):
+        return max(abs(offset) for offset in offsets)
+
+
+    def to_distance(self, rank):
+        return rank
+
+
+    def to_rank(self, distance):
+        return distance
+
+
+    def distance(self, point1, point2):
+        return self.rank(point1, point2)
+
+
+    def batch_distance(self, points, target):
+        return self.batch_rank(np.asarray(points, dtype=np.float64) - target)
+
+
+
+class CosineMetric(Metric):
+    """
+    Angle between two vectors, arccos of their cosine similarity, in [0, pi]. 1 - cosine similarity orders points the
+    same way but breaks the triangle inequality, the angle does not. Zero vectors have no direction and raise ValueError.
+    """
+    def distance(self, point1, point2):
+        dot = norm1 = norm2 = 0
+        for i in range(len(point1)):
+            dot += point1[i] * point2[i]
+            norm1 += point1[i] * point1[i]
+            norm2 += point2[i] * point2[i]
+        if norm1 == 0 or norm2 == 0:
+            raise ValueError("Cosine distance is undefined for the zero vector")
+        return math.acos(max(-1.0, min(1.0, dot / math.sqrt(norm1 * norm2))))
+
+
+    def batch_distance(self, points, target):
+        points = np.asarray(points, dtype=np.float64)
+        target = np.asarray(target, dtype=np.float64)
+        norms = np.linalg.norm(points, axis=1) * np.linalg.norm(target)
+        if not norms.all():
+            raise ValueError("Cosine distance is undefined for the zero vector")
+        return np.arccos(np.clip(points @ target / norms, -1.0, 1.0))
+
+
+
+class CustomMetric(Metric):
+    """ Wraps a user function distance(p, q), which must be a true metric. batch_function(points, target) is optional. """
+    def __init__(self, function, batch_function=None):
+        self.function = function
+        self.batch_function = batch_function
+        self.vectorized = batch_function is not None
+
+
+    def distance(self, point1, point2):
+        return self.function(point1, point2)
+
+
+    def batch_distance(self, points, target):
+        if self.batch_function is not None:
+            return np.asarray(self.batch_function(points, target), dtype=np.float64)
+        return super().batch_distance(points, target)
+
+
+    def __repr__(self):
+        return f"CustomMetric({getattr(self.function, '__name__', self.function)})"
+
+
+METRICS = {"euclidean": EuclideanMetric, "manhattan": ManhattanMetric, "chebyshev": ChebyshevMetric, "cosine": CosineMetric}
+
+
+def get_metric(metric) -> Metric:
+    # None -> Euclidean, a name from METRICS, a Metric instance or a plain distance function
+    if metric is None:
+        return EuclideanMetric()
+    if isinstance(metric, Metric):
+        return metric
+    if isinstance(metric, str):
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric {metric}, use one of {list(METRICS)} or a Metric instance")
+        return METRICS[metric]()
+    if callable(metric):
+        return CustomMetric(metric)
+    raise ValueError(f"Unknown metric {metric}")
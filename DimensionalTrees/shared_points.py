@@ -0,0 +1,58 @@
+# -----------------------------------------------------------------------------
+# Author: Colin McClelland
+# Date: 5/16/2025
+# Description: Point arrays in shared memory, used by the parallel kd-tree and vantage point tree builds
+# -----------------------------------------------------------------------------
+
+import numpy as np
+from multiprocessing import shared_memory
+
+
+def share_array(array) -> shared_memory.SharedMemory:
+    # copies array into a new shared memory block, the caller closes and unlinks it
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+    return block
+
+
+def attach_array(name, shape) -> tuple:
+    # (block, float64 array view of it) in a worker. The block has to stay referenced while the view is used
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+
+
+
+class SharedPoint(tuple):
+    """ Row of the shared coordinates as a tuple of floats that also remembers its row index. """
+
+
+
+class SharedRows:
+    """
+    Stands in for the point list inside a worker, which only has the shared coordinates: row i as a SharedPoint.
+    Workers send back subtrees holding row indices (see replace_points) and the parent puts the caller's points back.
+    """
+    def __init__(self, coords):
+        self.coords = coords
+
+
+    def __getitem__(self, i):
+        point = SharedPoint(self.coords[i].tolist())
+        point.index = int(i)
+        return point
+
+
+    def __len__(self):
+        return len(self.coords)
+
+
+
+def replace_points(root, function):
+    # node.point = function(node.point) for every node of a tree of nodes with point, left and right
+    stack = [root] if root is not None else []
+    while stack:
+        node = stack.pop()
+        node.point = function(node.point)
+        if node.left is not None: stack.append(node.left)
+        if node.right is not None: stack.append(node.right)
+    return root
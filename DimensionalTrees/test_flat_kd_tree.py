@@ -0,0 +1,60 @@
+import pytest
+import math
+import random
+from flat_kd_tree import FlatKDTree
+from kd_tree import KDTree
+
+def get_points(results):
+    return [result[1] for result in results]
+
+
+def brute_force(pts, target, k):
+    return sorted(math.dist(p, target) for p in pts)[:k]
+
+
+def test_sample_tree():
+    pts = [(5,4), (2,6), (13,3), (3,1), (10,2), (8,7)]
+    tree = FlatKDTree(pts, leaf_size=2)
+    assert get_points(tree.query((9,4), k=3)) == [(10,2), (8,7), (5,4)]
+    assert get_points(tree.query((0,0), k=2)) == [(3,1), (2,6)]
+    assert len(tree.query((9,4), k=10)) == 6
+
+
+def test_empty_and_one_point():
+    assert FlatKDTree([]).query((1,1), k=3) == []
+    assert get_points(FlatKDTree([(1,1)]).query((100,100), k=5)) == [(1,1)]
+
+
+@pytest.mark.parametrize("leaf_size", [1, 16, 64])
+@pytest.mark.parametrize("dimensions", [1, 2, 5])
+def test_matches_brute_force(leaf_size, dimensions):
+    rng = random.Random(dimensions)
+    pts = [tuple(rng.random() for _ in range(dimensions)) for _ in range(1500)]
+    tree = FlatKDTree(pts, leaf_size=leaf_size)
+    for _ in range(30):
+        target = tuple(rng.random() for _ in range(dimensions))
+        distances = [dist for dist, point in tree.query(target, k=7)]
+        assert distances == pytest.approx(brute_force(pts, target, 7))
+
+
+def test_matches_kd_tree():
+    rng = random.Random(3)
+    pts = [(rng.random(), rng.random()) for _ in range(2000)]
+    flat_tree, tree = FlatKDTree(pts), KDTree(pts)
+    for target in pts[:50]:
+        assert flat_tree.query(target, k=4) == tree.query(target, k=4)
+
+
+def test_duplicates():
+    pts = [(2,2)] * 40 + [(3,3)] * 40
+    tree = FlatKDTree(pts, leaf_size=16)
+    result = get_points(tree.query((2,2), k=45))
+    assert result.count((2,2)) == 40
+    assert result[40:] == [(3,3)] * 5
+
+
+def test_bucket_sizes():
+    tree = FlatKDTree([(i, -i) for i in range(1000)], leaf_size=32)
+    sizes = [tree.end[leaf] - tree.start[leaf] for leaf in range(tree.first_leaf, len(tree.start))]
+    assert sum(sizes) == 1000
+    assert all(16 <= size <= 32 for size in sizes)
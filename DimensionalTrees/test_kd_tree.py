@@ -1,5 +1,7 @@
 import pytest
+import random
 from kd_tree import KDTree
+from metrics import MinkowskiMetric
 
 def get_points(results):
     return [result[1] for result in results]
@@ -70,4 +72,371 @@ def test_duplicates():
     tree = KDTree(pts)
     result = get_points(tree.query((2,2), k=3))
     assert result.count((2,2)) == 2
-    assert result[2] == (3,3)
\ No newline at end of file
+    assert result[2] == (3,3)
+
+
+def preorder(node):
+    if node is None:
+        return []
+    return [(node.point, node.axis)] + preorder(node.left) + preorder(node.right)
+
+
+def random_points(num_points, dimensions=2, seed=0):
+    rng = random.Random(seed)
+    return [tuple(rng.random() for _ in range(dimensions)) for _ in range(num_points)]
+
+
+@pytest.mark.parametrize("dimensions", [1, 2, 3])
+def test_select_build_matches_sort_build(dimensions):
+    pts = random_points(2000, dimensions)
+    assert preorder(KDTree(pts, build_method="select").root) == preorder(KDTree(pts).root)
+
+
+def test_select_build_query():
+    pts = random_points(1000, 3, seed=1)
+    sort_tree = KDTree(pts)
+    select_tree = KDTree(pts, build_method="select")
+    for target in random_points(50, 3, seed=2):
+        assert select_tree.query(target, k=5) == sort_tree.query(target, k=5)
+
+
+def test_select_build_small_inputs():
+    assert KDTree([], build_method="select").root is None
+    pts = [(5,4), (2,6), (13,3), (3,1), (10,2), (8,7)]
+    assert get_points(KDTree(pts, build_method="select").query((9,4), k=3)) == [(10,2), (8,7), (5,4)]
+
+
+def test_unknown_build_method():
+    with pytest.raises(ValueError):
+        KDTree([(1,1)], build_method="quick")
+
+
+def test_query_many_matches_query():
+    pts = random_points(3000, 3, seed=4)
+    tree = KDTree(pts)
+    targets = random_points(200, 3, seed=5)
+    distances, indices = tree.query_many(targets, k=6, block_size=16)
+    assert distances.shape == indices.shape == (200, 6)
+    for row, target in enumerate(targets):
+        expected = tree.query(target, k=6)
+        assert distances[row].tolist() == pytest.approx([dist for dist, point in expected])
+        assert [pts[i] for i in indices[row]] == get_points(expected)
+
+
+def test_query_many_padding_and_duplicates():
+    pts = [(2,2), (2,2), (3,3)]
+    tree = KDTree(pts)
+    distances, indices = tree.query_many([(2,2)], k=5)
+    assert sorted(indices[0][:2].tolist()) == [0, 1]
+    assert indices[0][2] == 2
+    assert indices[0][3:].tolist() == [-1, -1]
+    assert distances[0][3:].tolist() == [float("inf")] * 2
+
+
+def test_query_many_process_pool():
+    pts = random_points(500, 2, seed=6)
+    tree = KDTree(pts)
+    serial = tree.query_many(pts, k=3)
+    parallel = tree.query_many(pts, k=3, workers=2)
+    assert (serial[0] == parallel[0]).all()
+    assert (serial[1] == parallel[1]).all()
+
+
+@pytest.mark.parametrize("dimensions", [1, 2, 4])
+def test_query_radius_matches_brute_force(dimensions):
+    pts = random_points(1500, dimensions, seed=7)
+    tree = KDTree(pts)
+    for target in random_points(30, dimensions, seed=8):
+        for r in (0, 0.05, 0.3):
+            expected = sorted(p for p in pts if tree.distance_squared(target, p) <= r * r)
+            results = list(tree.query_radius(target, r))
+            assert sorted(point for dist, point in results) == expected
+            assert all(dist <= r for dist, point in results)
+            assert tree.count_radius(target, r) == len(expected)
+
+
+def test_query_radius_boundary_and_duplicates():
+    pts = [(0,0), (3,4), (3,4), (6,8)]
+    tree = KDTree(pts)
+    assert sorted(point for dist, point in tree.query_radius((0,0), 5)) == [(0,0), (3,4), (3,4)]
+    assert tree.count_radius((0,0), 4.99) == 1
+    assert list(KDTree([]).query_radius((0,0), 1)) == []
+
+
+@pytest.mark.parametrize("dimensions", [2, 3])
+def test_query_box_matches_brute_force(dimensions):
+    pts = random_points(1500, dimensions, seed=9)
+    tree = KDTree(pts)
+    rng = random.Random(10)
+    for _ in range(30):
+        lo = [rng.random() * 0.8 for _ in range(dimensions)]
+        hi = [x + rng.random() * 0.3 for x in lo]
+        expected = sorted(p for p in pts if all(lo[i] <= p[i] <= hi[i] for i in range(dimensions)))
+        assert sorted(tree.query_box(lo, hi)) == expected
+
+
+def test_query_box_is_lazy():
+    tree = KDTree([(i, i) for i in range(100)])
+    results = tree.query_box((10, 10), (20, 20))
+    assert next(results) in [(i, i) for i in range(10, 21)]
+    assert sorted(tree.query_box((10, 10), (20, 20))) == [(i, i) for i in range(10, 21)]
+
+
+def test_approximate_query_exact_settings():
+    pts = random_points(1000, 3, seed=11)
+    tree = KDTree(pts)
+    for target in random_points(20, 3, seed=12):
+        assert tree.query(target, k=5, eps=0, max_visits=len(pts)) == tree.query(target, k=5)
+
+
+@pytest.mark.parametrize("eps", [0.5, 2])
+def test_approximate_query_within_eps(eps):
+    pts = random_points(2000, 8, seed=13)
+    tree = KDTree(pts)
+    for target in random_points(20, 8, seed=14):
+        exact = tree.query(target, k=5)
+        approx = tree.query(target, k=5, eps=eps)
+        assert len(approx) == 5
+        for (exact_dist, _), (approx_dist, _) in zip(exact, approx):
+            assert approx_dist <= (1 + eps) * exact_dist + 1e-12
+
+
+def test_max_visits_budget():
+    pts = random_points(1000, 2, seed=15)
+    tree = KDTree(pts)
+    assert len(tree.query((0.5, 0.5), k=3, max_visits=1)) == 1    # only the root was visited
+    assert len(tree.query((0.5, 0.5), k=3, max_visits=10)) == 3
+
+
+def check_sizes(node):
+    if node is None:
+        return 0, 0
+    left_size, left_live = check_sizes(node.left)
+    right_size, right_live = check_sizes(node.right)
+    assert node.size == 1 + left_size + right_size
+    assert node.live == (not node.deleted) + left_live + right_live
+    return node.size, node.live
+
+
+@pytest.mark.parametrize("build_method", ["sort", "select"])
+def test_insert_delete_matches_brute_force(build_method):
+    rng = random.Random(16)
+    present = random_points(300, 2, seed=17)
+    tree = KDTree(present, build_method=build_method)
+    for step in range(1500):
+        if rng.random() < 0.5 or not present:
+            point = (round(rng.random(), 2), round(rng.random(), 2))    # rounding creates duplicates
+            tree.insert(point)
+            present.append(point)
+        else:
+            point = present.pop(rng.randrange(len(present)))
+            tree.delete(point)
+        if step % 100 == 0:
+            check_sizes(tree.root)
+            target = (rng.random(), rng.random())
+            expected = sorted(tree.distance_squared(target, p) for p in present)[:4]
+            assert [dist * dist for dist, point in tree.query(target, k=4)] == pytest.approx(expected)
+            assert sorted(point for dist, point in tree.query_radius(target, 0.2)) == sorted(p for p in present if tree.distance_squared(target, p) <= 0.04)
+    assert tree.root.live == len(present)
+
+
+def test_delete_missing_point():
+    tree = KDTree([(1,1), (2,2)])
+    tree.delete((1,1))
+    with pytest.raises(KeyError):
+        tree.delete((1,1))
+    assert get_points(tree.query((0,0), k=2)) == [(2,2)]
+
+
+def test_insert_into_empty_tree():
+    tree = KDTree([])
+    tree.insert((3,4))
+    tree.insert((1,1))
+    assert get_points(tree.query((0,0), k=1)) == [(1,1)]
+    tree.delete((3,4))
+    tree.delete((1,1))
+    assert tree.root is None
+
+
+def test_sorted_inserts_stay_shallow():
+    tree = KDTree([])
+    for i in range(2000):
+        tree.insert((i, 0))
+    assert tree.height() <= 4 * 11     # log2(2000) ~ 11, a linked list would be 2000 deep
+
+
+def test_query_many_skips_deleted():
+    pts = random_points(400, 2, seed=18)
+    tree = KDTree(pts)
+    for point in pts[:100]:
+        tree.delete(point)
+    distances, indices = tree.query_many(pts[:50], k=3)
+    for row, target in enumerate(pts[:50]):
+        assert all(i >= 100 for i in indices[row])
+        assert distances[row].tolist() == pytest.approx([dist for dist, point in tree.query(target, k=3)])
+
+
+def test_points_compacted_under_churn():
+    rng = random.Random(30)
+    pts = random_points(200, 2, seed=31)
+    tree = KDTree(pts)
+    live = list(pts)
+    for step in range(3000):
+        if rng.random() < 0.5 and live:
+            tree.delete(live.pop(rng.randrange(len(live))))
+        else:
+            point = (rng.random(), rng.random())
+            tree.insert(point)
+            live.append(point)
+        assert len(tree.points) <= 2 * len(live) + 1
+    tree.compact_points()
+    assert tree.points == live     # input and insert order, deleted points dropped
+    distances, indices = tree.query_many(live[:20], k=3)
+    for row, target in enumerate(live[:20]):
+        assert [tree.points[i] for i in indices[row]] == [point for dist, point in tree.query(target, k=3)]
+
+
+def test_points_keep_order_under_inserts():
+    pts = [(0,0), (1,1), (2,2)]
+    inserted = [(i, 0.5) for i in range(3, 40)]    # sorted inserts trigger scapegoat rebuilds at the root
+    tree = KDTree(pts)
+    for point in inserted:
+        tree.insert(point)
+    assert tree.points == pts + inserted
+    distances, indices = tree.query_many([(5.0, 0.5), (20.2, 0.5), (0.1, 0)], k=1)
+    assert [tree.points[i] for i in indices[:, 0]] == [(5, 0.5), (20, 0.5), (0, 0)]
+
+
+@pytest.mark.parametrize("dimensions", [2, 6])
+def test_best_first_matches_recursive(dimensions):
+    pts = random_points(2000, dimensions, seed=19)
+    tree = KDTree(pts)
+    for target in random_points(30, dimensions, seed=20):
+        assert tree.query(target, k=5, best_first=True) == tree.query(target, k=5)
+
+
+def test_best_first_sample_tree():
+    pts = [(5,4), (2,6), (13,3), (3,1), (10,2), (8,7)]
+    tree = KDTree(pts)
+    assert get_points(tree.query((9,4), k=3, best_first=True)) == [(10,2), (8,7), (5,4)]
+    assert len(tree.query((9,4), k=10, best_first=True)) == 6
+    assert KDTree([]).query((1,1), best_first=True) == []
+
+
+def test_best_first_visits_fewer_nodes():
+    pts = random_points(3000, 6, seed=21)
+    tree = KDTree(pts)
+    targets = random_points(30, 6, seed=22)
+    for target in targets:
+        tree.query(target, k=5)
+    recursive_visits = tree.nodes_visited
+    tree.nodes_visited = 0
+    for target in targets:
+        tree.query(target, k=5, best_first=True)
+    assert 0 < tree.nodes_visited < recursive_visits
+
+
+def test_best_first_budget():
+    tree = KDTree(random_points(1000, 2, seed=23))
+    tree.query((0.5, 0.5), k=3, max_visits=5, best_first=True)
+    assert tree.nodes_visited == 5
+
+
+def check_split_invariant(node):
+    stack = [(node, [])]
+    while stack:
+        node, bounds = stack.pop()
+        if node is None:
+            continue
+        for axis, value, is_left in bounds:
+            assert node.point[axis] <= value if is_left else node.point[axis] >= value
+        stack.append((node.left, bounds + [(node.axis, node.point[node.axis], True)]))
+        stack.append((node.right, bounds + [(node.axis, node.point[node.axis], False)]))
+
+
+@pytest.mark.parametrize("split_rule", ["cycle", "spread", "variance", "sliding_midpoint"])
+def test_split_rules_query(split_rule):
+    rng = random.Random(24)
+    pts = [(rng.random() * 100, rng.random(), rng.random() * 0.01) for _ in range(1500)]   # anisotropic
+    tree = KDTree(pts, split_rule=split_rule)
+    check_split_invariant(tree.root)
+    for target in pts[:30]:
+        expected = sorted(tree.distance_squared(target, p) for p in pts)[:5]
+        assert [dist * dist for dist, point in tree.query(target, k=5)] == pytest.approx(expected)
+
+
+def test_spread_rule_picks_wide_axis():
+    pts = [(i * 0.001, i) for i in range(100)]
+    tree = KDTree(pts, split_rule="spread")
+    assert tree.root.axis == 1
+    assert KDTree(pts).root.axis == 0
+
+
+def test_sliding_midpoint_split():
+    pts = [(0,), (1,), (2,), (3,), (100,)]
+    tree = KDTree(pts, split_rule="sliding_midpoint")
+    assert tree.root.point == (3,)      # closest to the middle of [0, 100]
+    assert KDTree([(1, 1)] * 5, split_rule="sliding_midpoint").height() == 3   # equal points fall back to the median
+
+
+@pytest.mark.parametrize("split_rule", ["spread", "sliding_midpoint"])
+def test_split_rules_select_build(split_rule):
+    pts = random_points(2000, 3, seed=25)
+    assert preorder(KDTree(pts, build_method="select", split_rule=split_rule).root) == preorder(KDTree(pts, split_rule=split_rule).root)
+
+
+def test_unknown_split_rule():
+    with pytest.raises(ValueError):
+        KDTree([(1,1), (2,2)], split_rule="random")
+
+
+@pytest.mark.parametrize("metric", ["manhattan", "chebyshev", MinkowskiMetric(3)])
+def test_metrics_match_brute_force(metric):
+    pts = random_points(1500, 3, seed=26)
+    tree = KDTree(pts, metric=metric)
+    distance = tree.metric.distance
+    for target in random_points(20, 3, seed=27):
+        expected = sorted(distance(target, p) for p in pts)[:5]
+        assert [dist for dist, point in tree.query(target, k=5)] == pytest.approx(expected)
+        assert [dist for dist, point in tree.query(target, k=5, best_first=True)] == pytest.approx(expected)
+        assert sorted(dist for dist, point in tree.query_radius(target, 0.2)) == pytest.approx(sorted(d for d in (distance(target, p) for p in pts) if d <= 0.2))
+    distances, indices = tree.query_many(pts[:20], k=5)
+    for row, target in enumerate(pts[:20]):
+        assert distances[row].tolist() == pytest.approx(sorted(distance(target, p) for p in pts)[:5])
+
+
+def test_metric_needs_planes():
+    with pytest.raises(ValueError):
+        KDTree([(1,1)], metric="cosine")
+
+
+@pytest.mark.parametrize("split_rule", ["cycle", "spread"])
+def test_parallel_build_matches_serial(split_rule):
+    pts = random_points(3000, 3, seed=28)     # large enough to go through the worker processes
+    tree = KDTree(pts, split_rule=split_rule, workers=2)
+    serial_tree = KDTree(pts, build_method="select", split_rule=split_rule)
+    assert preorder(tree.root) == preorder(serial_tree.root)
+    check_sizes(tree.root)
+    for target in random_points(20, 3, seed=29):
+        assert tree.query(target, k=5) == serial_tree.query(target, k=5)
+    tree.insert((0.5, 0.5, 0.5))
+    tree.delete(pts[0])
+    check_sizes(tree.root)
+
+
+def test_parallel_build_keeps_point_objects():
+    rng = random.Random(32)
+    pts = [[rng.randrange(2**60), rng.randrange(2**60)] for _ in range(3000)]   # lists of ints too large for a float
+    tree = KDTree(pts, workers=2)
+    ids = {id(point) for point in pts}
+    stack = [tree.root]
+    while stack:
+        node = stack.pop()
+        assert id(node.point) in ids
+        stack += [child for child in (node.left, node.right) if child is not None]
+
+
+def test_parallel_build_small_inputs():
+    assert KDTree([], workers=2).root is None
+    pts = [(5,4), (2,6), (13,3), (3,1), (10,2), (8,7)]
+    assert get_points(KDTree(pts, workers=2).query((9,4), k=3)) == [(10,2), (8,7), (5,4)]
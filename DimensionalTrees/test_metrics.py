@@ -0,0 +1,57 @@
+import pytest
+import math
+import random
+import numpy as np
+from metrics import get_metric, EuclideanMetric, ManhattanMetric, ChebyshevMetric, MinkowskiMetric, CosineMetric, CustomMetric
+
+
+def random_points(num_points, dimensions=3, seed=0):
+    rng = random.Random(seed)
+    return [tuple(rng.random() - 0.5 for _ in range(dimensions)) for _ in range(num_points)]
+
+
+@pytest.mark.parametrize("metric, expected", [
+    (EuclideanMetric(), 5.0), (ManhattanMetric(), 7.0), (ChebyshevMetric(), 4.0),
+    (MinkowskiMetric(3), (27 + 64) ** (1/3)), (MinkowskiMetric(2), 5.0)])
+def test_distances(metric, expected):
+    assert metric.distance((0, 0), (3, 4)) == pytest.approx(expected)
+
+
+def test_cosine_distance():
+    metric = CosineMetric()
+    assert metric.distance((1, 0), (0, 2)) == pytest.approx(math.pi / 2)
+    assert metric.distance((1, 1), (2, 2)) == pytest.approx(0, abs=1e-7)
+    with pytest.raises(ValueError):
+        metric.distance((0, 0), (1, 1))
+
+
+@pytest.mark.parametrize("metric", [EuclideanMetric(), ManhattanMetric(), ChebyshevMetric(), MinkowskiMetric(3),
+                                    CosineMetric(), CustomMetric(math.dist)])
+def test_batch_matches_scalar(metric):
+    pts = random_points(50)
+    target = (0.1, 0.2, 0.3)
+    expected = [metric.distance(point, target) for point in pts]
+    assert metric.batch_distance(np.array(pts), np.array(target)).tolist() == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("metric", [EuclideanMetric(), ManhattanMetric(), ChebyshevMetric(), MinkowskiMetric(3)])
+def test_rank_round_trip(metric):
+    pts = random_points(20)
+    for point in pts:
+        rank = metric.rank(point, pts[0])
+        assert metric.to_distance(rank) == pytest.approx(metric.distance(point, pts[0]))
+        assert metric.to_rank(metric.to_distance(rank)) == pytest.approx(rank)
+    differences = np.array(pts) - np.array(pts[0])
+    assert metric.batch_rank(differences).tolist() == pytest.approx([metric.rank(point, pts[0]) for point in pts])
+
+
+def test_get_metric():
+    assert isinstance(get_metric(None), EuclideanMetric)
+    assert isinstance(get_metric("chebyshev"), ChebyshevMetric)
+    assert isinstance(get_metric(math.dist), CustomMetric)
+    metric = MinkowskiMetric(4)
+    assert get_metric(metric) is metric
+    with pytest.raises(ValueError):
+        get_metric("hamming")
+    with pytest.raises(ValueError):
+        MinkowskiMetric(0.5)
@@ -1,5 +1,8 @@
 import pytest
+import math
+import random
 from vp_tree import VPTree
+from metrics import MinkowskiMetric
 
 def get_points(results):
     return [result[1] for result in results]
@@ -72,3 +75,53 @@ def test_duplicates():
     result = get_points(tree.query((2,2), k=3))
     assert result.count((2,2)) == 2
     assert result[2] == (3,3)
+
+
+def random_points(num_points, dimensions=2, seed=0):
+    rng = random.Random(seed)
+    return [tuple(rng.random() + 0.1 for _ in range(dimensions)) for _ in range(num_points)]
+
+
+@pytest.mark.parametrize("metric", [None, "manhattan", "chebyshev", MinkowskiMetric(3), "cosine", math.dist])
+def test_metrics_match_brute_force(metric):
+    pts = random_points(1000, 3, seed=1)
+    tree = VPTree(pts, metric=metric)
+    distance = tree.metric.distance
+    for target in random_points(20, 3, seed=2):
+        expected = sorted(distance(target, p) for p in pts)[:5]
+        assert [dist for dist, point in tree.query(target, k=5)] == pytest.approx(expected)
+
+
+def test_vectorized_build_matches_list_build():
+    pts = random_points(500, 2, seed=3)
+    tree = VPTree(pts)
+    list_tree = VPTree(pts, metric=math.dist)     # no batch version, built by build_tree
+    stack = [(tree.root, list_tree.root)]
+    while stack:
+        node, list_node = stack.pop()
+        assert (node is None) == (list_node is None)
+        if node is not None:
+            assert node.point == list_node.point
+            assert node.threshold == pytest.approx(list_node.threshold)
+            stack += [(node.left, list_node.left), (node.right, list_node.right)]
+
+
+def test_string_points_with_custom_metric():
+    def hamming(word1, word2):
+        return sum(a != b for a, b in zip(word1, word2))
+    words = ["cart", "card", "care", "dart", "dirt", "bird", "bard"]
+    tree = VPTree(words, metric=hamming)
+    assert tree.query("cord", k=1) == [(1, "card")]
+
+
+def test_parallel_build_matches_serial():
+    pts = random_points(3000, 2, seed=5)      # large enough to go through the worker processes
+    tree = VPTree(pts, workers=2)
+    serial_tree = VPTree(pts)
+    for target in random_points(20, 2, seed=6):
+        assert tree.query(target, k=5) == serial_tree.query(target, k=5)
+    int_pts = [(i % 97, i // 97) for i in range(3000)]
+    int_tree = VPTree(int_pts, workers=2)
+    assert all(type(x) is int for dist, point in int_tree.query((40, 12), k=20) for x in point)
+    assert VPTree([], workers=2).root is None
+    assert get_points(VPTree([(5,4), (2,6), (13,3)], workers=2).query((9,4), k=1)) == [(5,4)]
@@ -8,19 +8,40 @@ import math
 import heapq
 import random
 import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+try:    # package import (notebook) or sibling import (tests)
+    from .metrics import get_metric, MinkowskiMetric, CustomMetric
+    from .shared_points import share_array, attach_array, SharedRows, replace_points
+except ImportError:
+    from metrics import get_metric, MinkowskiMetric, CustomMetric
+    from shared_points import share_array, attach_array, SharedRows, replace_points
+
+BATCH_CUTOFF = 32   # build_indices hands lists at most this long to build_tree, numpy call overhead dominates below it
 
 
 class VPNode:
     def __init__(self, point, threshold, left=None, right=None):
         self.point = point          # the vantage point
-        self.threshold = threshold  # median radius to partition the other points
+        self.threshold = threshold  # median distance to the vantage point, partitions the other points
         self.left = left            # all points closer than threshold
         self.right = right          # all points farther  than threshold
 
 
 class VPTree:
-    def __init__(self, points):
-        self.root = self.build_tree(points)
+    def __init__(self, points, metric=None, workers=1):
+        self.metric = get_metric(metric)    # any true metric, see metrics.py. Pruning relies on the triangle inequality
+        self.workers = workers              # more than 1: lower subtrees are built in parallel, see build_parallel
+        self.root = self.build(points)
+
+
+    def build(self, point_list):
+        if self.metric.vectorized and point_list and self.workers > 1:
+            return self.build_parallel(point_list)
+        if self.metric.vectorized and point_list:
+            return self.build_indices(point_list, np.asarray(point_list, dtype=np.float64), np.arange(len(point_list)))
+        return self.build_tree(point_list)
 
 
     def build_tree(self, point_list):
@@ -32,7 +53,7 @@ class VPTree:
 
         distances = []
         for point in point_list[1:]:    # first point chosen as the vantage point
-            distance = self.distance_squared(vantage, point)
+            distance = self.metric.distance(vantage, point)
             distances.append((distance, point))
 
         distances.sort(key=lambda dp: dp[0])
@@ -53,6 +74,68 @@ class VPTree:
         return VPNode(vantage, threshold, left_child, right_child)
 
 
+    def build_indices(self, point_list, coords, indices):
+        # same tree as build_tree, but the distances from the vantage point to all other points are one batch_distance
+        # call on the rows of coords, and the points are passed down as index arrays
+        if len(indices) <= BATCH_CUTOFF:
+            return self.build_tree([point_list[i] for i in indices.tolist()])
+
+        vantage, threshold, left_indices, right_indices = self.vantage_split(coords, indices)
+        left_child = self.build_indices(point_list, coords, left_indices)
+        right_child = self.build_indices(point_list, coords, right_indices)
+
+        return VPNode(point_list[vantage], threshold, left_child, right_child)
+
+
+    def vantage_split(self, coords, indices) -> tuple:
+        # (vantage index, threshold, indices closer than threshold, the rest) for the first index as the vantage point
+        vantage = indices[0]
+        others = indices[1:]
+        distances = self.metric.batch_distance(coords[others], coords[vantage])
+        order = np.argsort(distances, kind="stable")    # stable like list.sort, children get the same first (vantage) point
+        distances, others = distances[order], others[order]
+        threshold = float(distances[len(distances) // 2])
+        return vantage, threshold, others[distances < threshold], others[distances >= threshold]
+
+
+    def build_parallel(self, point_list):
+        # the top levels are split here like build_indices, until there are about 4 subtrees per worker. Those are built
+        # by worker processes from the coordinates in shared memory and sent back holding row indices. The parent swaps
+        # the caller's points back in and hangs the subtrees under the top nodes, so the tree is the same as the serial one
+        coords = np.asarray(point_list, dtype=np.float64)
+        indices = np.arange(len(point_list))
+        num_tasks = self.workers * 4
+        if len(point_list) < num_tasks * BATCH_CUTOFF * 4:      # not worth starting processes
+            return self.build_indices(point_list, coords, indices)
+
+        tasks = []  # (parent, "left" / "right", indices)
+        root = self.split_top(point_list, coords, indices, math.ceil(math.log2(num_tasks)), tasks)
+        block = share_array(coords)
+        try:
+            with ProcessPoolExecutor(self.workers) as pool:
+                args = [(block.name, coords.shape, task_indices, self.metric) for _, _, task_indices in tasks]
+                subtrees = list(pool.map(build_subtree_worker, args))
+        finally:
+            block.close()
+            block.unlink()
+        for (parent, side, _), subtree in zip(tasks, subtrees):
+            setattr(parent, side, replace_points(subtree, point_list.__getitem__))
+        return root
+
+
+    def split_top(self, point_list, coords, indices, levels, tasks):
+        if len(indices) <= BATCH_CUTOFF:    # small enough to build here, like build_indices does
+            return self.build_indices(point_list, coords, indices)
+        vantage, threshold, left_indices, right_indices = self.vantage_split(coords, indices)
+        node = VPNode(point_list[vantage], threshold)
+        for side, side_indices in (("left", left_indices), ("right", right_indices)):
+            if levels > 1:
+                setattr(node, side, self.split_top(point_list, coords, side_indices, levels-1, tasks))
+            elif len(side_indices) > 0:
+                tasks.append((node, side, side_indices))
+        return node
+
+
 
     def distance_squared(self, point1, point2): # same as kd-tree
         dist = 0
@@ -65,22 +148,24 @@ class VPTree:
         if node is None:
             return
 
-        distance_squared = self.distance_squared(target, node.point)
+        distance = self.metric.distance(target, node.point)
 
         if len(heap) < k:
-            heapq.heappush(heap, (-distance_squared, node.point))
+            heapq.heappush(heap, (-distance, node.point))
         else:
-            if distance_squared < -heap[0][0]:
-                heapq.heapreplace(heap, (-distance_squared, node.point))
+            if distance < -heap[0][0]:
+                heapq.heapreplace(heap, (-distance, node.point))
 
-        if distance_squared < node.threshold:
+        if distance < node.threshold:
             nearer, farther = node.left, node.right
         else:
             nearer, farther = node.right, node.left
 
         self.search(nearer, target, k, heap)
        
-        if (len(heap) < k) or (abs(distance_squared - node.threshold) < -heap[0][0]):
+        # triangle inequality: every point on the other side of the threshold is at least |distance - threshold| away.
+        # This only holds for true distances, comparing squared distances could prune a subtree holding a neighbor
+        if (len(heap) < k) or (abs(distance - node.threshold) < -heap[0][0]):
             self.search(farther, target, k, heap)
 
 
@@ -90,8 +175,8 @@ class VPTree:
 
         result = []
         while heap:
-            neg_d2, p = heapq.heappop(heap)
-            result.append((math.sqrt(-neg_d2), p))
+            neg_d, p = heapq.heappop(heap)
+            result.append((-neg_d, p))
         result.reverse()
         return result
     
@@ -100,17 +185,71 @@ class VPTree:
         rng = random.Random(seed)
         points = [(rng.random(), rng.random()) for i in range(num_points)]
         start_time = time.perf_counter()
-        self.root = self.build_tree(points)
+        self.root = self.build(points)
         return time.perf_counter() - start_time
 
 
     def benchmark_query(self, num_points, k=3, seed=0):
         rng = random.Random(seed)
         points = [(rng.random(), rng.random()) for index in range(num_points)]
-        self.root = self.build_tree(points)
+        self.root = self.build(points)
 
         start_time = time.perf_counter()
         for point in points:
             self.query(point, k=k)
         end_time = time.perf_counter()
         return end_time - start_time
+
+
+    def benchmark_metrics(self, num_points, metrics=["euclidean","manhattan","chebyshev",MinkowskiMetric(3),"cosine",
+                          CustomMetric(math.dist)], k=5, num_queries=1000, seed=0):
+        # build and query time for every metric on the same uniform 3d points (shifted away from the origin for cosine).
+        # CustomMetric(math.dist) shows the cost of a metric without a batch version. Returns one row per metric
+        rng = random.Random(seed)
+        points = [(rng.random() + 0.1, rng.random() + 0.1, rng.random() + 0.1) for _ in range(num_points)]
+        targets = points[:num_queries]
+        results = []
+        for metric in metrics:
+            tree = VPTree([], metric)
+            start_time = time.perf_counter()
+            tree.root = tree.build(points)
+            build_time = time.perf_counter() - start_time
+
+            start_time = time.perf_counter()
+            for target in targets:
+                tree.query(target, k)
+            query_time = time.perf_counter() - start_time
+            results.append({"metric": repr(tree.metric), "build_time": build_time, "query_time": query_time})
+        return results
+
+
+    def benchmark_parallel_build(self, num_points, worker_counts=[1,2,4,8], k=5, num_queries=100, seed=0):
+        # build time by worker count (1 is the serial build) on the same uniform 2d points, and whether the parallel
+        # tree answers num_queries kNN queries exactly like the serial one. Returns one row per worker count
+        rng = random.Random(seed)
+        points = [(rng.random(), rng.random()) for index in range(num_points)]
+        targets = [(rng.random(), rng.random()) for index in range(num_queries)]
+        results = []
+        expected = None
+        for workers in worker_counts:
+            tree = VPTree([], self.metric, workers=workers)
+            start_time = time.perf_counter()
+            tree.root = tree.build(points)
+            build_time = time.perf_counter() - start_time
+            answers = [tree.query(target, k) for target in targets]
+            if expected is None:
+                expected = answers
+            results.append({"workers": workers, "build_time": build_time, "matches_serial": answers == expected})
+        return results
+
+
+
+def build_subtree_worker(args):
+    # builds one subtree of build_parallel from the shared coordinates
+    name, shape, indices, metric = args
+    block, coords = attach_array(name, shape)
+    try:
+        subtree = VPTree([], metric).build_indices(SharedRows(coords), coords, indices)
+        return replace_points(subtree, lambda point: point.index)
+    finally:
+        block.close()
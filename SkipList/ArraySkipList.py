@@ -0,0 +1,238 @@
+# -----------------------------------------------------------------------------
+# Author: Colin McClelland
+# Date: 2/25/25
+# Description: Array-backed Skip List. Same algorithm as SkipList.py, but nodes are slots in parallel arrays instead of Python objects
+# -----------------------------------------------------------------------------
+
+import time
+import random
+import sys  # used for header key -- must be larger than any legal key
+import tracemalloc
+from array import array
+
+NIL = -1    # "null pointer" for the index based forward links
+HEADER = 0  # slot 0 is always the header
+
+
+class ArraySkipList:
+    """
+    Skip List where node i is described by keys[i], values[i], levels[i] and forward[level][i].
+    Keys are stored unboxed as int64 and each level has its own int32 array of next-indices, so a node
+    costs a few bytes per field instead of a full object with a __dict__ and a separate forward list.
+    Deleted slots are chained through forward[0] into a free list and reused by later inserts.
+    Keys must fit in a signed 64-bit integer.
+    """
+    def __init__(self, max_level = 4, p = 1/2, capacity = 16):
+        if max_level < 1:
+            raise ValueError("Max level must be at least 1 for traditional linked list")
+        if max_level > 0xFFFF:  # levels are stored as unsigned 16-bit values
+            raise ValueError("Max level must be at most 65535")
+        self.max_level = max_level
+        self.cur_level = 1
+        self.p = p
+        capacity = max(capacity, 1)
+        self.keys = array('q', [sys.maxsize]) * capacity  # header key must be larger than any legal key
+        self.values = [None] * capacity
+        self.levels = array('H', [0]) * capacity
+        self.forward = [array('i', [NIL]) * capacity for _ in range(max_level)]   # forward[level][i] is the index of the next node of slot i
+        self.levels[HEADER] = max_level     # header has max_level # of pointers
+        self.next_slot = 1      # first slot that has never been used
+        self.free_head = NIL    # head of the free list of deleted slots
+
+
+    def random_level(self)->int:
+        level = 1
+        while random.random() < self.p and level < self.max_level:  # basic probability function
+            level += 1
+        return level
+
+
+    def allocate(self, key, value, level)->int:
+        if self.free_head != NIL:   # reuse a deleted slot before growing
+            slot = self.free_head
+            self.free_head = self.forward[0][slot]
+        else:
+            if self.next_slot == len(self.keys):
+                self.grow()
+            slot = self.next_slot
+            self.next_slot += 1
+        self.keys[slot] = key
+        self.values[slot] = value
+        self.levels[slot] = level
+        return slot
+
+
+    def release(self, slot):
+        self.values[slot] = None    # drop the reference so the value can be garbage collected
+        self.levels[slot] = 0
+        for level in range(1, self.max_level):
+            self.forward[level][slot] = NIL
+        self.forward[0][slot] = self.free_head  # push slot onto the free list
+        self.free_head = slot
+
+
+    def grow(self):     # doubles the capacity of every parallel array
+        capacity = len(self.keys)
+        self.keys.extend(array('q', [0]) * capacity)
+        self.values.extend([None] * capacity)
+        self.levels.extend(array('H', [0]) * capacity)
+        for level in range(self.max_level):
+            self.forward[level].extend(array('i', [NIL]) * capacity)
+
+
+    def search(self, search_key:int):
+        keys = self.keys
+        cur_node = HEADER
+        for level in range(self.cur_level-1, -1, -1):
+            forward = self.forward[level]
+            next_node = forward[cur_node]
+            while next_node != NIL and keys[next_node] < search_key:
+                cur_node = next_node
+                next_node = forward[cur_node]
+        cur_node = self.forward[0][cur_node]    # we stop right before the node we are searching for
+
+        if cur_node != NIL and keys[cur_node] == search_key:
+            return self.values[cur_node]
+        else:
+            return None # search_key is not present within the list
+
+
+    def find_update(self, search_key:int)->list:  # returns the rightmost node before search_key on every level
+        keys = self.keys
+        update = [HEADER] * self.max_level
+        cur_node = HEADER
+        for level in range(self.cur_level - 1, -1, -1):
+            forward = self.forward[level]
+            next_node = forward[cur_node]
+            while next_node != NIL and keys[next_node] < search_key:
+                cur_node = next_node
+                next_node = forward[cur_node]
+            update[level] = cur_node
+        return update
+
+
+    def insert(self, search_key:int, new_value):
+        update = self.find_update(search_key)
+        cur_node = self.forward[0][update[0]]
+
+        if cur_node != NIL and self.keys[cur_node] == search_key:
+            self.values[cur_node] = new_value
+            return
+
+        new_node_level = self.random_level()
+        new_node = self.allocate(search_key, new_value, new_node_level)
+
+        if new_node_level > self.cur_level:     # update already points at the header for the new levels
+            self.cur_level = new_node_level
+
+        for level in range(new_node_level):
+            forward = self.forward[level]
+            forward[new_node] = forward[update[level]]
+            forward[update[level]] = new_node
+
+
+    def delete(self, search_key:int):
+        update = self.find_update(search_key)
+        cur_node = self.forward[0][update[0]]
+
+        if cur_node != NIL and self.keys[cur_node] == search_key:
+            for level in range(self.levels[cur_node]):  # rewire forward pointers
+                forward = self.forward[level]
+                if forward[update[level]] == cur_node:
+                    forward[update[level]] = forward[cur_node]
+            self.release(cur_node)
+            # decrease list level if highest level becomes empty
+            while self.cur_level > 1 and self.forward[self.cur_level - 1][HEADER] == NIL:
+                self.cur_level -= 1
+
+
+    def is_empty(self):
+        for level in range(self.max_level-1, -1, -1):
+            if self.forward[level][HEADER] != NIL:
+                return False
+        return True
+
+
+    def __len__(self):
+        count = 0
+        cur_node = self.forward[0][HEADER]
+        while cur_node != NIL:
+            count += 1
+            cur_node = self.forward[0][cur_node]
+        return count
+
+
+    def __repr__(self):
+        list_string = "\n"
+        for level in range(self.max_level-1, -1, -1):
+            cur_node = self.forward[level][HEADER]
+            level_string = f"{level+1}|-->"
+            while cur_node != NIL:
+                level_string += f"({self.keys[cur_node]})-->"
+                cur_node = self.forward[level][cur_node]
+            level_string += "NULL\n"
+            list_string += level_string
+        return list_string
+
+
+    def is_valid(self):
+        for level in range(self.cur_level-1, -1, -1):
+            forward = self.forward[level]
+            cur_node = forward[HEADER]
+            while cur_node != NIL:
+                if self.levels[cur_node] <= level:  # a node can only be linked on levels below its height
+                    return False
+                next_node = forward[cur_node]
+                if next_node != NIL and self.keys[cur_node] > self.keys[next_node]:
+                    return False
+                cur_node = next_node
+        return True
+
+
+    def benchmark_insert(self, size, seed=0):
+        rng = random.Random(seed)
+        keys = rng.sample(range(size * 10), size)
+
+        start = time.perf_counter()
+        for k in keys:
+            self.insert(k, k)
+        return time.perf_counter() - start
+
+
+    def benchmark_delete(self, size, seed=0):
+        rng = random.Random(seed)
+        keys = rng.sample(range(size * 10), size)
+
+        for k in keys:
+            self.insert(k, k)
+
+        start = time.perf_counter()
+        for k in keys:
+            self.delete(k)
+        return time.perf_counter() - start
+
+
+    def benchmark_search(self, size, seed=0):
+        rng = random.Random(seed)
+        keys = rng.sample(range(size * 10), size)
+
+        for k in keys:
+            self.insert(k, k)
+
+        start = time.perf_counter()
+        for k in keys:
+            self.search(k)
+        return time.perf_counter() - start
+
+
+    def benchmark_memory(self, size, seed=0):     # returns the bytes allocated per inserted key
+        rng = random.Random(seed)
+        keys = rng.sample(range(size * 10), size)
+
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        for k in keys:
+            self.insert(k, k)
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return (after - before) / size
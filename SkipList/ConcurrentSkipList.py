@@ -0,0 +1,224 @@
+# -----------------------------------------------------------------------------
+# Author: Colin McClelland
+# Date: 2/25/25
+# Description: Skip List that can be read by many threads while a writer applies updates
+# -----------------------------------------------------------------------------
+
+import time
+import random
+import sys  # used for header key -- must be larger than any legal key
+import threading
+
+
+class ConcurrentSkipListNode:
+    def __init__(self, key, value, level):
+        self.key:int = key
+        self.value = value
+        self.forward:list = [None] * level
+        self.marked = False     # set before the node is unlinked, readers treat marked nodes as deleted
+
+
+    def __repr__(self):
+        node_string = ""
+        if self.key == sys.maxsize:
+            node_string += f"Header, "
+        else:
+            node_string += f"(key = {self.key}, "
+        node_string += f"value = {self.value}, marked = {self.marked}, forward = {self.forward})"
+        return node_string
+
+
+class ConcurrentSkipList:
+    """
+    Skip List with lock-free readers and a single writer lock.
+
+    Readers (search, is_valid, is_empty) never take a lock. Every change a writer makes is a single
+    reference assignment, and writers order those assignments so a reader always sees a sorted list:
+        - insert fills in the new node's forward pointers before publishing it, and links it bottom-up,
+          so a node reachable on any level is already reachable on level 1
+        - delete marks the node first (logical delete), then unlinks it top-down. The unlinked node keeps
+          its forward pointers, so a reader currently standing on it still walks forward correctly
+    """
+    def __init__(self, max_level = 4, p = 1/2):
+        if max_level < 1:
+            raise ValueError("Max level must be at least 1 for traditional linked list")
+        self.max_level = max_level
+        self.cur_level = 1
+        self.p = p
+        self.header = ConcurrentSkipListNode(sys.maxsize, None, max_level)    # header has max_level # of pointers
+        self.write_lock = threading.Lock()    # serializes writers, readers never acquire it
+
+
+    def random_level(self)->int:
+        level = 1
+        while random.random() < self.p and level < self.max_level:  # basic probability function
+            level += 1
+        return level
+
+
+    def search(self, search_key:int):
+        cur_node = self.header
+        for level in range(self.cur_level-1, -1, -1):
+            next_node = cur_node.forward[level]     # read each pointer once, a writer may change it between reads
+            while next_node is not None and next_node.key < search_key:
+                cur_node = next_node
+                next_node = cur_node.forward[level]
+        cur_node = cur_node.forward[0]
+
+        if cur_node is not None and cur_node.key == search_key and not cur_node.marked:
+            return cur_node.value
+        else:
+            return None # search_key is not present within the list (or is being deleted)
+
+
+    def find_update(self, search_key:int)->list:    # only called while holding the write lock
+        update = [self.header] * self.max_level
+        cur_node = self.header
+        for level in range(self.cur_level - 1, -1, -1):
+            while (cur_node.forward[level] is not None) and (cur_node.forward[level].key < search_key):
+                cur_node = cur_node.forward[level]
+            update[level] = cur_node
+        return update
+
+
+    def insert(self, search_key:int, new_value):
+        with self.write_lock:
+            update = self.find_update(search_key)
+            cur_node = update[0].forward[0]
+
+            if cur_node is not None and cur_node.key == search_key:
+                cur_node.value = new_value  # single assignment, readers see the old or the new value
+                return
+
+            new_node_level = self.random_level()
+            new_node = ConcurrentSkipListNode(search_key, new_value, new_node_level)
+            for level in range(new_node_level):     # node is fully formed before any reader can reach it
+                new_node.forward[level] = update[level].forward[level]
+
+            for level in range(new_node_level):     # publish bottom-up
+                update[level].forward[level] = new_node
+
+            if new_node_level > self.cur_level:     # raised last, so the new levels are already linked
+                self.cur_level = new_node_level
+
+
+    def delete(self, search_key:int):
+        with self.write_lock:
+            update = self.find_update(search_key)
+            cur_node = update[0].forward[0]
+
+            if cur_node is not None and cur_node.key == search_key:
+                cur_node.marked = True  # logical delete
+                for level in range(len(cur_node.forward)-1, -1, -1):  # physical delete, top-down
+                    if update[level].forward[level] is cur_node:
+                        update[level].forward[level] = cur_node.forward[level]
+                # decrease list level if highest level becomes empty
+                while self.cur_level > 1 and self.header.forward[self.cur_level - 1] is None:
+                    self.cur_level -= 1
+
+
+    def is_empty(self):
+        for level in range(self.max_level-1, -1, -1):
+            if self.header.forward[level] is not None:
+                return False
+        return True
+
+
+    def __repr__(self):
+        list_string = "\n"
+        for level in range(self.max_level-1, -1, -1):
+            cur_node = self.header.forward[level]
+            level_string = f"{level+1}|-->"
+            while cur_node is not None:
+                node_string = f"({cur_node.key})-->"
+                level_string += node_string
+                cur_node = cur_node.forward[level]
+            level_string += "NULL\n"
+            list_string += level_string
+        return list_string
+
+
+    def is_valid(self):     # safe to call while a writer is running
+        for level in range(self.cur_level-1, -1, -1):
+            cur_node = self.header.forward[level]
+            while cur_node is not None:
+                next_node = cur_node.forward[level]
+                if next_node is not None and cur_node.key > next_node.key:
+                    return False
+                cur_node = next_node
+        return True
+
+
+    def benchmark_insert(self, size, seed=0):
+        rng = random.Random(seed)
+        keys = rng.sample(range(size * 10), size)
+
+        start = time.perf_counter()
+        for k in keys:
+            self.insert(k, k)
+        return time.perf_counter() - start
+
+
+    def benchmark_delete(self, size, seed=0):
+        rng = random.Random(seed)
+        keys = rng.sample(range(size * 10), size)
+
+        for k in keys:
+            self.insert(k, k)
+
+        start = time.perf_counter()
+        for k in keys:
+            self.delete(k)
+        return time.perf_counter() - start
+
+
+    def benchmark_search(self, size, seed=0):
+        rng = random.Random(seed)
+        keys = rng.sample(range(size * 10), size)
+
+        for k in keys:
+            self.insert(k, k)
+
+        start = time.perf_counter()
+        for k in keys:
+            self.search(k)
+        return time.perf_counter() - start
+
+
+    def benchmark_read_scaling(self, size, thread_counts=[1,2,4,8], reads_per_thread=100000, with_writer=True, seed=0):
+        # returns one row per thread count: total reads/sec across all reader threads, optionally while a writer inserts and deletes
+        rng = random.Random(seed)
+        keys = rng.sample(range(size * 10), size)
+        for k in keys:
+            self.insert(k, k)
+
+        results = []
+        for num_threads in thread_counts:
+            stop_writer = threading.Event()
+
+            def reader(thread_seed):
+                reader_rng = random.Random(thread_seed)
+                for _ in range(reads_per_thread):
+                    self.search(keys[reader_rng.randrange(size)])
+
+            def writer():
+                writer_rng = random.Random(seed)
+                while not stop_writer.is_set():
+                    k = writer_rng.randrange(size * 10, size * 20)  # never collides with the keys being read
+                    self.insert(k, k)
+                    self.delete(k)
+
+            readers = [threading.Thread(target=reader, args=(seed + i,)) for i in range(num_threads)]
+            writer_thread = threading.Thread(target=writer) if with_writer else None
+
+            if writer_thread is not None: writer_thread.start()
+            start = time.perf_counter()
+            for thread in readers: thread.start()
+            for thread in readers: thread.join()
+            elapsed = time.perf_counter() - start
+            stop_writer.set()
+            if writer_thread is not None: writer_thread.join()
+
+            results.append({"threads": num_threads, "total_reads": num_threads * reads_per_thread,
+                            "time": elapsed, "reads_per_sec": num_threads * reads_per_thread / elapsed})
+        return results
@@ -0,0 +1,256 @@
+# -----------------------------------------------------------------------------
+# Author: Colin McClelland
+# Date: 2/25/25
+# Description: Deterministic 1-2-3 Skip List based on Deterministic Skip Lists by Munro, Papadakis and Sedgewick
+# -----------------------------------------------------------------------------
+
+import time
+import random
+import sys  # used for header key -- must be larger than any legal key
+
+
+class DeterministicSkipListNode:
+    def __init__(self, key, value, level):
+        self.key:int = key
+        self.value = value
+        self.forward:list = [None] * level  # height of a node is len(forward), it changes when the node is promoted/demoted
+
+
+    def __repr__(self):
+        node_string = ""
+        if self.key == sys.maxsize:
+            node_string += f"Header, "
+        else:
+            node_string += f"(key = {self.key}, "
+        node_string += f"value = {self.value}, forward = {self.forward})"
+        return node_string
+
+
+class DeterministicSkipList:
+    """
+    Skip List without randomness. A "gap" on level i is the run of level i nodes between two consecutive
+    level i+1 nodes (the header and NULL count as level i+1 nodes). Every gap holds 1, 2 or 3 nodes, which
+    makes the list behave like a 2-3-4 tree: search, insert and delete are worst case O(log n).
+
+    Both updates restructure top-down on the way to the key, so a single pass is enough:
+        - insert splits any gap of 3 it is about to enter by promoting the middle node
+        - delete grows any gap of 1 it is about to enter, by borrowing a node from a sibling gap or by
+          merging with the sibling (demoting the node that separates them)
+    """
+    def __init__(self):
+        self.cur_level = 1
+        self.header = DeterministicSkipListNode(sys.maxsize, None, 2)   # header always has one more (empty) level than the list
+
+
+    def search(self, search_key:int):
+        cur_node = self.header
+        for level in range(self.cur_level-1, -1, -1):
+            while (cur_node.forward[level] is not None) and (cur_node.forward[level].key < search_key):
+                cur_node = cur_node.forward[level]
+        cur_node = cur_node.forward[0]
+
+        if cur_node is not None and cur_node.key == search_key:
+            return cur_node.value
+        else:
+            return None # search_key is not present within the list
+
+
+    def gap_size(self, left:DeterministicSkipListNode, level:int)->int:   # number of level nodes between left and the next level+1 node
+        boundary = left.forward[level+1]
+        cur_node = left.forward[level]
+        size = 0
+        while cur_node is not boundary:
+            size += 1
+            cur_node = cur_node.forward[level]
+        return size
+
+
+    def promote(self, node:DeterministicSkipListNode, prev:DeterministicSkipListNode):  # raise node by one level, prev is the node before it on that level
+        level = len(node.forward)
+        node.forward.append(prev.forward[level])
+        prev.forward[level] = node
+        if level == self.cur_level:     # a new top level was created
+            self.cur_level += 1
+            self.header.forward.append(None)
+
+
+    def demote(self, node:DeterministicSkipListNode, prev:DeterministicSkipListNode):   # lower node by one level, prev is the node before it on its top level
+        level = len(node.forward) - 1
+        prev.forward[level] = node.forward[level]
+        node.forward.pop()
+
+
+    def insert(self, search_key:int, new_value):
+        cur_node = self.header
+        for level in range(self.cur_level, 0, -1):
+            while (cur_node.forward[level] is not None) and (cur_node.forward[level].key < search_key):
+                cur_node = cur_node.forward[level]
+            if self.gap_size(cur_node, level-1) == 3:   # split the gap before entering it
+                middle = cur_node.forward[level-1].forward[level-1]
+                self.promote(middle, cur_node)
+                if middle.key < search_key:
+                    cur_node = middle
+
+        while (cur_node.forward[0] is not None) and (cur_node.forward[0].key < search_key):
+            cur_node = cur_node.forward[0]
+
+        if cur_node.forward[0] is not None and cur_node.forward[0].key == search_key:
+            cur_node.forward[0].value = new_value
+            return
+
+        new_node = DeterministicSkipListNode(search_key, new_value, 1)  # gap we landed in has at most 2 nodes
+        new_node.forward[0] = cur_node.forward[0]
+        cur_node.forward[0] = new_node
+
+
+    def delete(self, search_key:int):
+        cur_node = self.header
+        for level in range(self.cur_level-1, 0, -1):
+            prev = None     # node before cur_node on this level, needed to demote cur_node
+            while (cur_node.forward[level] is not None) and (cur_node.forward[level].key < search_key):
+                prev = cur_node
+                cur_node = cur_node.forward[level]
+            if self.gap_size(cur_node, level-1) == 1:   # grow the gap before entering it
+                cur_node = self.fix_gap(cur_node, prev, level)
+
+        prev = None
+        while (cur_node.forward[0] is not None) and (cur_node.forward[0].key < search_key):
+            prev = cur_node
+            cur_node = cur_node.forward[0]
+        target = cur_node.forward[0]
+
+        if target is not None and target.key == search_key:
+            if len(target.forward) == 1:
+                cur_node.forward[0] = target.forward[0]
+            else:   # target separates gaps, so replace it with its predecessor (a level 1 node in a gap of 2+) and remove that instead
+                target.key, target.value = cur_node.key, cur_node.value
+                prev.forward[0] = cur_node.forward[0]
+
+        # decrease list level if highest level becomes empty (a merge can empty it even if the key was missing)
+        while self.cur_level > 1 and self.header.forward[self.cur_level - 1] is None:
+            self.cur_level -= 1
+            self.header.forward.pop()
+
+
+    def fix_gap(self, cur_node, prev, level)->DeterministicSkipListNode:
+        # the level-1 gap right of cur_node holds a single node. prev is the node before cur_node on this level
+        # returns the node on the left of the repaired gap
+        next_node = cur_node.forward[level]
+        if next_node is not None and len(next_node.forward) == level + 1:   # right sibling gap shares our parent gap
+            sibling_size = self.gap_size(next_node, level-1)
+            self.demote(next_node, cur_node)    # separator drops into our gap
+            if sibling_size >= 2:   # borrow: first node of the sibling gap becomes the new separator
+                self.promote(next_node.forward[level-1], cur_node)
+            return cur_node
+
+        # otherwise cur_node separates us from the left sibling gap
+        last = prev.forward[level-1]
+        sibling_size = 1
+        while last.forward[level-1] is not cur_node:
+            last = last.forward[level-1]
+            sibling_size += 1
+        self.demote(cur_node, prev)
+        if sibling_size >= 2:   # borrow: last node of the sibling gap becomes the new separator
+            self.promote(last, prev)
+            return last
+        return prev
+
+
+    def is_empty(self):
+        return self.header.forward[0] is None
+
+
+    def __repr__(self):
+        list_string = "\n"
+        for level in range(self.cur_level-1, -1, -1):
+            cur_node = self.header.forward[level]
+            level_string = f"{level+1}|-->"
+            while cur_node is not None:
+                node_string = f"({cur_node.key})-->"
+                level_string += node_string
+                cur_node = cur_node.forward[level]
+            level_string += "NULL\n"
+            list_string += level_string
+        return list_string
+
+
+    def is_valid(self):     # checks key order on every level and that every gap holds 1-3 nodes
+        if self.is_empty():
+            return self.cur_level == 1
+        for level in range(self.cur_level-1, -1, -1):
+            cur_node = self.header.forward[level]
+            gap = 0
+            while cur_node is not None:
+                if len(cur_node.forward) <= level:  # node is linked above its height
+                    return False
+                if (cur_node.forward[level] is not None) and (cur_node.key > cur_node.forward[level].key):
+                    return False
+                if len(cur_node.forward) == level + 1:  # member of a gap
+                    gap += 1
+                else:   # separator closes the current gap
+                    if not 1 <= gap <= 3:
+                        return False
+                    gap = 0
+                cur_node = cur_node.forward[level]
+            if not 1 <= gap <= 3:   # last gap is closed by NULL
+                return False
+        return True
+
+
+    def benchmark_insert(self, size, seed=0):
+        rng = random.Random(seed)
+        keys = rng.sample(range(size * 10), size)
+
+        start = time.perf_counter()
+        for k in keys:
+            self.insert(k, k)
+        return time.perf_counter() - start
+
+
+    def benchmark_delete(self, size, seed=0):
+        rng = random.Random(seed)
+        keys = rng.sample(range(size * 10), size)
+
+        for k in keys:
+            self.insert(k, k)
+
+        start = time.perf_counter()
+        for k in keys:
+            self.delete(k)
+        return time.perf_counter() - start
+
+
+    def benchmark_search(self, size, seed=0):
+        rng = random.Random(seed)
+        keys = rng.sample(range(size * 10), size)
+
+        for k in keys:
+            self.insert(k, k)
+
+        start = time.perf_counter()
+        for k in keys:
+            self.search(k)
+        return time.perf_counter() - start
+
+
+    def benchmark_latency(self, size, percentiles=[50, 99, 99.9], seed=0):
+        # times every insert and search individually, returns {operation: {percentile: seconds}}
+        rng = random.Random(seed)
+        keys = rng.sample(range(size * 10), size)
+
+        latencies = {"insert": [], "search": []}
+        for k in keys:
+            start = time.perf_counter()
+            self.insert(k, k)
+            latencies["insert"].append(time.perf_counter() - start)
+        for k in keys:
+            start = time.perf_counter()
+            self.search(k)
+            latencies["search"].append(time.perf_counter() - start)
+
+        results = {}
+        for operation, times in latencies.items():
+            times.sort()
+            results[operation] = {p: times[min(len(times)-1, int(len(times) * p / 100))] for p in percentiles}
+            results[operation]["max"] = times[-1]
+        return results
@@ -7,6 +7,17 @@
 import time
 import random
 import sys  # used for header key -- must be larger than any legal key
+import tracemalloc
+import struct
+import pickle
+import os
+import tempfile
+from collections import Counter
+
+SNAPSHOT_MAGIC = b"SKPL"
+SNAPSHOT_HEADER = struct.Struct("<4sHd")  # magic, max_level, p
+SNAPSHOT_ENTRY = struct.Struct("<qBI")    # key, node level, length of the pickled value that follows
+
 
 class SkipListNode:
     def __init__(self, key, value, level):
@@ -134,6 +145,55 @@ class SkipList:
         return True
 
 
+    def dump(self, path):
+        # streams the level 1 list to disk: (key, level, pickled value) per node, in key order
+        # keys must fit in a signed 64-bit integer
+        with open(path, "wb") as file:
+            file.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, self.max_level, self.p))
+            cur_node = self.header.forward[0]
+            while cur_node is not None:
+                value_bytes = pickle.dumps(cur_node.value, pickle.HIGHEST_PROTOCOL)
+                file.write(SNAPSHOT_ENTRY.pack(cur_node.key, len(cur_node.forward), len(value_bytes)))
+                file.write(value_bytes)
+                cur_node = cur_node.forward[0]
+
+
+    @classmethod
+    def load(cls, path):
+        # rebuilds a list written by dump() in one pass. Nodes arrive in key order with their original level,
+        # so each one is appended after the last node seen on every level it spans -- no searching required
+        with open(path, "rb") as file:
+            header = file.read(SNAPSHOT_HEADER.size)
+            if len(header) < SNAPSHOT_HEADER.size:
+                raise ValueError("Skip list snapshot is truncated")
+            magic, max_level, p = SNAPSHOT_HEADER.unpack(header)
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError("File is not a skip list snapshot")
+            skip_list = cls(max_level, p)
+            last = [skip_list.header] * max_level   # rightmost node on each level so far
+            entry_size = SNAPSHOT_ENTRY.size
+            read, unpack, loads = file.read, SNAPSHOT_ENTRY.unpack, pickle.loads   # bound once, this loop runs per key
+            while True:
+                entry = read(entry_size)
+                if not entry:
+                    break
+                if len(entry) < entry_size:
+                    raise ValueError("Skip list snapshot is truncated")
+                key, level, value_size = unpack(entry)
+                if not 1 <= level <= max_level:
+                    raise ValueError("Skip list snapshot is corrupt")
+                value_bytes = read(value_size)
+                if len(value_bytes) < value_size:
+                    raise ValueError("Skip list snapshot is truncated")
+                new_node = SkipListNode(key, loads(value_bytes), level)
+                for i in range(level):
+                    last[i].forward[i] = new_node
+                    last[i] = new_node
+                if level > skip_list.cur_level:
+                    skip_list.cur_level = level
+        return skip_list
+
+
     def benchmark_insert(self, size, seed=0):
         rng = random.Random(seed)
         keys = rng.sample(range(size * 10), size)
@@ -168,3 +228,191 @@ class SkipList:
         for k in keys:
             self.search(k)  
         return time.perf_counter() - start
+
+
+    def benchmark_memory(self, size, seed=0):     # returns the bytes allocated per inserted key
+        rng = random.Random(seed)
+        keys = rng.sample(range(size * 10), size)
+
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        for k in keys:
+            self.insert(k, k)
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return (after - before) / size
+
+
+    def benchmark_latency(self, size, percentiles=[50, 99, 99.9], seed=0):
+        # times every insert and search individually, returns {operation: {percentile: seconds}}
+        rng = random.Random(seed)
+        keys = rng.sample(range(size * 10), size)
+
+        latencies = {"insert": [], "search": []}
+        for k in keys:
+            start = time.perf_counter()
+            self.insert(k, k)
+            latencies["insert"].append(time.perf_counter() - start)
+        for k in keys:
+            start = time.perf_counter()
+            self.search(k)
+            latencies["search"].append(time.perf_counter() - start)
+
+        results = {}
+        for operation, times in latencies.items():
+            times.sort()
+            results[operation] = {p: times[min(len(times)-1, int(len(times) * p / 100))] for p in percentiles}
+            results[operation]["max"] = times[-1]
+        return results
+
+
+
+    def benchmark_reload(self, size, seed=0):
+        # compares rebuilding a list by re-inserting every key with dump() + load()
+        rng = random.Random(seed)
+        keys = rng.sample(range(size * 10), size)
+
+        start = time.perf_counter()
+        for k in keys:
+            self.insert(k, k)
+        insert_time = time.perf_counter() - start
+
+        fd, path = tempfile.mkstemp(suffix=".skpl")
+        os.close(fd)
+        try:
+            start = time.perf_counter()
+            self.dump(path)
+            dump_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            type(self).load(path)
+            load_time = time.perf_counter() - start
+            file_size = os.path.getsize(path)
+        finally:
+            os.remove(path)
+        return {"size": size, "insert_time": insert_time, "dump_time": dump_time, "load_time": load_time, "file_bytes": file_size}
+
+
+class InstrumentedSkipList(SkipList):
+    """
+    SkipList that records how much work search, insert and delete do. Kept as a subclass so the plain
+    SkipList pays nothing for it.
+
+    For every operation it counts key comparisons and forward hops on each level, and keeps histograms
+    (hop count -> number of operations, comparison count -> number of operations) per operation type.
+    level_distribution() compares the node heights actually drawn by random_level with the geometric
+    distribution they should follow.
+    """
+    OPERATIONS = ("search", "insert", "delete")
+
+    def __init__(self, max_level = 4, p = 1/2):
+        super().__init__(max_level, p)
+        self.reset_stats()
+
+
+    def reset_stats(self):
+        self.hops_per_level = [0] * self.max_level     # total forward hops taken on each level
+        self.comparisons = 0
+        self.operation_counts = Counter()
+        self.hop_histogram = {op: Counter() for op in self.OPERATIONS}
+        self.comparison_histogram = {op: Counter() for op in self.OPERATIONS}
+
+
+    def find_update(self, search_key:int, operation:str)->list:    # same descent as SkipList, counting as it goes
+        update = [None] * self.max_level
+        cur_node = self.header
+        hops = 0
+        comparisons = 0
+        for level in range(self.cur_level - 1, -1, -1):
+            level_hops = 0
+            while cur_node.forward[level] is not None:
+                comparisons += 1
+                if not cur_node.forward[level].key < search_key:
+                    break
+                cur_node = cur_node.forward[level]
+                level_hops += 1
+            self.hops_per_level[level] += level_hops
+            hops += level_hops
+            update[level] = cur_node
+
+        comparisons += 1    # final equality check against the candidate node
+        self.comparisons += comparisons
+        self.operation_counts[operation] += 1
+        self.hop_histogram[operation][hops] += 1
+        self.comparison_histogram[operation][comparisons] += 1
+        return update
+
+
+    def search(self, search_key:int):
+        cur_node = self.find_update(search_key, "search")[0].forward[0]
+        if cur_node is not None and cur_node.key == search_key:
+            return cur_node.value
+        return None
+
+
+    def insert(self, search_key:int, new_value):
+        update = self.find_update(search_key, "insert")
+        cur_node = update[0].forward[0]
+
+        if cur_node is not None and cur_node.key == search_key:
+            cur_node.value = new_value
+            return
+
+        new_node_level = self.random_level()
+        new_node = SkipListNode(search_key, new_value, new_node_level)
+
+        if new_node_level > self.cur_level:
+            for i in range(self.cur_level, new_node_level):
+                update[i] = self.header
+            self.cur_level = new_node_level
+
+        for level in range(new_node_level):
+            new_node.forward[level] = update[level].forward[level]
+            update[level].forward[level] = new_node
+
+
+    def delete(self, search_key:int):
+        update = self.find_update(search_key, "delete")
+        cur_node = update[0].forward[0]
+
+        if cur_node is not None and cur_node.key == search_key:
+            for level in range(len(cur_node.forward)): # rewire forward pointers
+                if update[level].forward[level] == cur_node:
+                    update[level].forward[level] = cur_node.forward[level]
+            while self.cur_level > 1 and self.header.forward[self.cur_level - 1] is None:
+                self.cur_level -= 1
+
+
+    def level_distribution(self)->list:
+        # one row per level: how many nodes have exactly that height vs how many a geometric(p) draw capped at max_level expects
+        actual = [0] * self.max_level
+        cur_node = self.header.forward[0]
+        while cur_node is not None:
+            actual[len(cur_node.forward) - 1] += 1
+            cur_node = cur_node.forward[0]
+
+        n = sum(actual)
+        rows = []
+        for level in range(1, self.max_level + 1):
+            if level < self.max_level:
+                probability = (self.p ** (level - 1)) * (1 - self.p)
+            else:   # random_level stops at max_level, so the last level absorbs the tail
+                probability = self.p ** (level - 1)
+            rows.append({"level": level, "actual": actual[level - 1], "expected": n * probability})
+        return rows
+
+
+    def stats(self)->dict:
+        total_ops = sum(self.operation_counts.values())
+        summary = {
+            "operations": dict(self.operation_counts),
+            "comparisons": self.comparisons,
+            "avg_comparisons": self.comparisons / total_ops if total_ops else 0,
+            "hops_per_level": list(self.hops_per_level),
+            "avg_hops_per_level": [hops / total_ops if total_ops else 0 for hops in self.hops_per_level],
+        }
+        for op in self.OPERATIONS:
+            count = self.operation_counts[op]
+            total_hops = sum(hops * freq for hops, freq in self.hop_histogram[op].items())
+            summary[f"avg_{op}_hops"] = total_hops / count if count else 0
+        return summary
@@ -0,0 +1,110 @@
+import pytest
+import random
+from ArraySkipList import ArraySkipList, HEADER, NIL
+
+
+
+def test_empty_list():
+    list = ArraySkipList(max_level=3, p=1/2)
+    assert list.cur_level == 1
+    assert len(list.forward) == 3
+    assert list.is_empty()
+    assert list.search(1) == None
+
+
+def test_invalid_max_level():
+    with pytest.raises(ValueError):
+        ArraySkipList(max_level=0)
+    with pytest.raises(ValueError):
+        ArraySkipList(max_level=70000)
+
+
+def test_large_max_level():
+    list = ArraySkipList(max_level=200, p=1/2)
+    for k in range(100):
+        list.insert(k, k)
+    assert list.search(50) == 50
+
+
+def test_insert_and_search():
+    list = ArraySkipList(max_level=3, p=1/2)
+    for i in range(5):
+        list.insert(i, i * 10)
+    assert list.is_valid()
+    for i in range(5):
+        assert list.search(i) == i * 10
+    assert list.search(5) == None
+
+
+def test_insert_updates_value():
+    list = ArraySkipList(max_level=3, p=1/2)
+    list.insert(1, 'a')
+    list.insert(1, 'b')
+    assert list.search(1) == 'b'
+    assert len(list) == 1
+
+
+def test_delete():
+    list = ArraySkipList(max_level=3, p=1/2)
+    for i in range(5):
+        list.insert(i, i)
+    for key in [3, 1, 0, 2, 4]:
+        list.delete(key)
+        assert list.search(key) == None
+        assert list.is_valid()
+    assert list.is_empty()
+    assert list.cur_level == 1
+
+
+def test_delete_missing_key():
+    list = ArraySkipList(max_level=3, p=1/2)
+    list.insert(1, 1)
+    list.delete(2)
+    assert list.search(1) == 1
+
+
+def test_free_list_reuses_slots():
+    list = ArraySkipList(max_level=3, p=1/2)
+    for i in range(10):
+        list.insert(i, i)
+    used = list.next_slot
+    list.delete(4)
+    list.delete(7)
+    list.insert(100, 100)
+    list.insert(101, 101)
+    assert list.next_slot == used  # both inserts took a freed slot
+    assert list.free_head == NIL
+    assert list.search(100) == 100 and list.search(101) == 101
+    assert list.is_valid()
+
+
+def test_grows_past_initial_capacity():
+    list = ArraySkipList(max_level=4, p=1/2, capacity=2)
+    for i in range(50):
+        list.insert(i, i)
+    assert len(list.keys) >= 51
+    assert len(list) == 50
+    assert list.is_valid()
+
+
+def test_matches_dict_random_workload():
+    rng = random.Random(7)
+    list = ArraySkipList(max_level=8, p=1/2)
+    expected = {}
+    for _ in range(2000):
+        key = rng.randrange(200)
+        if rng.random() < 0.6:
+            list.insert(key, -key)
+            expected[key] = -key
+        else:
+            list.delete(key)
+            expected.pop(key, None)
+    assert list.is_valid()
+    assert len(list) == len(expected)
+    for key in range(200):
+        assert list.search(key) == expected.get(key)
+
+
+def test_header_slot():
+    list = ArraySkipList(max_level=3, p=1/2)
+    assert list.levels[HEADER] == 3
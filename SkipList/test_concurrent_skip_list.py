@@ -0,0 +1,93 @@
+import pytest
+import random
+import threading
+from ConcurrentSkipList import ConcurrentSkipList
+
+
+
+def test_insert_search_delete():
+    list = ConcurrentSkipList(max_level=3, p=1/2)
+    for i in range(5):
+        list.insert(i, i)
+    assert list.is_valid()
+    assert list.search(3) == 3
+    list.delete(3)
+    assert list.search(3) == None
+    assert list.is_valid()
+
+
+def test_marked_node_is_invisible():
+    list = ConcurrentSkipList(max_level=3, p=1/2)
+    list.insert(1, 1)
+    list.header.forward[0].marked = True    # logically deleted but not yet unlinked
+    assert list.search(1) == None
+
+
+def test_deleted_node_keeps_forward_pointers():
+    list = ConcurrentSkipList(max_level=1, p=1/2)
+    for i in range(3):
+        list.insert(i, i)
+    node = list.header.forward[0].forward[0]    # key 1
+    list.delete(1)
+    assert node.marked
+    assert node.forward[0].key == 2     # a reader standing on the node can still move forward
+
+
+def test_delete_all():
+    list = ConcurrentSkipList(max_level=4, p=1/2)
+    for i in range(50):
+        list.insert(i, i)
+    for i in range(50):
+        list.delete(i)
+    assert list.is_empty()
+    assert list.cur_level == 1
+
+
+def test_threaded_stress():
+    list = ConcurrentSkipList(max_level=8, p=1/2)
+    stable_keys = range(0, 2000, 2)     # even keys are never deleted
+    for k in stable_keys:
+        list.insert(k, k)
+
+    stop = threading.Event()
+    errors = []
+
+    def writer(seed):
+        rng = random.Random(seed)
+        for _ in range(3000):
+            k = rng.randrange(1, 2000, 2)   # writers only touch odd keys
+            if rng.random() < 0.5:
+                list.insert(k, k)
+            else:
+                list.delete(k)
+
+    def reader(seed):
+        rng = random.Random(seed)
+        while not stop.is_set():
+            if not list.is_valid():
+                errors.append("invalid list")
+            k = rng.choice(stable_keys)
+            if list.search(k) != k:
+                errors.append(f"lost key {k}")
+            odd = rng.randrange(1, 2000, 2)
+            if list.search(odd) not in (None, odd):
+                errors.append(f"wrong value for {odd}")
+
+    readers = [threading.Thread(target=reader, args=(i,)) for i in range(4)]
+    writers = [threading.Thread(target=writer, args=(100 + i,)) for i in range(2)]
+    for thread in readers + writers: thread.start()
+    for thread in writers: thread.join()
+    stop.set()
+    for thread in readers: thread.join()
+
+    assert errors == []
+    assert list.is_valid()
+    for k in stable_keys:
+        assert list.search(k) == k
+
+
+def test_benchmark_read_scaling():
+    list = ConcurrentSkipList(max_level=8, p=1/2)
+    results = list.benchmark_read_scaling(500, thread_counts=[1, 2], reads_per_thread=200)
+    assert [row["threads"] for row in results] == [1, 2]
+    assert all(row["reads_per_sec"] > 0 for row in results)
@@ -0,0 +1,106 @@
+import pytest
+import random
+from DeterministicSkipList import DeterministicSkipList
+
+
+
+def test_empty_list():
+    list = DeterministicSkipList()
+    assert list.cur_level == 1
+    assert list.is_empty()
+    assert list.is_valid()
+    assert list.search(1) == None
+
+
+def test_fourth_insert_promotes_middle():
+    list = DeterministicSkipList()
+    for i in range(3):
+        list.insert(i, i)
+    assert list.cur_level == 1
+    list.insert(3, 3)   # gap of 3 is split before the insert
+    assert list.cur_level == 2
+    assert list.header.forward[1].key == 1
+    assert list.is_valid()
+
+
+def test_insert_updates_value():
+    list = DeterministicSkipList()
+    for i in range(10):
+        list.insert(i, i)
+    list.insert(5, 'five')
+    assert list.search(5) == 'five'
+    assert list.is_valid()
+
+
+def test_ascending_and_descending_inserts_stay_balanced():
+    for keys in [range(1000), range(999, -1, -1)]:
+        list = DeterministicSkipList()
+        for k in keys:
+            list.insert(k, k)
+            assert list.is_valid()
+        assert list.cur_level <= 11     # at least 2 nodes per gap above the bottom -> at most log2(n) + 1 levels
+        for k in keys:
+            assert list.search(k) == k
+
+
+def test_delete_separator():
+    list = DeterministicSkipList()
+    for i in range(20):
+        list.insert(i, i)
+    separator = list.header.forward[1].key
+    list.delete(separator)
+    assert list.search(separator) == None
+    assert list.is_valid()
+
+
+def test_delete():
+    list = DeterministicSkipList()
+    for i in range(5):
+        list.insert(i, i)
+    for key in [3, 1, 0, 2, 4]:
+        list.delete(key)
+        assert list.search(key) == None
+        assert list.is_valid()
+    assert list.is_empty()
+    assert list.cur_level == 1
+
+
+def test_delete_missing_key():
+    list = DeterministicSkipList()
+    for i in range(0, 40, 2):
+        list.insert(i, i)
+    list.delete(7)
+    assert list.is_valid()
+    for i in range(0, 40, 2):
+        assert list.search(i) == i
+
+
+def test_matches_dict_random_workload():
+    rng = random.Random(3)
+    list = DeterministicSkipList()
+    expected = {}
+    for _ in range(5000):
+        key = rng.randrange(300)
+        if rng.random() < 0.55:
+            list.insert(key, -key)
+            expected[key] = -key
+        else:
+            list.delete(key)
+            expected.pop(key, None)
+        assert list.is_valid()
+    for key in range(300):
+        assert list.search(key) == expected.get(key)
+
+
+def test_is_valid_negative():
+    list = DeterministicSkipList()
+    for i in range(10):
+        list.insert(i, i)
+    list.header.forward[0].key = 100
+    assert list.is_valid() == False
+
+
+def test_benchmark_latency():
+    results = DeterministicSkipList().benchmark_latency(200)
+    assert results["insert"][50] <= results["insert"][99] <= results["insert"]["max"]
+    assert set(results) == {"insert", "search"}
@@ -1,5 +1,6 @@
 import pytest
-from SkipList import SkipListNode, SkipList
+import struct
+from SkipList import SkipListNode, SkipList, InstrumentedSkipList, SNAPSHOT_HEADER, SNAPSHOT_ENTRY
 
 
 
@@ -163,3 +164,90 @@ def test_delete():
 
     # assert True == False
 
+
+
+def test_instrumented_counts_hops():
+    list = InstrumentedSkipList(max_level=1, p=1/2)     # single level -> a plain linked list
+    for i in range(5):
+        list.insert(i, i)
+    list.reset_stats()
+    assert list.search(4) == 4
+    assert list.hops_per_level == [4]   # walks past 0,1,2,3
+    assert list.comparisons == 6        # 5 less-than checks + final equality check
+    assert list.hop_histogram["search"][4] == 1
+    assert list.stats()["avg_search_hops"] == 4
+
+
+def test_instrumented_behaves_like_skip_list():
+    list = InstrumentedSkipList(max_level=4, p=1/2)
+    for i in range(50):
+        list.insert(i, i * 2)
+    for i in range(0, 50, 3):
+        list.delete(i)
+    assert list.is_valid()
+    for i in range(50):
+        assert list.search(i) == (None if i % 3 == 0 else i * 2)
+    assert list.operation_counts == {"insert": 50, "delete": 17, "search": 50}
+
+
+def test_level_distribution():
+    list = InstrumentedSkipList(max_level=3, p=1/2)
+    for i in range(100):
+        list.insert(i, i)
+    rows = list.level_distribution()
+    assert [row["level"] for row in rows] == [1, 2, 3]
+    assert sum(row["actual"] for row in rows) == 100
+    assert [row["expected"] for row in rows] == [50, 25, 25]
+
+
+def test_dump_and_load(tmp_path):
+    list = SkipList(max_level=4, p=1/2)
+    for i in range(200):
+        list.insert(i, {"value": i})
+    path = tmp_path / "list.skpl"
+    list.dump(path)
+
+    loaded = SkipList.load(path)
+    assert loaded.max_level == 4 and loaded.p == 1/2
+    assert loaded.cur_level == list.cur_level
+    assert loaded.is_valid()
+    assert repr(loaded) == repr(list)   # identical towers
+    for i in range(200):
+        assert loaded.search(i) == {"value": i}
+    loaded.insert(500, 500)
+    loaded.delete(3)
+    assert loaded.search(500) == 500 and loaded.search(3) == None
+
+
+def test_load_empty_list(tmp_path):
+    path = tmp_path / "empty.skpl"
+    SkipList(max_level=3).dump(path)
+    loaded = SkipList.load(path)
+    assert loaded.is_empty()
+    assert loaded.cur_level == 1
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / "bad.skpl"
+    path.write_bytes(b"not a snapshot at all")
+    with pytest.raises(ValueError):
+        SkipList.load(path)
+
+
+def test_load_rejects_damaged_files(tmp_path):
+    list = SkipList(max_level=4, p=1/2)
+    for i in range(20):
+        list.insert(i, "value %d" % i)
+    path = tmp_path / "list.skpl"
+    list.dump(path)
+    data = path.read_bytes()
+    bad_level = bytearray(data)
+    struct.pack_into("<B", bad_level, SNAPSHOT_HEADER.size + 8, 9)     # level byte of the first entry, above max_level
+    damaged = [data[:2],                                                # shorter than the header
+               data[:SNAPSHOT_HEADER.size + SNAPSHOT_ENTRY.size + 2],   # first value cut short
+               data[:-1],                                               # last value cut short
+               bytes(bad_level)]
+    for contents in damaged:
+        path.write_bytes(contents)
+        with pytest.raises(ValueError):
+            SkipList.load(path)
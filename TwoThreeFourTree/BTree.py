@@ -0,0 +1,308 @@
+# -----------------------------------------------------------------------------
+# Author: Colin McClelland
+# Date: 3/18/25
+# Description: B-tree of configurable order, generalized from the 234 Tree (a 234 Tree is a B-tree of order 4)
+# -----------------------------------------------------------------------------
+
+import time
+import random
+from bisect import bisect_left
+
+
+class BTreeNode:
+    __slots__ = ("keys", "values", "children")
+
+    def __init__(self, keys=None, values=None, children=None):
+        self.keys = keys if keys is not None else []        # sorted keys, values[i] belongs to keys[i]
+        self.values = values if values is not None else []
+        self.children = children    # None for a leaf, otherwise len(keys)+1 child nodes
+
+
+    def num_keys(self):
+        return len(self.keys)
+
+
+    def is_leaf(self):
+        return self.children is None
+
+
+    def pairs(self, i) -> tuple:
+        return (self.keys[i], self.values[i])
+
+
+    def __repr__(self):
+        return "[" + " | ".join(str(key) for key in self.keys) + "]\n"
+
+
+
+class BTree:
+    """
+    B-tree where every node has at most order children (order-1 keys). Uses the same one-pass algorithms as
+    TwoThreeFourTree:
+        - insert splits every full node it meets on the way down, so the parent always has room for the median
+        - delete makes sure every child it descends into has more than the minimum number of keys, by rotating
+          a key from a sibling or merging with a sibling (cases 3.1 and 3.2), and replaces keys found in internal
+          nodes by their predecessor/successor or merges the two children around them (cases 2.1-2.3)
+    Inserting a key that is already present replaces its value.
+    """
+    def __init__(self, order=4):
+        if order < 4:
+            raise ValueError("Order must be at least 4 for top-down splitting")
+        self.order = order
+        self.max_keys = order - 1
+        self.min_keys = (order - 2) // 2    # smallest half of a split full node
+        self.root = None
+
+
+    def is_full(self, node:BTreeNode):
+        return len(node.keys) == self.max_keys
+
+
+    def search(self, search_key):
+        cur_node = self.root
+        while cur_node is not None:
+            keys = cur_node.keys
+            i = bisect_left(keys, search_key)
+            if i < len(keys) and keys[i] == search_key:
+                return cur_node.values[i]
+            cur_node = cur_node.children[i] if cur_node.children is not None else None
+        return None
+
+
+    def split_child(self, parent:BTreeNode, i):
+        # splits the full child i of parent around its median key, which moves up into parent
+        child = parent.children[i]
+        mid = self.max_keys // 2
+        right = BTreeNode(child.keys[mid+1:], child.values[mid+1:])
+        if child.children is not None:
+            right.children = child.children[mid+1:]
+            del child.children[mid+1:]
+        parent.keys.insert(i, child.keys[mid])
+        parent.values.insert(i, child.values[mid])
+        parent.children.insert(i+1, right)
+        del child.keys[mid:]
+        del child.values[mid:]
+
+
+    def insert(self, new_key, new_value):
+        if self.root is None:   # Case: empty tree
+            self.root = BTreeNode([new_key], [new_value])
+            return
+
+        if self.is_full(self.root):   # Case: root is full, the tree grows by one level
+            self.root = BTreeNode(children=[self.root])
+            self.split_child(self.root, 0)
+
+        cur_node = self.root
+        while True:
+            keys = cur_node.keys
+            i = bisect_left(keys, new_key)
+            if i < len(keys) and keys[i] == new_key:
+                cur_node.values[i] = new_value
+                return
+            if cur_node.children is None:
+                keys.insert(i, new_key)
+                cur_node.values.insert(i, new_value)
+                return
+            if self.is_full(cur_node.children[i]):  # split before descending, cur_node has room for the median
+                self.split_child(cur_node, i)
+                if new_key == keys[i]:
+                    cur_node.values[i] = new_value
+                    return
+                if new_key > keys[i]:
+                    i += 1
+            cur_node = cur_node.children[i]
+
+
+    def delete(self, search_key):
+        if self.root is None:
+            raise ValueError("Tree is empty")
+        cur_node = self.root
+        while cur_node.children is not None:
+            keys = cur_node.keys
+            key_idx = bisect_left(keys, search_key)
+            if key_idx < len(keys) and keys[key_idx] == search_key: # Case 2, present within current internal node
+                cur_node, search_key = self.delete_internal_key(cur_node, key_idx)
+            else:   # Case 3: make sure the child on the path has spare keys, then descend
+                cur_node = self.prepare_child(cur_node, key_idx)
+
+        key_idx = bisect_left(cur_node.keys, search_key)   # Case 1: leaf
+        if key_idx == len(cur_node.keys) or cur_node.keys[key_idx] != search_key:
+            raise KeyError("Key does not exist within tree")
+        del cur_node.keys[key_idx]
+        del cur_node.values[key_idx]
+        if len(self.root.keys) == 0:    # last key of the tree was removed
+            self.root = None
+
+
+    def delete_internal_key(self, cur_node:BTreeNode, key_idx) -> tuple:
+        left_child = cur_node.children[key_idx]
+        right_child = cur_node.children[key_idx+1]
+
+        if len(left_child.keys) > self.min_keys:    # case 2.1: replace w predecessor, then delete it from the left subtree
+            predecessor = self.max_pair(left_child)
+            cur_node.keys[key_idx], cur_node.values[key_idx] = predecessor
+            return left_child, predecessor[0]
+
+        elif len(right_child.keys) > self.min_keys:     # case 2.2: replace w successor, then delete it from the right subtree
+            successor = self.min_pair(right_child)
+            cur_node.keys[key_idx], cur_node.values[key_idx] = successor
+            return right_child, successor[0]
+
+        else:   # case 2.3: both children are minimal -> merge them around the key
+            search_key = cur_node.keys[key_idx]
+            return self.merge_children(cur_node, key_idx), search_key
+
+
+    def prepare_child(self, cur_node:BTreeNode, i) -> BTreeNode:
+        child = cur_node.children[i]
+        if len(child.keys) > self.min_keys:
+            return child
+
+        left_sibling = cur_node.children[i-1] if i > 0 else None
+        right_sibling = cur_node.children[i+1] if i < len(cur_node.keys) else None
+
+        if left_sibling is not None and len(left_sibling.keys) > self.min_keys:  # case 3.1: rotate through the parent from the left
+            child.keys.insert(0, cur_node.keys[i-1])
+            child.values.insert(0, cur_node.values[i-1])
+            cur_node.keys[i-1] = left_sibling.keys.pop()
+            cur_node.values[i-1] = left_sibling.values.pop()
+            if left_sibling.children is not None:
+                child.children.insert(0, left_sibling.children.pop())
+            return child
+
+        if right_sibling is not None and len(right_sibling.keys) > self.min_keys:    # case 3.1: rotate through the parent from the right
+            child.keys.append(cur_node.keys[i])
+            child.values.append(cur_node.values[i])
+            cur_node.keys[i] = right_sibling.keys.pop(0)
+            cur_node.values[i] = right_sibling.values.pop(0)
+            if right_sibling.children is not None:
+                child.children.append(right_sibling.children.pop(0))
+            return child
+
+        # case 3.2: siblings are minimal -> merge with one of them
+        if right_sibling is not None:
+            return self.merge_children(cur_node, i)
+        return self.merge_children(cur_node, i-1)
+
+
+    def merge_children(self, cur_node:BTreeNode, key_idx) -> BTreeNode:
+        # merges child key_idx, parent key key_idx and child key_idx+1 into one node
+        left_child = cur_node.children[key_idx]
+        right_child = cur_node.children.pop(key_idx+1)
+        left_child.keys.append(cur_node.keys.pop(key_idx))
+        left_child.values.append(cur_node.values.pop(key_idx))
+        left_child.keys.extend(right_child.keys)
+        left_child.values.extend(right_child.values)
+        if right_child.children is not None:
+            left_child.children.extend(right_child.children)
+        if cur_node is self.root and len(cur_node.keys) == 0:  # root was emptied, the merged node is the new root
+            self.root = left_child
+        return left_child
+
+
+    def max_pair(self, cur_node:BTreeNode) -> tuple:
+        while cur_node.children is not None:
+            cur_node = cur_node.children[-1]
+        return cur_node.pairs(len(cur_node.keys)-1)
+
+
+    def min_pair(self, cur_node:BTreeNode) -> tuple:
+        while cur_node.children is not None:
+            cur_node = cur_node.children[0]
+        return cur_node.pairs(0)
+
+
+    def height(self):
+        height = 0
+        cur_node = self.root
+        while cur_node is not None:
+            height += 1
+            cur_node = cur_node.children[0] if cur_node.children is not None else None
+        return height
+
+
+    def is_valid(self):     # checks key order, node sizes, child counts and that all leaves share one depth
+        if self.root is None:
+            return True
+        leaf_depths = set()
+        stack = [(self.root, None, None, 0)]    # (node, lower bound, upper bound, depth)
+        while stack:
+            node, low, high, depth = stack.pop()
+            keys = node.keys
+            min_keys = 1 if node is self.root else self.min_keys
+            if not min_keys <= len(keys) <= self.max_keys or len(keys) != len(node.values):
+                return False
+            for i in range(len(keys)):
+                if (i > 0 and keys[i-1] >= keys[i]) or (low is not None and keys[i] <= low) or (high is not None and keys[i] >= high):
+                    return False
+            if node.children is None:
+                leaf_depths.add(depth)
+            else:
+                if len(node.children) != len(keys) + 1:
+                    return False
+                bounds = [low] + keys + [high]
+                for i, child in enumerate(node.children):
+                    stack.append((child, bounds[i], bounds[i+1], depth + 1))
+        return len(leaf_depths) == 1
+
+
+    def print_tree(self):
+        if not self.root:
+            print("Tree is empty")
+            return
+
+        level = [self.root]
+        while level:
+            print(" ".join(str(node).strip() for node in level))
+            level = [child for node in level if node.children is not None for child in node.children]
+        print()
+
+
+    def benchmark_insert(self, size, seed=0):
+        rng = random.Random(seed)
+        keys = rng.sample(range(size * 10), size)
+
+        start = time.perf_counter()
+        for k in keys:
+            self.insert(k, k)
+        return time.perf_counter() - start
+
+
+    def benchmark_search(self, size, seed=0):
+        rng = random.Random(seed)
+        keys = rng.sample(range(size * 10), size)
+
+        for k in keys:
+            self.insert(k, k)
+
+        start = time.perf_counter()
+        for k in keys:
+            self.search(k)
+        return time.perf_counter() - start
+
+
+    def benchmark_delete(self, size, seed=0):
+        rng = random.Random(seed)
+        keys = rng.sample(range(size * 10), size)
+
+        for k in keys:
+            self.insert(k, k)
+
+        start = time.perf_counter()
+        for k in keys:
+            self.delete(k)
+        return time.perf_counter() - start
+
+
+    def benchmark_order_sweep(self, sizes, orders=[4,16,64,256], seed=0):
+        # a fresh tree is built for every (order, n) pair. Returns one row per pair, ready to plot time against n per order
+        results = []
+        for order in orders:
+            for size in sizes:
+                insert_time = BTree(order).benchmark_insert(size, seed)
+                tree = BTree(order)
+                search_time = tree.benchmark_search(size, seed)
+                results.append({"order": order, "n": size, "insert_time": insert_time,
+                                "search_time": search_time, "height": tree.height()})
+        return results
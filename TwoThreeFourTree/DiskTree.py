@@ -0,0 +1,458 @@
+# -----------------------------------------------------------------------------
+# Author: Colin McClelland
+# Date: 3/18/25
+# Description: Disk-backed 234 Tree / B-tree. Nodes live in fixed-size pages of one file and are read through an LRU page cache
+# -----------------------------------------------------------------------------
+
+import os
+import time
+import random
+import struct
+import tempfile
+from bisect import bisect_left
+from collections import OrderedDict
+
+NIL = -1    # page number used as a null pointer
+FILE_MAGIC = b"B234"
+FILE_HEADER = struct.Struct("<4sHqqq")  # magic, order, root page, number of pages, head of the free page list
+LEAF, INTERNAL, FREE = 0, 1, 2          # page kinds
+MIN_CACHE_PAGES = 8     # one operation holds a handful of nodes at once, they must not be evicted mid-operation
+
+
+class DiskNode:
+    __slots__ = ("page", "keys", "values", "children")
+
+    def __init__(self, page, keys=None, values=None, children=None):
+        self.page = page                # page number of this node in the file
+        self.keys = keys if keys is not None else []
+        self.values = values if values is not None else []
+        self.children = children        # None for a leaf, otherwise page numbers of the children
+
+
+    def is_leaf(self):
+        return self.children is None
+
+
+    def __repr__(self):
+        return f"page {self.page}: [" + " | ".join(str(key) for key in self.keys) + "]"
+
+
+
+class LRUPageCache:
+    """
+    Bounded cache of decoded nodes in least-recently-used order. Modified nodes are marked dirty and only written back
+    when they are evicted or the cache is flushed.
+    """
+    def __init__(self, load, store, capacity):
+        self.load = load        # page number -> DiskNode, reads from the file
+        self.store = store      # DiskNode -> None, writes to the file
+        self.capacity = max(capacity, MIN_CACHE_PAGES)
+        self.pages = OrderedDict()  # page number -> node, most recently used last
+        self.dirty = set()
+        self.reset_stats()
+
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.writes = 0
+
+
+    def get(self, page) -> DiskNode:
+        node = self.pages.get(page)
+        if node is not None:
+            self.hits += 1
+            self.pages.move_to_end(page)
+            return node
+        self.misses += 1
+        node = self.load(page)
+        self.pages[page] = node
+        self.evict()
+        return node
+
+
+    def mark_dirty(self, node:DiskNode):   # call after changing a node (or creating one), re-caches it if it was evicted
+        self.pages[node.page] = node
+        self.pages.move_to_end(node.page)
+        self.dirty.add(node.page)
+        self.evict()
+
+
+    def discard(self, page):     # page was freed, drop it without writing it back
+        self.pages.pop(page, None)
+        self.dirty.discard(page)
+
+
+    def evict(self):
+        while len(self.pages) > self.capacity:
+            page, node = self.pages.popitem(last=False)
+            self.evictions += 1
+            if page in self.dirty:
+                self.dirty.discard(page)
+                self.store(node)
+                self.writes += 1
+
+
+    def flush(self):
+        for page in sorted(self.dirty):
+            self.store(self.pages[page])
+            self.writes += 1
+        self.dirty.clear()
+
+
+
+class DiskTree:
+    """
+    B-tree of the given order (order 4 is a 2-3-4 tree) stored in a single file. Page 0 holds the file header, every other
+    page holds one node: its kind, key count, keys, values and child page numbers, padded to a fixed page size. Nodes
+    refer to each other by page number and are only reached through the LRU page cache, so the tree can be far larger than
+    the cache. Insert and delete use the same top-down split/rotate/merge algorithms as BTree and TwoThreeFourTree.
+    Freed pages are chained into a free list and reused.
+    Keys and values are signed 64-bit integers. Call flush() or close() to persist changes.
+    """
+    def __init__(self, path, order=4, cache_pages=1024):
+        if order < 4:
+            raise ValueError("Order must be at least 4 for top-down splitting")
+        self.path = path
+        self.order = order
+        self.max_keys = order - 1
+        self.min_keys = (order - 2) // 2
+        self.node_struct = struct.Struct(f"<BH{order-1}q{order-1}q{order}q")   # kind, num keys, keys, values, children
+        self.page_size = max(self.node_struct.size, FILE_HEADER.size)
+
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        self.file = open(path, "r+b" if exists else "w+b")
+        if exists:
+            self.file.seek(0)
+            magic, file_order, self.root_page, self.num_pages, self.free_head = FILE_HEADER.unpack(self.file.read(FILE_HEADER.size))
+            if magic != FILE_MAGIC:
+                raise ValueError("File is not a disk tree")
+            if file_order != order:
+                raise ValueError(f"File was created with order {file_order}")
+        else:
+            self.root_page = NIL
+            self.num_pages = 1  # page 0 is the header
+            self.free_head = NIL
+            self.write_header()
+        self.cache = LRUPageCache(self.read_node, self.write_node, cache_pages)
+
+
+    # ---- pages ---------------------------------------------------------------------------------------------------
+
+    def write_header(self):
+        self.file.seek(0)
+        self.file.write(FILE_HEADER.pack(FILE_MAGIC, self.order, self.root_page, self.num_pages, self.free_head).ljust(self.page_size, b"\0"))
+
+
+    def read_node(self, page) -> DiskNode:
+        self.file.seek(page * self.page_size)
+        fields = self.node_struct.unpack(self.file.read(self.node_struct.size))
+        kind, num_keys = fields[0], fields[1]
+        if kind == FREE:
+            raise ValueError(f"Page {page} is not in use")
+        keys_start = 2
+        values_start = keys_start + self.max_keys
+        children_start = values_start + self.max_keys
+        keys = list(fields[keys_start:keys_start + num_keys])
+        values = list(fields[values_start:values_start + num_keys])
+        children = list(fields[children_start:children_start + num_keys + 1]) if kind == INTERNAL else None
+        return DiskNode(page, keys, values, children)
+
+
+    def write_node(self, node:DiskNode):
+        num_keys = len(node.keys)
+        empty = (0,) * (self.max_keys - num_keys)
+        children = node.children if node.children is not None else []
+        self.file.seek(node.page * self.page_size)
+        self.file.write(self.node_struct.pack(LEAF if node.children is None else INTERNAL, num_keys,
+                                              *node.keys, *empty, *node.values, *empty,
+                                              *children, *((NIL,) * (self.order - len(children)))))
+
+
+    def allocate(self, keys=None, values=None, children=None) -> DiskNode:
+        if self.free_head != NIL:   # reuse a freed page, its first child slot links to the next free page
+            page = self.free_head
+            self.file.seek(page * self.page_size)
+            fields = self.node_struct.unpack(self.file.read(self.node_struct.size))
+            self.free_head = fields[2 + 2 * self.max_keys]
+        else:
+            page = self.num_pages
+            self.num_pages += 1
+        node = DiskNode(page, keys, values, children)
+        self.cache.mark_dirty(node)
+        return node
+
+
+    def free(self, node:DiskNode):
+        self.cache.discard(node.page)
+        self.file.seek(node.page * self.page_size)
+        empty = (0,) * self.max_keys
+        self.file.write(self.node_struct.pack(FREE, 0, *empty, *empty, self.free_head, *((NIL,) * (self.order - 1))))
+        self.free_head = node.page
+
+
+    def flush(self):
+        self.cache.flush()
+        self.write_header()
+        self.file.flush()
+
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+    def cache_stats(self) -> dict:
+        accesses = self.cache.hits + self.cache.misses
+        return {"hits": self.cache.hits, "misses": self.cache.misses, "hit_rate": self.cache.hits / accesses if accesses else 0,
+                "evictions": self.cache.evictions, "writes": self.cache.writes, "cached_pages": len(self.cache.pages)}
+
+
+    # ---- tree operations -------------------------------------------------------------------------------------------
+
+    def search(self, search_key):
+        page = self.root_page
+        while page != NIL:
+            node = self.cache.get(page)
+            i = bisect_left(node.keys, search_key)
+            if i < len(node.keys) and node.keys[i] == search_key:
+                return node.values[i]
+            page = node.children[i] if node.children is not None else NIL
+        return None
+
+
+    def split_child(self, parent:DiskNode, i, child:DiskNode):
+        mid = self.max_keys // 2
+        right = self.allocate(child.keys[mid+1:], child.values[mid+1:], child.children[mid+1:] if child.children is not None else None)
+        parent.keys.insert(i, child.keys[mid])
+        parent.values.insert(i, child.values[mid])
+        parent.children.insert(i+1, right.page)
+        del child.keys[mid:]
+        del child.values[mid:]
+        if child.children is not None:
+            del child.children[mid+1:]
+        self.cache.mark_dirty(child)
+        self.cache.mark_dirty(parent)
+        return right
+
+
+    def insert(self, new_key, new_value):
+        if self.root_page == NIL:   # Case: empty tree
+            self.root_page = self.allocate([new_key], [new_value]).page
+            return
+
+        cur_node = self.cache.get(self.root_page)
+        if len(cur_node.keys) == self.max_keys:     # Case: root is full, the tree grows by one level
+            new_root = self.allocate(children=[cur_node.page])
+            self.split_child(new_root, 0, cur_node)
+            self.root_page = new_root.page
+            cur_node = new_root
+
+        while True:
+            keys = cur_node.keys
+            i = bisect_left(keys, new_key)
+            if i < len(keys) and keys[i] == new_key:
+                cur_node.values[i] = new_value
+                self.cache.mark_dirty(cur_node)
+                return
+            if cur_node.children is None:
+                keys.insert(i, new_key)
+                cur_node.values.insert(i, new_value)
+                self.cache.mark_dirty(cur_node)
+                return
+            child = self.cache.get(cur_node.children[i])
+            if len(child.keys) == self.max_keys:    # split before descending
+                right = self.split_child(cur_node, i, child)
+                if new_key == keys[i]:
+                    cur_node.values[i] = new_value
+                    self.cache.mark_dirty(cur_node)
+                    return
+                if new_key > keys[i]:
+                    child = right
+            cur_node = child
+
+
+    def delete(self, search_key):
+        if self.root_page == NIL:
+            raise ValueError("Tree is empty")
+        cur_node = self.cache.get(self.root_page)
+        while cur_node.children is not None:
+            keys = cur_node.keys
+            key_idx = bisect_left(keys, search_key)
+            if key_idx < len(keys) and keys[key_idx] == search_key: # Case 2, present within current internal node
+                cur_node, search_key = self.delete_internal_key(cur_node, key_idx)
+            else:   # Case 3: make sure the child on the path has spare keys, then descend
+                cur_node = self.prepare_child(cur_node, key_idx)
+
+        key_idx = bisect_left(cur_node.keys, search_key)   # Case 1: leaf
+        if key_idx == len(cur_node.keys) or cur_node.keys[key_idx] != search_key:
+            raise KeyError("Key does not exist within tree")
+        del cur_node.keys[key_idx]
+        del cur_node.values[key_idx]
+        self.cache.mark_dirty(cur_node)
+        if len(cur_node.keys) == 0 and cur_node.page == self.root_page:    # last key of the tree was removed
+            self.free(cur_node)
+            self.root_page = NIL
+
+
+    def delete_internal_key(self, cur_node:DiskNode, key_idx) -> tuple:
+        left_child = self.cache.get(cur_node.children[key_idx])
+        if len(left_child.keys) > self.min_keys:    # case 2.1: replace w predecessor
+            leaf = left_child
+            while leaf.children is not None:
+                leaf = self.cache.get(leaf.children[-1])
+            cur_node.keys[key_idx], cur_node.values[key_idx] = leaf.keys[-1], leaf.values[-1]
+            self.cache.mark_dirty(cur_node)
+            return left_child, leaf.keys[-1]
+
+        right_child = self.cache.get(cur_node.children[key_idx+1])
+        if len(right_child.keys) > self.min_keys:   # case 2.2: replace w successor
+            leaf = right_child
+            while leaf.children is not None:
+                leaf = self.cache.get(leaf.children[0])
+            cur_node.keys[key_idx], cur_node.values[key_idx] = leaf.keys[0], leaf.values[0]
+            self.cache.mark_dirty(cur_node)
+            return right_child, leaf.keys[0]
+
+        search_key = cur_node.keys[key_idx]     # case 2.3: merge both children around the key
+        return self.merge_children(cur_node, key_idx, left_child, right_child), search_key
+
+
+    def prepare_child(self, cur_node:DiskNode, i) -> DiskNode:
+        child = self.cache.get(cur_node.children[i])
+        if len(child.keys) > self.min_keys:
+            return child
+
+        left_sibling = self.cache.get(cur_node.children[i-1]) if i > 0 else None
+        if left_sibling is not None and len(left_sibling.keys) > self.min_keys:  # case 3.1: rotate from the left
+            child.keys.insert(0, cur_node.keys[i-1])
+            child.values.insert(0, cur_node.values[i-1])
+            cur_node.keys[i-1] = left_sibling.keys.pop()
+            cur_node.values[i-1] = left_sibling.values.pop()
+            if left_sibling.children is not None:
+                child.children.insert(0, left_sibling.children.pop())
+            for node in (child, cur_node, left_sibling):
+                self.cache.mark_dirty(node)
+            return child
+
+        right_sibling = self.cache.get(cur_node.children[i+1]) if i < len(cur_node.keys) else None
+        if right_sibling is not None and len(right_sibling.keys) > self.min_keys:    # case 3.1: rotate from the right
+            child.keys.append(cur_node.keys[i])
+            child.values.append(cur_node.values[i])
+            cur_node.keys[i] = right_sibling.keys.pop(0)
+            cur_node.values[i] = right_sibling.values.pop(0)
+            if right_sibling.children is not None:
+                child.children.append(right_sibling.children.pop(0))
+            for node in (child, cur_node, right_sibling):
+                self.cache.mark_dirty(node)
+            return child
+
+        if right_sibling is not None:   # case 3.2: merge with a sibling
+            return self.merge_children(cur_node, i, child, right_sibling)
+        return self.merge_children(cur_node, i-1, left_sibling, child)
+
+
+    def merge_children(self, cur_node:DiskNode, key_idx, left_child:DiskNode, right_child:DiskNode) -> DiskNode:
+        cur_node.children.pop(key_idx+1)
+        left_child.keys.append(cur_node.keys.pop(key_idx))
+        left_child.values.append(cur_node.values.pop(key_idx))
+        left_child.keys.extend(right_child.keys)
+        left_child.values.extend(right_child.values)
+        if right_child.children is not None:
+            left_child.children.extend(right_child.children)
+        self.free(right_child)
+        self.cache.mark_dirty(left_child)
+        if cur_node.page == self.root_page and len(cur_node.keys) == 0:    # root was emptied, the merged node is the new root
+            self.free(cur_node)
+            self.root_page = left_child.page
+        else:
+            self.cache.mark_dirty(cur_node)
+        return left_child
+
+
+    def is_valid(self):     # checks key order, node sizes, child counts and that all leaves share one depth
+        if self.root_page == NIL:
+            return True
+        leaf_depths = set()
+        stack = [(self.root_page, None, None, 0)]
+        while stack:
+            page, low, high, depth = stack.pop()
+            node = self.cache.get(page)
+            keys = node.keys
+            min_keys = 1 if page == self.root_page else self.min_keys
+            if not min_keys <= len(keys) <= self.max_keys:
+                return False
+            for i in range(len(keys)):
+                if (i > 0 and keys[i-1] >= keys[i]) or (low is not None and keys[i] <= low) or (high is not None and keys[i] >= high):
+                    return False
+            if node.children is None:
+                leaf_depths.add(depth)
+            else:
+                if len(node.children) != len(keys) + 1:
+                    return False
+                bounds = [low] + keys + [high]
+                for i, child in enumerate(node.children):
+                    stack.append((child, bounds[i], bounds[i+1], depth + 1))
+        return len(leaf_depths) == 1
+
+
+    # ---- benchmarks ------------------------------------------------------------------------------------------------
+
+    def benchmark_insert(self, size, seed=0):
+        rng = random.Random(seed)
+        keys = rng.sample(range(size * 10), size)
+
+        start = time.perf_counter()
+        for k in keys:
+            self.insert(k, k)
+        self.flush()
+        return time.perf_counter() - start
+
+
+    def benchmark_search(self, size, seed=0):
+        rng = random.Random(seed)
+        keys = rng.sample(range(size * 10), size)
+
+        for k in keys:
+            self.insert(k, k)
+        self.flush()
+
+        start = time.perf_counter()
+        for k in keys:
+            self.search(k)
+        return time.perf_counter() - start
+
+
+    @staticmethod
+    def benchmark_cache_sizes(size, fractions=[0.01,0.05,0.1,0.25,0.5,1.0], num_lookups=100000, order=4, seed=0):
+        # builds one tree file, then reopens it with a cache holding each fraction of its pages and runs random lookups
+        # returns one row per fraction with lookups/sec and the cache hit/miss counters
+        rng = random.Random(seed)
+        keys = rng.sample(range(size * 10), size)
+        lookups = [rng.choice(keys) for _ in range(num_lookups)]
+
+        fd, path = tempfile.mkstemp(suffix=".b234")
+        os.close(fd)
+        os.remove(path)
+        try:
+            tree = DiskTree(path, order=order, cache_pages=size)
+            for k in keys:
+                tree.insert(k, k)
+            num_pages = tree.num_pages - 1
+            tree.close()
+
+            results = []
+            for fraction in fractions:
+                tree = DiskTree(path, order=order, cache_pages=max(1, int(num_pages * fraction)))
+                start = time.perf_counter()
+                for k in lookups:
+                    tree.search(k)
+                elapsed = time.perf_counter() - start
+                stats = tree.cache_stats()
+                tree.close()
+                results.append({"cache_fraction": fraction, "cache_pages": tree.cache.capacity, "lookups_per_sec": num_lookups / elapsed,
+                                "hits": stats["hits"], "misses": stats["misses"], "hit_rate": stats["hit_rate"]})
+        finally:
+            os.remove(path)
+        return results
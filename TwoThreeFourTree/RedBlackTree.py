@@ -0,0 +1,384 @@
+# -----------------------------------------------------------------------------
+# Author: Colin McClelland
+# Date: 3/18/25
+# Description: Red-black tree, the binary representation of a 234 Tree (based on Introduction to Algorithms by Cormen et al.)
+# -----------------------------------------------------------------------------
+
+import time
+import random
+from Tree import TreeNode, TwoThreeFourTree
+
+RED = True
+BLACK = False
+
+
+class RBNode:
+    __slots__ = ("key", "value", "color", "left", "right", "parent")
+
+    def __init__(self, key, value, color, nil=None):
+        self.key = key
+        self.value = value
+        self.color = color
+        self.left = nil     # every missing child/parent points to the tree's shared black NIL sentinel
+        self.right = nil
+        self.parent = nil
+
+
+    def __repr__(self):
+        return f"({self.key}, {'red' if self.color == RED else 'black'})"
+
+
+
+class RedBlackTree:
+    """
+    Red-black tree with the same interface as TwoThreeFourTree.
+    Each black node together with its red children is one 2-3-4 node: a black node with no red children is a 2-node,
+    with one red child a 3-node and with two red children a 4-node. Splitting a 4-node becomes a color flip and the
+    2-3-4 restructuring becomes at most a couple of rotations, so no lists are allocated or shuffled.
+    from_234() and to_234() convert between the two representations along that mapping.
+    Inserting a key that is already present replaces its value.
+    """
+    def __init__(self):
+        self.nil = RBNode(None, None, BLACK)   # sentinel leaf, simplifies the delete fixup
+        self.nil.left = self.nil.right = self.nil.parent = self.nil
+        self.root = self.nil
+
+
+    def search(self, search_key):
+        cur_node = self.find_node(search_key)
+        return cur_node.value if cur_node is not self.nil else None
+
+
+    def find_node(self, search_key) -> RBNode:
+        cur_node = self.root
+        while cur_node is not self.nil:
+            if search_key < cur_node.key:
+                cur_node = cur_node.left
+            elif search_key > cur_node.key:
+                cur_node = cur_node.right
+            else:
+                return cur_node
+        return self.nil
+
+
+    def rotate_left(self, x:RBNode):
+        y = x.right
+        x.right = y.left
+        if y.left is not self.nil:
+            y.left.parent = x
+        y.parent = x.parent
+        if x.parent is self.nil:
+            self.root = y
+        elif x is x.parent.left:
+            x.parent.left = y
+        else:
+            x.parent.right = y
+        y.left = x
+        x.parent = y
+
+
+    def rotate_right(self, x:RBNode):
+        y = x.left
+        x.left = y.right
+        if y.right is not self.nil:
+            y.right.parent = x
+        y.parent = x.parent
+        if x.parent is self.nil:
+            self.root = y
+        elif x is x.parent.right:
+            x.parent.right = y
+        else:
+            x.parent.left = y
+        y.right = x
+        x.parent = y
+
+
+    def insert(self, new_key, new_value):
+        parent = self.nil
+        cur_node = self.root
+        while cur_node is not self.nil:
+            parent = cur_node
+            if new_key < cur_node.key:
+                cur_node = cur_node.left
+            elif new_key > cur_node.key:
+                cur_node = cur_node.right
+            else:
+                cur_node.value = new_value
+                return
+
+        new_node = RBNode(new_key, new_value, RED, self.nil)
+        new_node.parent = parent
+        if parent is self.nil:
+            self.root = new_node
+        elif new_key < parent.key:
+            parent.left = new_node
+        else:
+            parent.right = new_node
+        self.insert_fixup(new_node)
+
+
+    def insert_fixup(self, z:RBNode):
+        while z.parent.color == RED:
+            grandparent = z.parent.parent
+            if z.parent is grandparent.left:
+                uncle = grandparent.right
+                if uncle.color == RED:  # 4-node: split it with a color flip and push the middle key up
+                    z.parent.color = BLACK
+                    uncle.color = BLACK
+                    grandparent.color = RED
+                    z = grandparent
+                else:   # 3-node becomes a 4-node: rotate so the middle key is the black one
+                    if z is z.parent.right:
+                        z = z.parent
+                        self.rotate_left(z)
+                    z.parent.color = BLACK
+                    grandparent.color = RED
+                    self.rotate_right(grandparent)
+            else:   # mirror image
+                uncle = grandparent.left
+                if uncle.color == RED:
+                    z.parent.color = BLACK
+                    uncle.color = BLACK
+                    grandparent.color = RED
+                    z = grandparent
+                else:
+                    if z is z.parent.left:
+                        z = z.parent
+                        self.rotate_right(z)
+                    z.parent.color = BLACK
+                    grandparent.color = RED
+                    self.rotate_left(grandparent)
+        self.root.color = BLACK
+
+
+    def transplant(self, u:RBNode, v:RBNode):  # replaces the subtree rooted at u with the one rooted at v
+        if u.parent is self.nil:
+            self.root = v
+        elif u is u.parent.left:
+            u.parent.left = v
+        else:
+            u.parent.right = v
+        v.parent = u.parent
+
+
+    def delete(self, search_key):
+        if self.root is self.nil:
+            raise ValueError("Tree is empty")
+        z = self.find_node(search_key)
+        if z is self.nil:
+            raise KeyError("Key does not exist within tree")
+
+        y = z
+        y_original_color = y.color
+        if z.left is self.nil:
+            x = z.right
+            self.transplant(z, z.right)
+        elif z.right is self.nil:
+            x = z.left
+            self.transplant(z, z.left)
+        else:   # two children: successor y takes z's place
+            y = z.right
+            while y.left is not self.nil:
+                y = y.left
+            y_original_color = y.color
+            x = y.right
+            if y.parent is z:
+                x.parent = y
+            else:
+                self.transplant(y, y.right)
+                y.right = z.right
+                y.right.parent = y
+            self.transplant(z, y)
+            y.left = z.left
+            y.left.parent = y
+            y.color = z.color
+        if y_original_color == BLACK:
+            self.delete_fixup(x)
+        self.nil.parent = self.nil  # the sentinel's parent may have been borrowed by the fixup
+
+
+    def delete_fixup(self, x:RBNode):
+        while x is not self.root and x.color == BLACK:
+            if x is x.parent.left:
+                sibling = x.parent.right
+                if sibling.color == RED:
+                    sibling.color = BLACK
+                    x.parent.color = RED
+                    self.rotate_left(x.parent)
+                    sibling = x.parent.right
+                if sibling.left.color == BLACK and sibling.right.color == BLACK:    # merge with the sibling
+                    sibling.color = RED
+                    x = x.parent
+                else:   # borrow a key from the sibling
+                    if sibling.right.color == BLACK:
+                        sibling.left.color = BLACK
+                        sibling.color = RED
+                        self.rotate_right(sibling)
+                        sibling = x.parent.right
+                    sibling.color = x.parent.color
+                    x.parent.color = BLACK
+                    sibling.right.color = BLACK
+                    self.rotate_left(x.parent)
+                    x = self.root
+            else:   # mirror image
+                sibling = x.parent.left
+                if sibling.color == RED:
+                    sibling.color = BLACK
+                    x.parent.color = RED
+                    self.rotate_right(x.parent)
+                    sibling = x.parent.left
+                if sibling.right.color == BLACK and sibling.left.color == BLACK:
+                    sibling.color = RED
+                    x = x.parent
+                else:
+                    if sibling.left.color == BLACK:
+                        sibling.right.color = BLACK
+                        sibling.color = RED
+                        self.rotate_left(sibling)
+                        sibling = x.parent.left
+                    sibling.color = x.parent.color
+                    x.parent.color = BLACK
+                    sibling.left.color = BLACK
+                    self.rotate_right(x.parent)
+                    x = self.root
+        x.color = BLACK
+
+
+    def items(self):    # in-order (key, value) pairs
+        stack = []
+        cur_node = self.root
+        while stack or cur_node is not self.nil:
+            while cur_node is not self.nil:
+                stack.append(cur_node)
+                cur_node = cur_node.left
+            cur_node = stack.pop()
+            yield cur_node.key, cur_node.value
+            cur_node = cur_node.right
+
+
+    def is_valid(self):     # BST order, black root, no red node with a red child and the same black height on every path
+        if self.root.color != BLACK or self.root.parent is not self.nil:
+            return False
+        black_heights = set()
+        stack = [(self.root, None, None, 0)]    # (node, lower bound, upper bound, black nodes above)
+        while stack:
+            node, low, high, blacks = stack.pop()
+            if node is self.nil:
+                black_heights.add(blacks)
+                continue
+            if (low is not None and node.key <= low) or (high is not None and node.key >= high):
+                return False
+            if node.color == RED and (node.left.color == RED or node.right.color == RED):
+                return False
+            for child in (node.left, node.right):
+                if child is not self.nil and child.parent is not node:
+                    return False
+            blacks += 1 if node.color == BLACK else 0
+            stack.append((node.left, low, node.key, blacks))
+            stack.append((node.right, node.key, high, blacks))
+        return len(black_heights) == 1
+
+
+    @classmethod
+    def from_234(cls, tree:TwoThreeFourTree) -> 'RedBlackTree':
+        # every 2-3-4 node becomes a black node holding its middle key, with its other keys as red children
+        rb_tree = cls()
+        if tree.root is not None:
+            rb_tree.root = rb_tree.convert_234_node(tree.root)
+            rb_tree.root.parent = rb_tree.nil
+        return rb_tree
+
+
+    def convert_234_node(self, node:TreeNode) -> RBNode:
+        children = [self.convert_234_node(child) for child in node.children] if not node.is_leaf() else [self.nil] * (node.num_keys() + 1)
+        if node.num_keys() == 1:
+            return self.link(RBNode(node.key(0), node.val(0), BLACK, self.nil), children[0], children[1])
+        if node.num_keys() == 2:    # 3-node: black right key with the left key as a red left child
+            left = self.link(RBNode(node.key(0), node.val(0), RED, self.nil), children[0], children[1])
+            return self.link(RBNode(node.key(1), node.val(1), BLACK, self.nil), left, children[2])
+        left = self.link(RBNode(node.key(0), node.val(0), RED, self.nil), children[0], children[1])     # 4-node
+        right = self.link(RBNode(node.key(2), node.val(2), RED, self.nil), children[2], children[3])
+        return self.link(RBNode(node.key(1), node.val(1), BLACK, self.nil), left, right)
+
+
+    def link(self, parent:RBNode, left:RBNode, right:RBNode) -> RBNode:
+        parent.left = left
+        parent.right = right
+        if left is not self.nil: left.parent = parent
+        if right is not self.nil: right.parent = parent
+        return parent
+
+
+    def to_234(self) -> TwoThreeFourTree:
+        # every black node absorbs its red children into one 2-3-4 node
+        tree = TwoThreeFourTree()
+        if self.root is not self.nil:
+            tree.root = self.convert_rb_node(self.root)
+        return tree
+
+
+    def convert_rb_node(self, node:RBNode) -> TreeNode:
+        tree_node = TreeNode()
+        subtrees = []
+        for part in (node.left, None, node.right):
+            if part is None:    # the black node's own key
+                tree_node.keys.append(node.key)
+                tree_node.values.append(node.value)
+            elif part.color == RED:     # red child is another key of the same 2-3-4 node
+                tree_node.keys.append(part.key)
+                tree_node.values.append(part.value)
+                subtrees.extend([part.left, part.right])
+            else:
+                subtrees.append(part)
+        if not all(subtree is self.nil for subtree in subtrees):
+            tree_node.children = [self.convert_rb_node(subtree) for subtree in subtrees]
+        return tree_node
+
+
+    def benchmark_insert(self, size, seed=0):
+        rng = random.Random(seed)
+        keys = rng.sample(range(size * 10), size)
+
+        start = time.perf_counter()
+        for k in keys:
+            self.insert(k, k)
+        return time.perf_counter() - start
+
+
+    def benchmark_search(self, size, seed=0):
+        rng = random.Random(seed)
+        keys = rng.sample(range(size * 10), size)
+
+        for k in keys:
+            self.insert(k, k)
+
+        start = time.perf_counter()
+        for k in keys:
+            self.search(k)
+        return time.perf_counter() - start
+
+
+    def benchmark_delete(self, size, seed=0):
+        rng = random.Random(seed)
+        keys = rng.sample(range(size * 10), size)
+
+        for k in keys:
+            self.insert(k, k)
+
+        start = time.perf_counter()
+        for k in keys:
+            self.delete(k)
+        return time.perf_counter() - start
+
+
+    def benchmark_compare(self, sizes, seed=0):
+        # side by side with TwoThreeFourTree on the same keys, fresh trees for every n. Returns one row per n
+        results = []
+        for size in sizes:
+            row = {"n": size}
+            for name, tree_class in (("rb", RedBlackTree), ("234", TwoThreeFourTree)):
+                row[f"{name}_insert_time"] = tree_class().benchmark_insert(size, seed)
+                row[f"{name}_search_time"] = tree_class().benchmark_search(size, seed)
+                row[f"{name}_delete_time"] = tree_class().benchmark_delete(size, seed)
+            results.append(row)
+        return results
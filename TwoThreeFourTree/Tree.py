@@ -6,27 +6,35 @@
 
 import time
 import random
+import tracemalloc
+import copy
+from bisect import bisect_left, bisect_right
 
 
 class TreeNode:
+    __slots__ = ("keys", "values", "children")  # no per-node __dict__
+
     # Class level global vars, used for readability in the context of a 4-node
     LEFT = 0
     MIDDLE = 1
     RIGHT = 2
 
     def __init__(self, key=None, value=None):
-        if key is None: self.kv_pairs = [] 
-        else: 
-            self.kv_pairs = [(key, value)]  # k-v pairs maintained as a list of tuples (key, value)
+        if key is None:
+            self.keys = []
+            self.values = []
+        else:
+            self.keys = [key]       # keys and values are parallel lists: values[i] belongs to keys[i]
+            self.values = [value]
         self.children = None # a list of treenodes if it has children
     
 
     def num_keys(self):
-        return len(self.kv_pairs)
+        return len(self.keys)
 
 
     def is_full(self):  # if node has 3 keys (and 4 children) it is full - ie it is a 4 node
-        return self.num_keys() == 3
+        return len(self.keys) == 3
     
 
     def is_leaf(self):
@@ -34,11 +42,11 @@ class TreeNode:
     
 
     def key(self,i) -> int:    # returns i-th key of a given tree node
-        return self.kv_pairs[i][0]
+        return self.keys[i]
     
 
     def val(self,i):    # returns i-th value of a given tree node
-        return self.kv_pairs[i][1]
+        return self.values[i]
     
     
     def child(self,i) -> 'TreeNode':    # returns i-th child of a given tree node
@@ -48,16 +56,32 @@ class TreeNode:
     
 
     def pairs(self, i) -> tuple:
-        return self.kv_pairs[i]
+        return (self.keys[i], self.values[i])
+
+
+    def set_pair(self, i, kv_tuple):    # overwrites the i-th key-value pair
+        self.keys[i], self.values[i] = kv_tuple
+
+
+    def remove_at(self, i):     # removes the i-th key-value pair
+        del self.keys[i]
+        del self.values[i]
+
+
+    def copy(self) -> 'TreeNode':     # shallow copy: new key/value/children lists, children themselves are shared
+        node = TreeNode()
+        node.keys = self.keys[:]
+        node.values = self.values[:]
+        if self.children is not None:
+            node.children = self.children[:]
+        return node
 
 
     def split(self) -> tuple:    # splits a 4 node into two 2-nodes and reassigns children of the oroginal node as necessary
         if not self.is_full(): raise ValueError("Node must be full to split")
-        left = self.pairs(self.LEFT)
-        right = self.pairs(self.RIGHT)
         # Create new 2-nodes
-        new_left_node = TreeNode(left[0], left[1])
-        new_right_node = TreeNode(right[0], right[1])
+        new_left_node = TreeNode(self.keys[self.LEFT], self.values[self.LEFT])
+        new_right_node = TreeNode(self.keys[self.RIGHT], self.values[self.RIGHT])
         # Reassign children nodes
         if not self.is_leaf():  # node is an internal node with 4 children that need to be reassigned
             new_left_node.children = self.children[0:2]
@@ -66,45 +90,37 @@ class TreeNode:
 
 
     def insert(self, kv_tuple): # inserts a key-value pair at the correct position
-        i = 0
-        while i < self.num_keys() and kv_tuple[0] > self.kv_pairs[i][0]:
-            i += 1
-        self.kv_pairs.insert(i, kv_tuple)
+        i = bisect_left(self.keys, kv_tuple[0])
+        self.keys.insert(i, kv_tuple[0])
+        self.values.insert(i, kv_tuple[1])
 
     
     def insert_child(self, child_node:'TreeNode'):  # inserts a child node at the correct position
         if self.children is None:
             self.children = [child_node]
         else:
-            child_key = child_node.key(0)  
+            child_key = child_node.keys[0]
             i = 0
-            while i < len(self.children) and child_key > self.children[i].key(0):
+            while i < len(self.children) and child_key > self.children[i].keys[0]:
                 i += 1
             self.children.insert(i, child_node)
 
 
-    def contains(self, key):
-        for i in range(self.num_keys()):
-            if self.kv_pairs[i][0] == key:  # kv pairs stored as tuple
-                return i
+    def contains(self, key):    # returns the index of key, None if not present
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return i
         return None
     
 
     def remove(self, key):
-        for i in range(len(self.kv_pairs)):
-            if self.key(i) == key:
-                del self.kv_pairs[i]
-                break        
+        i = self.contains(key)
+        if i is not None:
+            self.remove_at(i)
 
 
     def __repr__(self):
-        node_string = "["
-        for i in range(len(self.kv_pairs)):
-            node_string += str(self.key(i))
-            if i != len(self.kv_pairs)-1:
-                node_string += " | "
-        node_string += "]\n"
-        return node_string
+        return "[" + " | ".join(str(key) for key in self.keys) + "]\n"
 
         
 
@@ -117,19 +133,78 @@ class TwoThreeFourTree:
         self.root = None    # root initialized to NULL
 
 
+    @classmethod
+    def from_sorted(cls, pairs):
+        # builds a tree from (key, value) pairs sorted by key in O(n), bottom-up instead of one insert per key
+        # leaves are packed as full as possible (2-3 keys each, as evenly as possible), and every key between two leaves
+        # becomes a separator. Each internal level groups the nodes below it 2-4 at a time, in the same way
+        pairs = list(pairs)
+        for i in range(1, len(pairs)):
+            if not pairs[i-1][0] < pairs[i][0]:
+                raise ValueError("Pairs must be sorted by strictly increasing key")
+        tree = cls()
+        if not pairs:
+            return tree
+
+        num_nodes = -(-(len(pairs) + 1) // 4)  # ceil((n+1)/4): n = keys in leaves + (num_nodes-1) separators, at most 3 keys per leaf
+        base, extra = divmod(len(pairs) - (num_nodes - 1), num_nodes)
+        nodes = []
+        separators = []     # separators[i] goes between nodes[i] and nodes[i+1]
+        pos = 0
+        for i in range(num_nodes):
+            size = base + (1 if i < extra else 0)
+            leaf = TreeNode()
+            leaf.keys = [pair[0] for pair in pairs[pos:pos+size]]
+            leaf.values = [pair[1] for pair in pairs[pos:pos+size]]
+            nodes.append(leaf)
+            pos += size
+            if i < num_nodes - 1:
+                separators.append(pairs[pos])
+                pos += 1
+
+        while len(nodes) > 1:   # build one internal level per iteration
+            num_parents = -(-len(nodes) // 4)   # at most 4 children per parent, never fewer than 2
+            base, extra = divmod(len(nodes), num_parents)
+            parents = []
+            parent_separators = []
+            pos = 0
+            for i in range(num_parents):
+                size = base + (1 if i < extra else 0)
+                parent = TreeNode()
+                parent.children = nodes[pos:pos+size]
+                parent.keys = [pair[0] for pair in separators[pos:pos+size-1]]    # separators between this parent's children
+                parent.values = [pair[1] for pair in separators[pos:pos+size-1]]
+                parents.append(parent)
+                pos += size
+                if i < num_parents - 1:
+                    parent_separators.append(separators[pos-1])    # separator between two parents moves up a level
+            nodes = parents
+            separators = parent_separators
+
+        tree.root = nodes[0]
+        return tree
+
+
     def search(self, search_key):
-        if self.root:
-            return self.search_recursive(search_key, self.root)
+        return self.search_iterative(search_key)
+
+    def search_iterative(self, search_key):
+        cur_node = self.root
+        while cur_node is not None:
+            keys = cur_node.keys
+            i = bisect_left(keys, search_key)    # first key >= search_key
+            if i < len(keys) and keys[i] == search_key:
+                return cur_node.values[i]
+            cur_node = cur_node.children[i] if cur_node.children is not None else None   # None once we fall off a leaf
         return None
 
     def search_recursive(self, search_key, cur_node: TreeNode):
-        for i in range(cur_node.num_keys()):
-            if search_key < cur_node.key(i):
-                return self.search_recursive(search_key, cur_node.child(i))
-            elif search_key == cur_node.key(i):
-                return cur_node.val(i)
-
-        return self.search_recursive(search_key, cur_node.child(cur_node.num_keys()))
+        if cur_node is None:    # fell off a leaf, key is not in the tree
+            return None
+        i = bisect_left(cur_node.keys, search_key)    # first key >= search_key
+        if i < len(cur_node.keys) and cur_node.keys[i] == search_key:
+            return cur_node.values[i]
+        return self.search_recursive(search_key, cur_node.child(i))
 
 
 
@@ -138,135 +213,287 @@ class TwoThreeFourTree:
             self.root = TreeNode(new_key, new_value)    # a list consiting of one tuple
             return
         
-        # ISSUE: ROOT gets split incorrectly
         if self.root.is_full():   # Case: root is full, ie it has 3 elements and potentially children
             new_root = TreeNode(self.root.key(self.MIDDLE), self.root.val(self.MIDDLE)) # new root is middle pair
-            left, right = self.root.split()   # split root into two 2-nodes and assign root's children to these new nodes (2 children each)
+            new_root.children = list(self.root.split())   # split root into two 2-nodes and assign root's children to these new nodes (2 children each)
             self.root = new_root
-            self.root.children = [left, right]
 
         cur:TreeNode = self.root
         prev:TreeNode = None
-        while cur is not None:    # traverse down the tree until we reach a leaf node
-            if cur.is_full():
-                prev.insert(cur.kv_pairs[self.MIDDLE])  # push middle value to prev node, which we know is not full
+        child_idx = 0   # position of cur within prev.children, recorded on the way down
+        while True:    # traverse down the tree until we reach a leaf node
+            if cur.is_full():   # prev is never full here, it was split on the previous step if needed
+                middle_key = cur.keys[self.MIDDLE]
+                prev.keys.insert(child_idx, middle_key)  # push middle value to prev node at the position of cur
+                prev.values.insert(child_idx, cur.values[self.MIDDLE])
                 left, right = cur.split()   # split 4 node into two 2-nodes
-                prev.children.remove(cur)   # remove the old node from the parent node
-                prev.insert_child(left)     # set the new 2-nodes as children of the parent node
-                prev.insert_child(right)
-                cur = prev  # have to start search from the previous node
-            i = 0
-            while i < cur.num_keys():
-                if new_key < cur.key(i):
-                    break
-                i += 1
+                prev.children[child_idx:child_idx+1] = [left, right]   # replace cur with the new 2-nodes in one step
+                cur = right if new_key >= middle_key else left     # keep descending, no need to rescan prev
+            i = bisect_right(cur.keys, new_key)   # first key > new_key
+            if cur.children is None:    # reached a leaf, which we know is not full
+                cur.keys.insert(i, new_key)
+                cur.values.insert(i, new_value)
+                return
             prev = cur          # set prev pointer to the current node
-            cur = cur.child(i)  # traverse to appropriate child node
-        prev.insert((new_key, new_value)) # descend until cur is None, so we must insert at prev
-
+            child_idx = i
+            cur = cur.children[i]  # traverse to appropriate child node
+
+
+
+    def insert_many(self, sorted_pairs):
+        # inserts (key, value) pairs given in non-decreasing key order. Keeps the root-to-leaf path of the previous key as
+        # a stack of (node, upper bound of its subtree) frames, and only climbs back up as far as the next key requires
+        # instead of descending from the root every time. Same proactive splitting as insert(): a node is split when the
+        # descent enters it while full, so the parent we resume from must not be full itself
+        sorted_pairs = list(sorted_pairs)
+        for i in range(1, len(sorted_pairs)):   # checked up front so that unsorted input leaves the tree untouched
+            if sorted_pairs[i][0] < sorted_pairs[i-1][0]:
+                raise ValueError("Pairs must be sorted by key")
+
+        path = []
+        for new_key, new_value in sorted_pairs:
+            if not self.root:   # Case: empty tree
+                self.root = TreeNode(new_key, new_value)
+                continue
+
+            while path and path[-1][1] is not None and new_key >= path[-1][1]:    # key is right of this subtree
+                path.pop()
+            while path and path[-1][0].is_full():   # a full node has to be re-entered from its parent to be split
+                path.pop()
+            if not path:    # back at the root
+                if self.root.is_full():
+                    new_root = TreeNode(self.root.key(self.MIDDLE), self.root.val(self.MIDDLE))
+                    new_root.children = list(self.root.split())
+                    self.root = new_root
+                path.append((self.root, None))
+
+            cur, upper = path[-1]
+            while cur.children is not None:
+                i = bisect_right(cur.keys, new_key)
+                child = cur.children[i]
+                child_upper = cur.keys[i] if i < len(cur.keys) else upper
+                if child.is_full():     # cur is not full, so it can take the middle key
+                    middle_key = child.keys[self.MIDDLE]
+                    cur.keys.insert(i, middle_key)
+                    cur.values.insert(i, child.values[self.MIDDLE])
+                    left, right = child.split()
+                    cur.children[i:i+1] = [left, right]
+                    if new_key >= middle_key:
+                        child = right
+                    else:
+                        child = left
+                        child_upper = middle_key
+                path.append((child, child_upper))
+                cur, upper = child, child_upper
+
+            i = bisect_right(cur.keys, new_key)
+            cur.keys.insert(i, new_key)
+            cur.values.insert(i, new_value)
 
 
     def delete(self, search_key):
-        if self.root is not None: self.delete_recursive(search_key, self.root)
+        if self.root is not None: self.delete_iterative(search_key)
         else: raise ValueError("Tree is empty")
 
 
+    def delete_iterative(self, search_key):     # same cases as delete_recursive, one loop iteration per level
+        cur_node = self.root
+        while not cur_node.is_leaf():
+            key_idx = cur_node.contains(search_key)
+            if key_idx is not None: # Case 2, present within current internal node
+                cur_node, search_key = self.delete_internal_key(cur_node, key_idx)
+            else:   # Case 3: make sure the child on the path has 2+ keys, then descend
+                cur_node = self.prepare_child(cur_node, bisect_left(cur_node.keys, search_key))
+        self.delete_from_leaf(search_key, cur_node)
+
+
     def delete_recursive(self, search_key, cur_node:TreeNode):
         if cur_node.is_leaf():
-            if cur_node.contains(search_key) is not None: cur_node.remove(search_key)   # Case 1 -- contains() returns index if key not present, None otherwise
-            else: raise KeyError("Key does not exist within tree")
+            self.delete_from_leaf(search_key, cur_node)
 
         else:   # cur node is an internal node
-            key_idx = cur_node.contains(search_key) 
+            key_idx = cur_node.contains(search_key)
             if key_idx is not None: # Case 2, present within current internal node
-                left_child = cur_node.child(key_idx)
-                right_child = cur_node.child(key_idx+1)
-
-                if left_child.num_keys() >= 2:   # case 2.1: replace w predecessor then recursively delete predecessor from child
-                    predecessor = left_child.pairs(left_child.num_keys()-1)  # predecessor is the last key in the left child
-                    cur_node.kv_pairs[key_idx] = predecessor
-                    self.delete_recursive(predecessor[0], left_child)   # predecessor is a tuple
-                
-                elif right_child.num_keys() >= 2:    # case 2.2
-                    successor = right_child.pairs(0)
-                    cur_node.kv_pairs[key_idx] = successor
-                    self.delete_recursive(successor[0], right_child)
-                
-                else:   # case 2.3: both L,R children have 1 key -> merge case
-                    left_child.insert(right_child.kv_pairs[0])  # we know the right child has only 1 key
-                    left_child.insert(cur_node.kv_pairs[key_idx]) # insert the key into the merged node (will be at the middle position)
-                    cur_node.kv_pairs.remove(cur_node.pairs(key_idx))
-                    if right_child.children is not None:
-                        for child in right_child.children:  # have to reassign children of right child to left child
-                            left_child.insert_child(child)
-                    cur_node.children.remove(right_child)
-                    del right_child # have to remove the parents reference to the child
-                    if self.root.num_keys() == 0:
-                        self.root = left_child
-                    self.delete_recursive(search_key, left_child)
-                    
-
+                next_node, next_key = self.delete_internal_key(cur_node, key_idx)
+                self.delete_recursive(next_key, next_node)
             else:   # Case 3: we must first find the appropriate child, then proceed
-                i = 0   # i is the path to the node to delete
-                while i < cur_node.num_keys() and search_key > cur_node.key(i): 
-                    i += 1
-                parent_idx = i-1 if i == cur_node.num_keys() else i # in the case that the search key is > than largest key in the parent, we must search the rightmost child but parent key (potentially used in restructuring) is one spot to the left. If not, then child_idx == parent_idx
-                # at this point, we have identified the appropriate path to the search key
-                if cur_node.child(i).num_keys() == 1:   # restructuring of the tree is required to ensure safe delete
-                    left_sibling = None if i == 0 else cur_node.child(i-1) # the left-most child cant have a left sibling
-                    right_sibling = None if i == cur_node.num_keys() else cur_node.child(i+1) # nor can the right most have a right sibling
-
-                    if left_sibling is not None and left_sibling.num_keys() >= 2:    # case 3.1: left sibling of appropriate child has 2+ keys
-                        cur_node.child(i).insert(cur_node.pairs(parent_idx))  # push the key from the parent to the child
-                        cur_node.kv_pairs.remove(cur_node.pairs(parent_idx)) # remove the key from the parent
-                        left_sibling_key = left_sibling.pairs(left_sibling.num_keys()-1)
-                        cur_node.insert(left_sibling_key)   # move the right most key in the left child to the parent
-                        left_sibling.kv_pairs.remove(left_sibling_key) # remove that key from the left sibling
-                    
-                    elif right_sibling is not None and right_sibling.num_keys() >= 2:   # case 3.1: right sibling has 2+ keys
-                        cur_node.child(i).insert(cur_node.pairs(parent_idx))
-                        cur_node.kv_pairs.remove(cur_node.pairs(parent_idx))
-                        right_sibling_key = right_sibling.pairs(0)
-                        cur_node.insert(right_sibling_key)
-                        right_sibling.kv_pairs.remove(right_sibling_key)
-
-                    else:   # case 3.2: both siblings have only 1 key -> merge case
-                        # maybe need to check if L and R sibling are None
-                        # need to check that appropriate child is not the rightmost becasue it wont have a right sibling
-                        if right_sibling is None: # if right sibling is None, then the appropriate child is the rightmost node and therfore does not have a righmost sibling
-                            right_sibling = cur_node.child(i)
-                            i -= 1  # have to continue the search from the merged node, which is the left sibling
-                        elif left_sibling is None: 
-                            left_sibling = cur_node.child(i) # similiar logic as the above
-                            # i += 1
-                        # ISSUE: LEFT SIBLING IS NONE
-
-                        left_sibling.insert(right_sibling.pairs(0))    # merge right sibling into the left sibling - we know right sibling only has 1 key.
-                        left_sibling.insert(cur_node.pairs(parent_idx)) # add a key from the parent into the merged node
-                        cur_node.kv_pairs.remove(cur_node.pairs(parent_idx))    # remove the pushed key from the parent
-                        cur_node.children.remove(right_sibling) # remove the parents reference to the right child
-                        if right_sibling.children is not None:  # if the right sibling (the node that was merged in) has children, we must assign its children to the left sibling
-                            for child in right_sibling.children:
-                                left_sibling.insert_child(child)
-                        del right_sibling # free the right sibling
-                        if self.root.num_keys() == 0:  # check if root was "deleted" if so make left child the root
-                            self.root = left_sibling
-                self.delete_recursive(search_key, cur_node.child(i))    # continue the search from the appropriate child
-                
+                child = self.prepare_child(cur_node, bisect_left(cur_node.keys, search_key))
+                self.delete_recursive(search_key, child)    # continue the search from the appropriate child
+
+
+    def delete_from_leaf(self, search_key, leaf:TreeNode):     # Case 1
+        key_idx = leaf.contains(search_key)    # contains() returns index if key present, None otherwise
+        if key_idx is None: raise KeyError("Key does not exist within tree")
+        leaf.remove_at(key_idx)
+        if self.root.num_keys() == 0:   # last key of the tree was removed
+            self.root = None
+
+
+    def delete_internal_key(self, cur_node:TreeNode, key_idx) -> tuple:
+        # Case 2: the key sits in an internal node. Returns (node, key) to continue deleting from
+        left_child = cur_node.child(key_idx)
+        right_child = cur_node.child(key_idx+1)
+
+        if left_child.num_keys() >= 2:   # case 2.1: replace w predecessor then delete predecessor from left subtree
+            predecessor = self.max_pair(left_child)   # predecessor is the last key in the rightmost leaf of the left subtree
+            cur_node.set_pair(key_idx, predecessor)
+            return left_child, predecessor[0]
+
+        elif right_child.num_keys() >= 2:    # case 2.2: replace w successor then delete successor from right subtree
+            successor = self.min_pair(right_child)
+            cur_node.set_pair(key_idx, successor)
+            return right_child, successor[0]
+
+        else:   # case 2.3: both L,R children have 1 key -> merge case, the key moves down into the merged node
+            search_key = cur_node.key(key_idx)
+            return self.merge_children(cur_node, key_idx), search_key
+
+
+    def prepare_child(self, cur_node:TreeNode, i) -> TreeNode:
+        # Case 3: child i is on the path to the key. If it only has 1 key, give it a 2nd one so a delete below
+        # it cannot leave it empty. Returns the node to continue from
+        child = cur_node.child(i)
+        if child.num_keys() >= 2:
+            return child
+
+        left_sibling = None if i == 0 else cur_node.child(i-1) # the left-most child cant have a left sibling
+        right_sibling = None if i == cur_node.num_keys() else cur_node.child(i+1) # nor can the right most have a right sibling
+
+        if left_sibling is not None and left_sibling.num_keys() >= 2:    # case 3.1: rotate a key from the left sibling through the parent
+            child.insert(cur_node.pairs(i-1))   # push the separating key from the parent to the child
+            last = left_sibling.num_keys()-1
+            cur_node.set_pair(i-1, left_sibling.pairs(last)) # move the right most key in the left sibling to the parent
+            left_sibling.remove_at(last)
+            if not left_sibling.is_leaf():  # the sibling's rightmost subtree moves with its key
+                child.children.insert(0, left_sibling.children.pop())
+            return child
+
+        if right_sibling is not None and right_sibling.num_keys() >= 2:   # case 3.1: rotate a key from the right sibling through the parent
+            child.insert(cur_node.pairs(i))
+            cur_node.set_pair(i, right_sibling.pairs(0))
+            right_sibling.remove_at(0)
+            if not right_sibling.is_leaf():
+                child.children.append(right_sibling.children.pop(0))
+            return child
+
+        # case 3.2: both siblings have only 1 key -> merge with a sibling around the separating parent key
+        if right_sibling is not None:
+            return self.merge_children(cur_node, i)
+        return self.merge_children(cur_node, i-1)   # appropriate child is the rightmost, merge it into its left sibling
+
+
+    def merge_children(self, cur_node:TreeNode, key_idx) -> TreeNode:
+        # merges child key_idx, the parent key key_idx and child key_idx+1 (both children have 1 key) into one 4-node
+        left_child = cur_node.child(key_idx)
+        right_child = cur_node.children.pop(key_idx+1)  # remove the parents reference to the right child
+        left_child.insert(cur_node.pairs(key_idx))  # parent key lands in the middle position
+        left_child.insert(right_child.pairs(0))
+        cur_node.remove_at(key_idx)
+        if right_child.children is not None:    # right child's children are appended after the left child's
+            left_child.children.extend(right_child.children)
+        if cur_node is self.root and cur_node.num_keys() == 0:  # root was "deleted", the merged node is the new root
+            self.root = left_child
+        return left_child
+
+
+    def max_pair(self, cur_node:TreeNode) -> tuple:    # largest key-value pair in the subtree rooted at cur_node
+        while not cur_node.is_leaf():
+            cur_node = cur_node.children[-1]
+        return cur_node.pairs(cur_node.num_keys()-1)
+
+
+    def min_pair(self, cur_node:TreeNode) -> tuple:    # smallest key-value pair in the subtree rooted at cur_node
+        while not cur_node.is_leaf():
+            cur_node = cur_node.children[0]
+        return cur_node.pairs(0)
 
-    def sorted_keys(self):
-        if self.root:
-            return self.sorted_keys_recursive(self.root, '')
-        return ''
 
-    def sorted_keys_recursive(self, cur_node: TreeNode, sorted_keys_string: str) -> str:
-        for i in range(0, cur_node.num_keys()):
-            if not cur_node.is_leaf():
-                sorted_keys_string = self.sorted_keys_recursive(cur_node.child(i), sorted_keys_string)
-            sorted_keys_string += str(cur_node.key(i)) + ' '
-        if not cur_node.is_leaf():
-            sorted_keys_string = self.sorted_keys_recursive(cur_node.child(cur_node.num_keys()), sorted_keys_string)
-        return sorted_keys_string
+    def sorted_keys(self):
+        return "".join(f"{key} " for key, value in self.items())
+
+
+    def items(self, lo=None, hi=None):
+        # yields (key, value) pairs in key order with lo <= key <= hi (either bound can be None)
+        # walks the tree with an explicit stack of (node, index of the next key to yield) frames. Subtrees left of lo are
+        # skipped on the way down, and the walk stops at the first key past hi. The tree must not change while iterating
+        stack = []
+        cur_node = self.root
+        while cur_node is not None:     # descend to the first key >= lo, remembering the path
+            i = 0 if lo is None else bisect_left(cur_node.keys, lo)
+            stack.append((cur_node, i))
+            cur_node = cur_node.children[i] if cur_node.children is not None else None
+
+        while stack:
+            cur_node, i = stack.pop()
+            if i == len(cur_node.keys):     # node is finished, resume its parent
+                continue
+            key = cur_node.keys[i]
+            if hi is not None and key > hi:
+                return
+            yield key, cur_node.values[i]
+            stack.append((cur_node, i+1))
+            child = cur_node.children[i+1] if cur_node.children is not None else None
+            while child is not None:    # next key is the leftmost key of the subtree right of key i
+                stack.append((child, 0))
+                child = child.children[0] if child.children is not None else None
+
+
+    def min(self):  # smallest (key, value) pair, None if the tree is empty
+        return self.min_pair(self.root) if self.root is not None else None
+
+
+    def max(self):  # largest (key, value) pair, None if the tree is empty
+        return self.max_pair(self.root) if self.root is not None else None
+
+
+    def floor(self, search_key):    # (key, value) pair with the largest key <= search_key, None if there is none
+        best = None
+        cur_node = self.root
+        while cur_node is not None:
+            i = bisect_right(cur_node.keys, search_key)   # keys[:i] are <= search_key
+            if i > 0:
+                best = cur_node.pairs(i-1)
+                if best[0] == search_key:
+                    return best
+            cur_node = cur_node.children[i] if cur_node.children is not None else None
+        return best
+
+
+    def ceiling(self, search_key):  # (key, value) pair with the smallest key >= search_key, None if there is none
+        best = None
+        cur_node = self.root
+        while cur_node is not None:
+            i = bisect_left(cur_node.keys, search_key)    # keys[i:] are >= search_key
+            if i < len(cur_node.keys):
+                best = cur_node.pairs(i)
+                if best[0] == search_key:
+                    return best
+            cur_node = cur_node.children[i] if cur_node.children is not None else None
+        return best
+
+
+    def is_valid(self):     # checks key order, 1-3 keys per node, k+1 children per internal node and that all leaves share one depth
+        if self.root is None:
+            return True
+        leaf_depths = set()
+        stack = [(self.root, None, None, 0)]    # (node, lower bound, upper bound, depth)
+        while stack:
+            node, low, high, depth = stack.pop()
+            keys = node.keys
+            if not 1 <= len(keys) <= 3:
+                return False
+            for i in range(len(keys)):
+                if (i > 0 and keys[i-1] > keys[i]) or (low is not None and keys[i] < low) or (high is not None and keys[i] > high):
+                    return False
+            if node.is_leaf():
+                leaf_depths.add(depth)
+            else:
+                if len(node.children) != len(keys) + 1:
+                    return False
+                bounds = [low] + keys + [high]
+                for i, child in enumerate(node.children):
+                    stack.append((child, bounds[i], bounds[i+1], depth + 1))
+        return len(leaf_depths) == 1
 
 
     def print_tree(self):
@@ -284,7 +511,7 @@ class TwoThreeFourTree:
                 current_level = level
             
             node_str = "["
-            for key,val in node.kv_pairs:
+            for key in node.keys:
                 node_str += str(key) + " | " 
             node_str = node_str[:-3] + "]"  # removes " | ", adds closing bracket
             print(node_str, end=" ") 
@@ -315,4 +542,220 @@ class TwoThreeFourTree:
         start = time.perf_counter()
         for k in keys:
             self.search(k)  
-        return time.perf_counter() - start
\ No newline at end of file
+        return time.perf_counter() - start
+
+
+    def benchmark_delete(self, size, seed=0):
+        rng = random.Random(seed)
+        keys = rng.sample(range(size * 10), size)
+
+        for k in keys:
+            self.insert(k, k)
+
+        start = time.perf_counter()
+        for k in keys:
+            self.delete(k)
+        return time.perf_counter() - start
+
+
+    def benchmark_range(self, size, selectivities=[0.0001,0.001,0.01,0.1,1.0], num_queries=100, seed=0):
+        # range scans whose width covers the given fraction of the key space. Returns one row per selectivity
+        rng = random.Random(seed)
+        key_space = size * 10
+        keys = rng.sample(range(key_space), size)
+
+        for k in keys:
+            self.insert(k, k)
+
+        results = []
+        for selectivity in selectivities:
+            width = int(key_space * selectivity)
+            bounds = []
+            for _ in range(num_queries):
+                lo = rng.randrange(max(1, key_space - width))
+                bounds.append((lo, lo + width))
+
+            num_results = 0
+            start = time.perf_counter()
+            for lo, hi in bounds:
+                for pair in self.items(lo, hi):
+                    num_results += 1
+            elapsed = time.perf_counter() - start
+            results.append({"selectivity": selectivity, "avg_time": elapsed / num_queries,
+                            "avg_results": num_results / num_queries})
+        return results
+
+
+    def benchmark_from_sorted(self, size, seed=0):    # same keys as benchmark_insert, loaded from a sorted dump with from_sorted()
+        rng = random.Random(seed)
+        keys = rng.sample(range(size * 10), size)
+        pairs = [(k, k) for k in sorted(keys)]
+
+        start = time.perf_counter()
+        self.root = type(self).from_sorted(pairs).root
+        return time.perf_counter() - start
+
+
+    def benchmark_insert_order(self, size, order="random", seed=0):   # insert-only workload with ascending, descending or random keys
+        if order == "ascending":
+            keys = range(size)
+        elif order == "descending":
+            keys = range(size - 1, -1, -1)
+        elif order == "random":
+            keys = random.Random(seed).sample(range(size * 10), size)
+        else:
+            raise ValueError("Order must be ascending, descending, or random")
+
+        start = time.perf_counter()
+        for k in keys:
+            self.insert(k, k)
+        return time.perf_counter() - start
+
+
+    def benchmark_insert_many(self, size, batch_sizes=[1000,10000,100000,1000000], seed=0):
+        # applies a sorted batch to a tree that already holds size keys, with insert_many() and with a loop over insert()
+        # fresh trees for every measurement. Returns one row per batch size
+        results = []
+        for batch_size in batch_sizes:
+            rng = random.Random(seed)
+            base_keys = [2 * k for k in rng.sample(range(size * 10), size)]    # even keys already in the tree
+            batch = sorted(2 * k + 1 for k in rng.sample(range(batch_size * 10), batch_size))   # odd keys to apply
+            pairs = [(k, k) for k in batch]
+
+            times = {}
+            for method in ("insert_many", "insert"):
+                tree = type(self)()
+                for k in base_keys:
+                    tree.insert(k, k)
+                start = time.perf_counter()
+                if method == "insert_many":
+                    tree.insert_many(pairs)
+                else:
+                    for k, v in pairs:
+                        tree.insert(k, v)
+                times[method] = time.perf_counter() - start
+            results.append({"batch_size": batch_size, "insert_many_time": times["insert_many"], "insert_loop_time": times["insert"]})
+        return results
+
+
+
+class PersistentTwoThreeFourTree(TwoThreeFourTree):
+    """
+    Copy-on-write 2-3-4 tree. insert and delete never modify a node that is reachable from an older root: every node
+    they touch on the way down is copied first (path copying), and the new root is returned. Untouched subtrees are
+    shared between versions, so snapshot() is O(1) and each write allocates O(log n) nodes.
+    All read methods (search, items, min, max, floor, ceiling, is_valid, ...) are inherited unchanged.
+    """
+    def snapshot(self) -> 'PersistentTwoThreeFourTree':  # point-in-time, read-only view of the current version
+        view = PersistentTwoThreeFourTree()
+        view.root = self.root
+        return view
+
+
+    def insert(self, new_key, new_value) -> TreeNode:
+        if not self.root:
+            self.root = TreeNode(new_key, new_value)
+            return self.root
+
+        if self.root.is_full():     # split() builds new nodes and leaves the old root untouched
+            root = TreeNode(self.root.key(self.MIDDLE), self.root.val(self.MIDDLE))
+            root.children = list(self.root.split())
+        else:
+            root = self.root.copy()
+
+        cur = root  # every node assigned to cur is a private copy
+        while cur.children is not None:
+            i = bisect_right(cur.keys, new_key)
+            child = cur.children[i]
+            if child.is_full():
+                middle_key = child.keys[self.MIDDLE]
+                cur.keys.insert(i, middle_key)
+                cur.values.insert(i, child.values[self.MIDDLE])
+                left, right = child.split()
+                cur.children[i:i+1] = [left, right]
+                child = right if new_key >= middle_key else left
+            else:
+                child = child.copy()
+                cur.children[i] = child
+            cur = child
+
+        i = bisect_right(cur.keys, new_key)
+        cur.keys.insert(i, new_key)
+        cur.values.insert(i, new_value)
+        self.root = root
+        return root
+
+
+    def insert_many(self, sorted_pairs) -> TreeNode:    # the path-reusing version would modify shared nodes
+        for new_key, new_value in sorted_pairs:
+            self.insert(new_key, new_value)
+        return self.root
+
+
+    def delete(self, search_key) -> TreeNode:
+        # same cases as TwoThreeFourTree.delete_iterative, but each node a case is about to modify is copied into its parent first
+        if self.root is None:
+            raise ValueError("Tree is empty")
+        old_root = self.root
+        self.root = cur_node = self.root.copy()
+        try:
+            while not cur_node.is_leaf():
+                key_idx = cur_node.contains(search_key)
+                if key_idx is not None:     # Case 2
+                    if cur_node.child(key_idx).num_keys() >= 2 or cur_node.child(key_idx+1).num_keys() < 2:
+                        self.copy_children(cur_node, key_idx)    # 2.1 descends into / 2.3 merges into the left child
+                    else:
+                        self.copy_children(cur_node, key_idx+1)  # 2.2 descends into the right child
+                    cur_node, search_key = self.delete_internal_key(cur_node, key_idx)
+                else:   # Case 3
+                    i = bisect_left(cur_node.keys, search_key)
+                    if cur_node.child(i).num_keys() >= 2:
+                        self.copy_children(cur_node, i)
+                    else:   # a rotation or merge will also modify a sibling
+                        self.copy_children(cur_node, i-1, i, i+1)
+                    cur_node = self.prepare_child(cur_node, i)
+            self.delete_from_leaf(search_key, cur_node)
+        except KeyError:
+            self.root = old_root    # key missing, keep the previous version
+            raise
+        return self.root
+
+
+    def delete_iterative(self, search_key) -> TreeNode:     # the inherited versions modify nodes shared with older roots
+        return self.delete(search_key)
+
+
+    def delete_recursive(self, search_key, cur_node:TreeNode=None) -> TreeNode:    # always starts at the current root
+        return self.delete(search_key)
+
+
+    def copy_children(self, cur_node:TreeNode, *indices):
+        for i in indices:
+            if 0 <= i < len(cur_node.children):
+                cur_node.children[i] = cur_node.children[i].copy()
+
+
+    def benchmark_snapshot_memory(self, size, num_writes=1000, seed=0):
+        # keeps a snapshot after every write and reports the memory each one costs, next to the cost of one deep copy
+        rng = random.Random(seed)
+        keys = rng.sample(range(size * 10), size + num_writes)
+        for k in keys[:size]:
+            self.insert(k, k)
+
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        full_copy = copy.deepcopy(self.root)
+        full_copy_bytes = tracemalloc.get_traced_memory()[0] - before
+        del full_copy
+
+        snapshots = []
+        before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        for k in keys[size:]:
+            self.insert(k, k)
+            snapshots.append(self.snapshot())
+        elapsed = time.perf_counter() - start
+        snapshot_bytes = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        return {"size": size, "num_writes": num_writes, "bytes_per_snapshot": snapshot_bytes / num_writes,
+                "full_copy_bytes": full_copy_bytes, "write_time": elapsed}
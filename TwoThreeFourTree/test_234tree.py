@@ -1,5 +1,6 @@
 import pytest
-from Tree import TreeNode, TwoThreeFourTree
+import random
+from Tree import TreeNode, TwoThreeFourTree, PersistentTwoThreeFourTree
 
 def test_empty_tree():
     tree = TwoThreeFourTree()
@@ -162,31 +163,31 @@ def test_insert_sequence():
 def test_delete():
     # build the tree from the leaves up
     leaf_a = TreeNode()
-    leaf_a.kv_pairs.append(('A','A'))
-    leaf_a.kv_pairs.append(('B','B'))
+    leaf_a.insert(('A','A'))
+    leaf_a.insert(('B','B'))
 
     leaf_b = TreeNode()
-    leaf_b.kv_pairs.append(('E','E'))
-    leaf_b.kv_pairs.append(('F','F'))
+    leaf_b.insert(('E','E'))
+    leaf_b.insert(('F','F'))
 
     leaf_c = TreeNode()
-    leaf_c.kv_pairs.append(('N','N'))
+    leaf_c.insert(('N','N'))
 
     leaf_d = TreeNode()
-    leaf_d.kv_pairs.append(('R','R'))
-    leaf_d.kv_pairs.append(('S','S'))
+    leaf_d.insert(('R','R'))
+    leaf_d.insert(('S','S'))
 
     leaf_e = TreeNode()
-    leaf_e.kv_pairs.append(('X','X'))
-    leaf_e.kv_pairs.append(('Y','Y'))
-    leaf_e.kv_pairs.append(('Z','Z'))
+    leaf_e.insert(('X','X'))
+    leaf_e.insert(('Y','Y'))
+    leaf_e.insert(('Z','Z'))
 
     internal_a = TreeNode()
-    internal_a.kv_pairs.append(('C','C'))
-    internal_a.kv_pairs.append(('H','H'))
+    internal_a.insert(('C','C'))
+    internal_a.insert(('H','H'))
 
     internal_b = TreeNode()
-    internal_b.kv_pairs.append(('V','V'))
+    internal_b.insert(('V','V'))
 
     internal_a.children = [leaf_a, leaf_b, leaf_c]
     internal_b.children = [leaf_d, leaf_e]
@@ -258,3 +259,269 @@ def test_delete():
 
     # assert True == False
 
+
+
+def build_random_tree(num_keys, seed):
+    rng = random.Random(seed)
+    keys = rng.sample(range(num_keys * 10), num_keys)
+    tree = TwoThreeFourTree()
+    for k in keys:
+        tree.insert(k, k)
+    return tree, keys
+
+
+def test_search_missing_key():
+    tree, keys = build_random_tree(100, 0)
+    assert tree.search(-1) == None
+    assert TwoThreeFourTree().search(1) == None
+
+
+def test_iterative_search_matches_recursive():
+    tree, keys = build_random_tree(500, 1)
+    for k in keys + [-5, 10**9]:
+        assert tree.search_iterative(k) == tree.search_recursive(k, tree.root)
+
+
+def test_delete_all_random():
+    for seed in range(20):
+        tree, keys = build_random_tree(200, seed)
+        random.Random(seed).shuffle(keys)
+        for i, k in enumerate(keys):
+            tree.delete(k)
+            assert tree.is_valid()
+            assert tree.search(k) == None
+        assert tree.root == None
+
+
+def test_iterative_delete_matches_recursive():
+    for seed in range(10):
+        iterative, keys = build_random_tree(300, seed)
+        recursive, _ = build_random_tree(300, seed)
+        random.Random(seed + 100).shuffle(keys)
+        for k in keys[:250]:
+            iterative.delete_iterative(k)
+            recursive.delete_recursive(k, recursive.root)
+            assert iterative.sorted_keys() == recursive.sorted_keys()
+            assert repr_tree(iterative.root) == repr_tree(recursive.root)
+
+
+def repr_tree(node):    # nested tuples of keys, used to compare tree shapes
+    if node.is_leaf():
+        return tuple(node.keys)
+    return (tuple(node.keys), tuple(repr_tree(child) for child in node.children))
+
+
+def test_delete_missing_key():
+    tree, keys = build_random_tree(50, 3)
+    with pytest.raises(KeyError):
+        tree.delete(-1)
+    assert tree.is_valid()
+    with pytest.raises(ValueError):
+        TwoThreeFourTree().delete(1)
+
+
+def test_items_in_order():
+    tree, keys = build_random_tree(500, 4)
+    assert [key for key, value in tree.items()] == sorted(keys)
+    assert all(key == value for key, value in tree.items())
+    assert list(TwoThreeFourTree().items()) == []
+
+
+def test_items_range():
+    tree, keys = build_random_tree(500, 5)
+    keys.sort()
+    for lo, hi in [(0, 100), (keys[10], keys[20]), (keys[-1], None), (None, keys[0]), (300, 200), (10**9, None)]:
+        expected = [k for k in keys if (lo is None or k >= lo) and (hi is None or k <= hi)]
+        assert [key for key, value in tree.items(lo, hi)] == expected
+
+
+def test_sorted_keys():
+    tree = TwoThreeFourTree()
+    for k in [5, 1, 3]:
+        tree.insert(k, k)
+    assert tree.sorted_keys() == "1 3 5 "
+
+
+def test_min_max_floor_ceiling():
+    assert TwoThreeFourTree().min() == None
+    assert TwoThreeFourTree().floor(3) == None
+    tree = TwoThreeFourTree()
+    for k in range(0, 100, 10):
+        tree.insert(k, str(k))
+    assert tree.min() == (0, '0')
+    assert tree.max() == (90, '90')
+    assert tree.floor(35) == (30, '30')
+    assert tree.floor(30) == (30, '30')
+    assert tree.floor(-1) == None
+    assert tree.ceiling(35) == (40, '40')
+    assert tree.ceiling(40) == (40, '40')
+    assert tree.ceiling(91) == None
+
+
+def test_floor_ceiling_random():
+    tree, keys = build_random_tree(300, 6)
+    keys.sort()
+    for probe in range(-5, 3005, 7):
+        below = [k for k in keys if k <= probe]
+        above = [k for k in keys if k >= probe]
+        assert tree.floor(probe) == ((below[-1], below[-1]) if below else None)
+        assert tree.ceiling(probe) == ((above[0], above[0]) if above else None)
+
+
+def leaf_depths(node, depth=0):
+    if node.is_leaf():
+        return {depth}
+    depths = set()
+    for child in node.children:
+        depths |= leaf_depths(child, depth + 1)
+    return depths
+
+
+def test_from_sorted_small():
+    assert TwoThreeFourTree.from_sorted([]).root == None
+    tree = TwoThreeFourTree.from_sorted([(1, 'a'), (2, 'b')])
+    assert tree.root.keys == [1, 2] and tree.root.is_leaf()
+    for n in range(1, 40):
+        tree = TwoThreeFourTree.from_sorted((k, k) for k in range(n))
+        assert tree.is_valid()
+        assert [key for key, value in tree.items()] == list(range(n))
+
+
+def test_from_sorted_structure():
+    tree = TwoThreeFourTree.from_sorted((k, str(k)) for k in range(10000))
+    assert tree.is_valid()
+    assert len(leaf_depths(tree.root)) == 1   # all leaves on one level
+    for k in range(0, 10000, 7):
+        assert tree.search(k) == str(k)
+    stack = [tree.root]
+    while stack:
+        node = stack.pop()
+        if node.is_leaf():
+            assert 2 <= node.num_keys() <= 3
+        else:
+            stack.extend(node.children)
+
+
+def test_from_sorted_then_update():
+    tree = TwoThreeFourTree.from_sorted((k, k) for k in range(0, 2000, 2))
+    for k in range(1, 2000, 2):
+        tree.insert(k, k)
+    assert tree.is_valid()
+    for k in range(0, 2000, 3):
+        tree.delete(k)
+        assert tree.is_valid()
+    assert [key for key, value in tree.items()] == [k for k in range(2000) if k % 3 != 0]
+
+
+def test_from_sorted_rejects_unsorted():
+    with pytest.raises(ValueError):
+        TwoThreeFourTree.from_sorted([(2, 2), (1, 1)])
+
+
+def test_insert_many_empty_tree():
+    tree = TwoThreeFourTree()
+    tree.insert_many((k, str(k)) for k in range(1000))
+    assert tree.is_valid()
+    assert list(tree.items()) == [(k, str(k)) for k in range(1000)]
+
+
+def test_insert_many_into_existing_tree():
+    for seed in range(5):
+        tree, keys = build_random_tree(500, seed)
+        rng = random.Random(seed)
+        batch = sorted(rng.sample(range(-1000, 6000), 700))
+        batch = [k for k in batch if k not in set(keys)]
+        tree.insert_many((k, k) for k in batch)
+        assert tree.is_valid()
+        assert [key for key, value in tree.items()] == sorted(keys + batch)
+        for k in batch:
+            assert tree.search(k) == k
+
+
+def test_insert_many_then_delete():
+    tree, keys = build_random_tree(300, 9)
+    tree.insert_many((k, k) for k in range(-300, 0))
+    for k in range(-300, 0, 2):
+        tree.delete(k)
+    assert tree.is_valid()
+    assert tree.search(-299) == -299 and tree.search(-300) == None
+
+
+def test_insert_many_rejects_unsorted():
+    tree = TwoThreeFourTree()
+    with pytest.raises(ValueError):
+        tree.insert_many([(2, 2), (1, 1)])
+
+
+def test_insert_many_unsorted_leaves_tree_unchanged():
+    tree = TwoThreeFourTree()
+    for k in range(100):
+        tree.insert(k, k)
+    with pytest.raises(ValueError):
+        tree.insert_many([(101, 1), (103, 1), (5, 1)])
+    assert [key for key, value in tree.items()] == list(range(100))
+    assert tree.is_valid()
+
+
+def test_persistent_snapshots_never_change():
+    rng = random.Random(11)
+    tree = PersistentTwoThreeFourTree()
+    expected = {}
+    snapshots = []
+    for _ in range(1500):
+        key = rng.randrange(300)
+        if key in expected and rng.random() < 0.4:
+            tree.delete(key)
+            del expected[key]
+        elif key not in expected:
+            tree.insert(key, -key)
+            expected[key] = -key
+        assert tree.is_valid()
+        snapshots.append((tree.snapshot(), sorted(expected.items())))
+    for snapshot, items in snapshots:
+        assert list(snapshot.items()) == items
+        assert snapshot.is_valid()
+
+
+def test_persistent_shares_untouched_subtrees():
+    tree = PersistentTwoThreeFourTree()
+    for k in range(1000):
+        tree.insert(k, k)
+    old_root = tree.root
+    new_root = tree.insert(10**6, 0)
+    assert new_root is tree.root and new_root is not old_root
+    assert old_root.children[0] is new_root.children[0]    # the leftmost subtree was not on the path
+    assert tree.search(10**6) == 0 and tree.snapshot().search(5) == 5
+
+
+def test_persistent_delete_variants_keep_snapshots():
+    tree = PersistentTwoThreeFourTree()
+    for k in range(50):
+        tree.insert(k, k)
+    snapshot = tree.snapshot()
+    tree.delete_iterative(10)
+    tree.delete_recursive(20, tree.root)
+    assert [key for key, value in snapshot.items()] == list(range(50))
+    assert [key for key, value in tree.items()] == [k for k in range(50) if k not in (10, 20)]
+    assert snapshot.is_valid() and tree.is_valid()
+
+
+def test_persistent_delete_missing_keeps_version():
+    tree = PersistentTwoThreeFourTree()
+    for k in range(100):
+        tree.insert(k, k)
+    root = tree.root
+    with pytest.raises(KeyError):
+        tree.delete(1000)
+    assert tree.root is root
+
+
+def test_persistent_delete_all():
+    tree = PersistentTwoThreeFourTree()
+    for k in range(300):
+        tree.insert(k, k)
+    full = tree.snapshot()
+    for k in range(300):
+        tree.delete(k)
+    assert tree.root == None
+    assert [key for key, value in full.items()] == list(range(300))
@@ -0,0 +1,98 @@
+import pytest
+import random
+from BTree import BTree
+
+
+def test_empty_tree():
+    tree = BTree(order=16)
+    assert tree.root == None
+    assert tree.search(1) == None
+    assert tree.is_valid()
+    with pytest.raises(ValueError):
+        tree.delete(1)
+
+
+def test_order_too_small():
+    with pytest.raises(ValueError):
+        BTree(order=3)
+
+
+def test_root_split():
+    tree = BTree(order=4)
+    for k in [5, 7, 9]:
+        tree.insert(k, k)
+    assert tree.root.keys == [5, 7, 9]
+    tree.insert(1, 1)
+    assert tree.root.keys == [7]
+    assert [child.keys for child in tree.root.children] == [[1, 5], [9]]
+    assert tree.is_valid()
+
+
+def test_insert_replaces_value():
+    tree = BTree(order=8)
+    for k in range(100):
+        tree.insert(k, k)
+    tree.insert(50, 'fifty')
+    assert tree.search(50) == 'fifty'
+    assert tree.is_valid()
+
+
+@pytest.mark.parametrize("order", [4, 5, 16, 64])
+def test_insert_and_search(order):
+    rng = random.Random(order)
+    keys = rng.sample(range(50000), 3000)
+    tree = BTree(order)
+    for k in keys:
+        tree.insert(k, -k)
+    assert tree.is_valid()
+    for k in keys:
+        assert tree.search(k) == -k
+    assert tree.search(-1) == None
+
+
+@pytest.mark.parametrize("order", [4, 5, 7, 16])
+def test_random_workload(order):
+    rng = random.Random(order)
+    tree = BTree(order)
+    expected = {}
+    for _ in range(4000):
+        key = rng.randrange(500)
+        if rng.random() < 0.6:
+            tree.insert(key, -key)
+            expected[key] = -key
+        elif key in expected:
+            tree.delete(key)
+            del expected[key]
+        elif expected:
+            with pytest.raises(KeyError):
+                tree.delete(key)
+        assert tree.is_valid()
+    for key in range(500):
+        assert tree.search(key) == expected.get(key)
+
+
+def test_delete_all():
+    tree = BTree(order=6)
+    keys = list(range(1000))
+    for k in keys:
+        tree.insert(k, k)
+    random.Random(0).shuffle(keys)
+    for k in keys:
+        tree.delete(k)
+        assert tree.is_valid()
+    assert tree.root == None
+
+
+def test_higher_order_is_shallower():
+    heights = []
+    for order in [4, 16, 64]:
+        tree = BTree(order)
+        for k in range(5000):
+            tree.insert(k, k)
+        heights.append(tree.height())
+    assert heights[0] > heights[1] > heights[2]
+
+
+def test_benchmark_order_sweep():
+    results = BTree().benchmark_order_sweep([100, 200], orders=[4, 16])
+    assert [(row["order"], row["n"]) for row in results] == [(4, 100), (4, 200), (16, 100), (16, 200)]
@@ -0,0 +1,105 @@
+import pytest
+import random
+from DiskTree import DiskTree
+
+
+
+def build_random_tree(path, size, cache_pages, seed=0, order=4):
+    rng = random.Random(seed)
+    keys = rng.sample(range(size * 10), size)
+    tree = DiskTree(path, order=order, cache_pages=cache_pages)
+    for k in keys:
+        tree.insert(k, k * 2)
+    return tree, keys
+
+
+def test_insert_search(tmp_path):
+    tree, keys = build_random_tree(tmp_path / "tree.b234", 500, cache_pages=8)
+    assert tree.is_valid()
+    for k in keys:
+        assert tree.search(k) == k * 2
+    assert tree.search(-1) == None
+
+
+def test_insert_replaces_value(tmp_path):
+    tree = DiskTree(tmp_path / "tree.b234")
+    for i in range(20):
+        tree.insert(i, i)
+    tree.insert(7, 70)
+    assert tree.search(7) == 70
+    assert tree.is_valid()
+
+
+def test_reopen(tmp_path):
+    path = tmp_path / "tree.b234"
+    tree, keys = build_random_tree(path, 300, cache_pages=16)
+    tree.close()
+    tree = DiskTree(path, cache_pages=16)
+    assert tree.is_valid()
+    for k in keys:
+        assert tree.search(k) == k * 2
+
+
+def test_reopen_wrong_order(tmp_path):
+    path = tmp_path / "tree.b234"
+    DiskTree(path, order=4).close()
+    with pytest.raises(ValueError):
+        DiskTree(path, order=8)
+
+
+@pytest.mark.parametrize("order", [4, 5, 16])
+def test_random_insert_delete_small_cache(tmp_path, order):
+    rng = random.Random(order)
+    tree = DiskTree(tmp_path / "tree.b234", order=order, cache_pages=8)
+    expected = {}
+    for _ in range(3000):
+        k = rng.randrange(400)
+        if rng.random() < 0.6:
+            tree.insert(k, k + 1)
+            expected[k] = k + 1
+        elif k in expected:
+            tree.delete(k)
+            del expected[k]
+        elif expected:
+            with pytest.raises(KeyError):
+                tree.delete(k)
+    assert tree.is_valid()
+    tree.close()
+
+    tree = DiskTree(tmp_path / "tree.b234", order=order, cache_pages=8)
+    assert tree.is_valid()
+    for k in range(400):
+        assert tree.search(k) == expected.get(k)
+
+
+def test_delete_all_reuses_pages(tmp_path):
+    tree, keys = build_random_tree(tmp_path / "tree.b234", 200, cache_pages=8)
+    num_pages = tree.num_pages
+    for k in keys:
+        tree.delete(k)
+    assert tree.root_page == -1
+    with pytest.raises(ValueError):
+        tree.delete(1)
+    for k in keys:
+        tree.insert(k, k)
+    assert tree.num_pages == num_pages  # freed pages were handed out again
+    assert tree.is_valid()
+
+
+def test_cache_counters(tmp_path):
+    tree, keys = build_random_tree(tmp_path / "tree.b234", 1000, cache_pages=8)
+    tree.flush()
+    tree.cache.reset_stats()
+    for k in keys:
+        tree.search(k)
+    stats = tree.cache_stats()
+    assert stats["misses"] > 0
+    assert stats["hits"] + stats["misses"] > len(keys)
+    assert stats["cached_pages"] <= 8
+
+
+def test_benchmark_cache_sizes():
+    results = DiskTree.benchmark_cache_sizes(500, fractions=[0.01, 1.0], num_lookups=2000)
+    assert [row["cache_fraction"] for row in results] == [0.01, 1.0]
+    assert results[0]["hit_rate"] < results[1]["hit_rate"]
+    assert all(row["lookups_per_sec"] > 0 for row in results)
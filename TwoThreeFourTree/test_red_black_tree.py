@@ -0,0 +1,118 @@
+import pytest
+import random
+from RedBlackTree import RedBlackTree, BLACK
+from Tree import TwoThreeFourTree
+
+
+def shape_234(node):    # nested tuples of keys, used to compare 2-3-4 tree shapes
+    if node.is_leaf():
+        return tuple(node.keys)
+    return (tuple(node.keys), tuple(shape_234(child) for child in node.children))
+
+
+def test_empty_tree():
+    tree = RedBlackTree()
+    assert tree.search(1) == None
+    assert tree.is_valid()
+    with pytest.raises(ValueError):
+        tree.delete(1)
+
+
+def test_insert_ascending():
+    tree = RedBlackTree()
+    for k in range(1000):
+        tree.insert(k, k)
+        assert tree.is_valid()
+    assert tree.root.color == BLACK
+    assert [key for key, value in tree.items()] == list(range(1000))
+
+
+def test_insert_replaces_value():
+    tree = RedBlackTree()
+    tree.insert(1, 'a')
+    tree.insert(1, 'b')
+    assert tree.search(1) == 'b'
+    assert len(list(tree.items())) == 1
+
+
+def test_random_workload():
+    rng = random.Random(1)
+    tree = RedBlackTree()
+    expected = {}
+    for _ in range(5000):
+        key = rng.randrange(400)
+        if rng.random() < 0.55:
+            tree.insert(key, -key)
+            expected[key] = -key
+        elif key in expected:
+            tree.delete(key)
+            del expected[key]
+        assert tree.is_valid()
+    for key in range(400):
+        assert tree.search(key) == expected.get(key)
+
+
+def test_delete_missing_key():
+    tree = RedBlackTree()
+    tree.insert(1, 1)
+    with pytest.raises(KeyError):
+        tree.delete(2)
+
+
+def test_delete_all():
+    tree = RedBlackTree()
+    keys = list(range(500))
+    for k in keys:
+        tree.insert(k, k)
+    random.Random(2).shuffle(keys)
+    for k in keys:
+        tree.delete(k)
+        assert tree.is_valid()
+    assert tree.root is tree.nil
+
+
+def test_from_234():
+    rng = random.Random(3)
+    tree = TwoThreeFourTree()
+    keys = rng.sample(range(10000), 1000)
+    for k in keys:
+        tree.insert(k, str(k))
+    rb_tree = RedBlackTree.from_234(tree)
+    assert rb_tree.is_valid()
+    assert list(rb_tree.items()) == list(tree.items())
+    rb_tree.insert(-1, '-1')
+    rb_tree.delete(keys[0])
+    assert rb_tree.is_valid()
+
+
+def test_round_trip_234():
+    for n in [1, 2, 3, 4, 10, 100, 777]:
+        tree = TwoThreeFourTree()
+        for k in random.Random(n).sample(range(10000), n):
+            tree.insert(k, k)
+        round_trip = RedBlackTree.from_234(tree).to_234()
+        assert round_trip.is_valid()
+        assert shape_234(round_trip.root) == shape_234(tree.root)
+
+
+def test_to_234_after_rb_updates():
+    rb_tree = RedBlackTree()
+    rng = random.Random(4)
+    for k in rng.sample(range(10000), 2000):
+        rb_tree.insert(k, k)
+    for k in list(key for key, value in rb_tree.items())[::3]:
+        rb_tree.delete(k)
+    tree = rb_tree.to_234()
+    assert tree.is_valid()
+    assert list(tree.items()) == list(rb_tree.items())
+
+
+def test_empty_conversions():
+    assert RedBlackTree.from_234(TwoThreeFourTree()).root is not None
+    assert RedBlackTree().to_234().root == None
+
+
+def test_benchmark_compare():
+    rows = RedBlackTree().benchmark_compare([100, 200])
+    assert [row["n"] for row in rows] == [100, 200]
+    assert "rb_insert_time" in rows[0] and "234_insert_time" in rows[0]